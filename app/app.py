@@ -5,6 +5,9 @@ from app.components.fleet_charts import site_distribution_chart, loss_breakdown_
 from app.components.sidebar import sidebar
 from app.pages.site import site_dashboard
 from app.components.settings_modal import settings_modal
+from app.states.site_updates import watch_site_files
+from app.instrumentation import EventRecorder, metrics_api, record_deltas
+from app.weather_service import close_weather_client
 
 
 def fleet_kpi_card(
@@ -60,6 +63,15 @@ def fleet_site_row(site: dict) -> rx.Component:
             ),
             class_name="px-6 py-4 whitespace-nowrap",
         ),
+        rx.el.td(
+            rx.el.div(
+                rx.icon(site["weather_icon"], class_name="h-4 w-4 text-gray-400 mr-2"),
+                rx.el.span(site["temperature"], class_name="text-sm text-gray-300"),
+                title=site["weather_condition"],
+                class_name="flex items-center",
+            ),
+            class_name="px-6 py-4 whitespace-nowrap",
+        ),
         rx.el.td(
             site["ac_capacity"],
             class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-400",
@@ -84,6 +96,36 @@ def fleet_site_row(site: dict) -> rx.Component:
     )
 
 
+def fleet_table_pager() -> rx.Component:
+    button_class = "p-1.5 rounded border border-white/10 text-gray-400 hover:bg-white/5 disabled:opacity-30"
+    return rx.el.div(
+        rx.el.span(
+            f"{FleetState.filtered_count} SITES",
+            class_name="text-[10px] text-gray-500 font-bold tracking-wider",
+        ),
+        rx.el.div(
+            rx.el.button(
+                rx.icon("chevron-left", class_name="h-3 w-3"),
+                on_click=FleetState.set_page(FleetState.page - 1),
+                disabled=FleetState.page == 0,
+                class_name=button_class,
+            ),
+            rx.el.span(
+                f"PAGE {FleetState.page + 1} OF {FleetState.page_count}",
+                class_name="text-[10px] text-gray-400 font-bold tracking-wider",
+            ),
+            rx.el.button(
+                rx.icon("chevron-right", class_name="h-3 w-3"),
+                on_click=FleetState.set_page(FleetState.page + 1),
+                disabled=FleetState.page + 1 >= FleetState.page_count,
+                class_name=button_class,
+            ),
+            class_name="flex items-center gap-3",
+        ),
+        class_name="flex justify-between items-center mt-3 mb-8",
+    )
+
+
 def fleet_header() -> rx.Component:
     return rx.el.header(
         rx.el.div(
@@ -153,7 +195,7 @@ def fleet_header() -> rx.Component:
                     rx.el.div(
                         rx.el.input(
                             type="date",
-                            default_value=FleetState.start_date,
+                            value=FleetState.start_date,
                             on_change=FleetState.set_start_date,
                             class_name="bg-transparent text-white text-xs border-none focus:ring-0 p-0 cursor-pointer w-24",
                         ),
@@ -172,7 +214,7 @@ def fleet_header() -> rx.Component:
                     rx.el.div(
                         rx.el.input(
                             type="date",
-                            default_value=FleetState.end_date,
+                            value=FleetState.end_date,
                             on_change=FleetState.set_end_date,
                             class_name="bg-transparent text-white text-xs border-none focus:ring-0 p-0 cursor-pointer w-24",
                         ),
@@ -255,6 +297,14 @@ def fleet_overview() -> rx.Component:
                         ),
                         class_name="flex justify-between items-center mb-6",
                     ),
+                    rx.foreach(
+                        FleetState.failed_sites,
+                        lambda error: rx.el.p(
+                            rx.icon("triangle-alert", class_name="h-3 w-3 mr-2"),
+                            error,
+                            class_name="flex items-center text-[10px] text-amber-400 font-bold mb-2",
+                        ),
+                    ),
                     rx.el.div(
                         rx.el.table(
                             rx.el.thead(
@@ -268,6 +318,10 @@ def fleet_overview() -> rx.Component:
                                         "Status",
                                         class_name="px-6 py-3 text-left text-[10px] font-bold text-gray-500 uppercase tracking-wider",
                                     ),
+                                    rx.el.th(
+                                        "Weather",
+                                        class_name="px-6 py-3 text-left text-[10px] font-bold text-gray-500 uppercase tracking-wider",
+                                    ),
                                     rx.el.th(
                                         "AC Capacity",
                                         class_name="px-6 py-3 text-left text-[10px] font-bold text-gray-500 uppercase tracking-wider",
@@ -281,34 +335,43 @@ def fleet_overview() -> rx.Component:
                                     ),
                                     rx.el.th(
                                         "Performance",
-                                        class_name="px-6 py-3 text-left text-[10px] font-bold text-gray-500 uppercase tracking-wider",
+                                        class_name="px-6 py-3 text-left text-[10px] font-bold text-gray-500 uppercase tracking-wider cursor-pointer",
+                                        on_click=lambda: FleetState.toggle_sort(
+                                            "performance"
+                                        ),
                                     ),
                                     rx.el.th(
                                         "Measured Energy",
-                                        class_name="px-6 py-3 text-left text-[10px] font-bold text-gray-500 uppercase tracking-wider",
+                                        class_name="px-6 py-3 text-left text-[10px] font-bold text-gray-500 uppercase tracking-wider cursor-pointer",
+                                        on_click=lambda: FleetState.toggle_sort(
+                                            "measured_energy"
+                                        ),
                                     ),
                                     rx.el.th(
                                         "Modeled Energy",
-                                        class_name="px-6 py-3 text-left text-[10px] font-bold text-gray-500 uppercase tracking-wider",
+                                        class_name="px-6 py-3 text-left text-[10px] font-bold text-gray-500 uppercase tracking-wider cursor-pointer",
+                                        on_click=lambda: FleetState.toggle_sort(
+                                            "modeled_energy"
+                                        ),
                                     ),
                                 ),
                                 class_name="bg-black/20",
                             ),
                             rx.el.tbody(
-                                rx.foreach(FleetState.filtered_sites, fleet_site_row),
+                                rx.foreach(FleetState.visible_sites, fleet_site_row),
                                 class_name="divide-y divide-white/5",
                             ),
                             class_name="w-full table-auto",
                         ),
                         class_name="bg-[#111827]/50 rounded-xl border border-white/5 overflow-auto max-h-[600px]",
                     ),
+                    fleet_table_pager(),
                 ),
                 class_name="px-8",
             ),
             class_name="flex-1 overflow-auto",
         ),
         class_name="flex min-h-screen bg-[#0a0f1a] font-['Inter']",
-        on_mount=FleetState.load_fleet_data,
     )
 
 
@@ -322,7 +385,12 @@ app = rx.App(
             rel="stylesheet",
         ),
     ],
+    api_transformer=metrics_api,
 )
+app.register_lifespan_task(watch_site_files)
+app.register_lifespan_task(record_deltas)
+app.register_lifespan_task(close_weather_client)
+app.add_middleware(EventRecorder())
 app.add_page(fleet_overview, route="/", on_load=FleetState.load_fleet_data)
 app.add_page(
     site_dashboard, route="/site/[site_id]", on_load=DashboardState.load_site_data
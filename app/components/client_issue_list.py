@@ -0,0 +1,57 @@
+from typing import Callable
+
+import reflex as rx
+from reflex.experimental.client_state import ClientStateVar
+
+from app.components.issue_list_footer import issue_list_footer
+from app.states.dashboard_state import ISSUE_PAGE_SIZE
+
+
+def label_match(columns: rx.Var, k: rx.Var, query: rx.Var) -> rx.Var:
+    """Whether entry ``k``'s row or column label contains ``query``."""
+    return columns.rows[columns.row[k]].lower().contains(query) | columns.cols[
+        columns.col[k]
+    ].lower().contains(query)
+
+
+class ClientIssueList:
+    """An ``IssueColumns`` table searched and paged in the browser.
+
+    The search text and page size are client-side state, so typing in the
+    modal's search box never reaches the server; the table itself is only
+    sent again when the underlying grid changes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        columns: rx.Var,
+        matches: Callable[[rx.Var, rx.Var, rx.Var], rx.Var] = label_match,
+    ):
+        self.columns = columns
+        self.search = ClientStateVar.create(f"{name}_issue_search", "")
+        self.limit = ClientStateVar.create(f"{name}_issue_limit", ISSUE_PAGE_SIZE)
+        query = self.search.value.to(str).strip().lower()
+        self.matches = rx.Var.range(columns.lost.length()).filter(
+            lambda k: matches(columns, k, query)
+        )
+        self.page = self.matches[: self.limit.value.to(int)]
+
+    @property
+    def on_search(self) -> list:
+        return [self.search.set, self.limit.set_value(ISSUE_PAGE_SIZE)]
+
+    def rows(self, to_issue: Callable[[rx.Var, rx.Var], dict]) -> rx.Var:
+        """The current page, as the dicts ``to_issue`` builds for each entry."""
+        return self.page.map(lambda k: to_issue(self.columns, k)).to(
+            list[dict[str, str | float]]
+        )
+
+    def footer(self) -> rx.Component:
+        return issue_list_footer(
+            self.page.length(),
+            self.matches.length(),
+            on_show_more=self.limit.set_value(
+                self.limit.value.to(int) + ISSUE_PAGE_SIZE
+            ),
+        )
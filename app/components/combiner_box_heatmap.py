@@ -1,5 +1,7 @@
 import reflex as rx
-from app.states.dashboard_state import DashboardState
+from app.states.dashboard_state import CLIENT_SIDE_SEARCH, DashboardState
+from app.components.client_issue_list import ClientIssueList
+from app.components.issue_list_footer import issue_list_footer
 
 
 def cb_issue_row(issue: dict) -> rx.Component:
@@ -20,7 +22,34 @@ def cb_issue_row(issue: dict) -> rx.Component:
     )
 
 
+def _cb_issue_list() -> tuple:
+    """Search handler, rows and footer of the issue modal.
+
+    With ``CLIENT_SIDE_SEARCH`` the issue table is searched in the browser;
+    otherwise every search goes to ``DashboardState``.
+    """
+    if CLIENT_SIDE_SEARCH:
+        issues = ClientIssueList("cb", DashboardState.cb_issue_columns)
+        rows = issues.rows(
+            lambda c, k: {
+                "inverter": c.rows[c.row[k]],
+                "cb": c.cols[c.col[k]],
+                "capacity": c.capacity[k],
+                "lost_energy": c.lost[k],
+            }
+        )
+        return issues.on_search, rows, issues.footer()
+    return (
+        DashboardState.set_cb_modal_search,
+        DashboardState.cb_issues_list,
+        issue_list_footer(
+            DashboardState.cb_issues_list.length(), DashboardState.cb_issue_count
+        ),
+    )
+
+
 def cb_issues_modal() -> rx.Component:
+    on_search, issues, footer = _cb_issue_list()
     return rx.radix.primitives.dialog.root(
         rx.radix.primitives.dialog.portal(
             rx.radix.primitives.dialog.overlay(
@@ -48,7 +77,7 @@ def cb_issues_modal() -> rx.Component:
                         rx.icon("search", class_name="h-4 w-4 text-gray-500 mr-2"),
                         rx.el.input(
                             placeholder="Search inverters or CBs...",
-                            on_change=DashboardState.set_cb_modal_search,
+                            on_change=on_search,
                             class_name="bg-transparent border-none text-sm text-white focus:ring-0 p-0 w-full",
                         ),
                         class_name="flex items-center bg-[#0a0f1a] border border-white/10 rounded-lg px-3 py-2 mb-4",
@@ -75,13 +104,12 @@ def cb_issues_modal() -> rx.Component:
                                     ),
                                 )
                             ),
-                            rx.el.tbody(
-                                rx.foreach(DashboardState.cb_issues_list, cb_issue_row)
-                            ),
+                            rx.el.tbody(rx.foreach(issues, cb_issue_row)),
                             class_name="w-full table-auto",
                         ),
                         class_name="max-h-[60vh] overflow-y-auto border border-white/5 rounded-lg bg-black/20",
                     ),
+                    footer,
                     class_name="bg-[#111827] border border-white/10 rounded-2xl p-6 w-full max-w-3xl",
                 ),
                 class_name="fixed inset-0 flex items-center justify-center z-[100] w-full pointer-events-none [&>div]:pointer-events-auto",
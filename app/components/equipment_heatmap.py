@@ -1,15 +1,56 @@
 import reflex as rx
+from app.states.dashboard_state import DashboardState
 from app.components.tracker_heatmap_plotly import tracker_heatmap_plotly
 from app.components.combiner_box_heatmap import combiner_box_heatmap_plotly
 from app.components.inverter_heatmap import inverter_heatmap_plotly
 
 
+def heatmap_skeleton(height: str) -> rx.Component:
+    return rx.el.div(
+        rx.el.div(class_name="h-6 w-64 bg-white/5 rounded mb-4 animate-pulse"),
+        rx.el.div(
+            *[
+                rx.el.div(
+                    class_name="h-[76px] bg-[#111827]/50 border border-white/5 rounded-xl animate-pulse"
+                )
+                for _ in range(4)
+            ],
+            class_name="grid grid-cols-4 gap-4 mb-6",
+        ),
+        rx.el.div(
+            class_name=f"{height} bg-black/20 rounded-xl border border-white/5 animate-pulse"
+        ),
+        class_name="flex flex-col",
+    )
+
+
+def lazy_heatmap(
+    stage: str, loaded: rx.Var, content: rx.Component, height: str
+) -> rx.Component:
+    return rx.el.div(
+        rx.cond(loaded, content, heatmap_skeleton(height)),
+        on_mount=DashboardState.load_heatmap_stage(stage),
+    )
+
+
 def equipment_heatmap_view() -> rx.Component:
     return rx.el.div(
-        tracker_heatmap_plotly(),
+        lazy_heatmap(
+            "tracker",
+            DashboardState.tracker_loaded,
+            tracker_heatmap_plotly(),
+            "h-[632px]",
+        ),
         rx.el.div(class_name="mb-6"),
-        combiner_box_heatmap_plotly(),
+        lazy_heatmap(
+            "cb", DashboardState.cb_loaded, combiner_box_heatmap_plotly(), "h-[632px]"
+        ),
         rx.el.div(class_name="mb-6"),
-        inverter_heatmap_plotly(),
+        lazy_heatmap(
+            "inverter",
+            DashboardState.inv_loaded,
+            inverter_heatmap_plotly(),
+            "h-[282px]",
+        ),
         class_name="flex flex-col animate-in fade-in duration-500",
     )
\ No newline at end of file
@@ -1,5 +1,7 @@
 import reflex as rx
-from app.states.dashboard_state import DashboardState
+from app.states.dashboard_state import CLIENT_SIDE_SEARCH, DashboardState
+from app.components.client_issue_list import ClientIssueList
+from app.components.issue_list_footer import issue_list_footer
 
 
 def inv_issue_row(issue: dict) -> rx.Component:
@@ -22,7 +24,44 @@ def inv_issue_row(issue: dict) -> rx.Component:
     )
 
 
+def _inverter_name(c: rx.Var, k: rx.Var) -> rx.Var:
+    return c.rows[c.row[k]] + " P" + c.cols[c.col[k]].to(str)
+
+
+def _inverter_match(c: rx.Var, k: rx.Var, query: rx.Var) -> rx.Var:
+    return _inverter_name(c, k).lower().contains(query)
+
+
+def _inv_issue_list() -> tuple:
+    """Search handler, rows and footer of the issue modal.
+
+    With ``CLIENT_SIDE_SEARCH`` the issue table is searched in the browser;
+    otherwise every search goes to ``DashboardState``.
+    """
+    if CLIENT_SIDE_SEARCH:
+        issues = ClientIssueList(
+            "inv", DashboardState.inv_issue_columns, matches=_inverter_match
+        )
+        rows = issues.rows(
+            lambda c, k: {
+                "inverter": _inverter_name(c, k),
+                "block": c.rows[c.row[k]],
+                "capacity": c.capacity[k],
+                "lost_energy": c.lost[k],
+            }
+        )
+        return issues.on_search, rows, issues.footer()
+    return (
+        DashboardState.set_inv_modal_search,
+        DashboardState.inv_issues_list,
+        issue_list_footer(
+            DashboardState.inv_issues_list.length(), DashboardState.inv_issue_count
+        ),
+    )
+
+
 def inv_issues_modal() -> rx.Component:
+    on_search, issues, footer = _inv_issue_list()
     return rx.radix.primitives.dialog.root(
         rx.radix.primitives.dialog.portal(
             rx.radix.primitives.dialog.overlay(
@@ -50,7 +89,7 @@ def inv_issues_modal() -> rx.Component:
                         rx.icon("search", class_name="h-4 w-4 text-gray-500 mr-2"),
                         rx.el.input(
                             placeholder="Search inverters...",
-                            on_change=DashboardState.set_inv_modal_search,
+                            on_change=on_search,
                             class_name="bg-transparent border-none text-sm text-white focus:ring-0 p-0 w-full",
                         ),
                         class_name="flex items-center bg-[#0a0f1a] border border-white/10 rounded-lg px-3 py-2 mb-4",
@@ -77,15 +116,12 @@ def inv_issues_modal() -> rx.Component:
                                     ),
                                 )
                             ),
-                            rx.el.tbody(
-                                rx.foreach(
-                                    DashboardState.inv_issues_list, inv_issue_row
-                                )
-                            ),
+                            rx.el.tbody(rx.foreach(issues, inv_issue_row)),
                             class_name="w-full table-auto",
                         ),
                         class_name="max-h-[60vh] overflow-y-auto border border-white/5 rounded-lg bg-black/20",
                     ),
+                    footer,
                     class_name="bg-[#111827] border border-white/10 rounded-2xl p-6 w-full max-w-3xl",
                 ),
                 class_name="fixed top-1/2 left-1/2 -translate-x-1/2 -translate-y-1/2 z-[100] w-full max-w-3xl",
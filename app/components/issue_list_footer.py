@@ -0,0 +1,25 @@
+import reflex as rx
+from app.states.dashboard_state import DashboardState
+
+
+def issue_list_footer(
+    shown: rx.Var,
+    total: rx.Var,
+    on_show_more: rx.event.EventType = DashboardState.show_more_issues,
+) -> rx.Component:
+    """Count of the issues shown, with a button to load the next page."""
+    return rx.el.div(
+        rx.el.span(
+            f"SHOWING {shown} OF {total}",
+            class_name="text-[10px] text-gray-500 font-bold tracking-wider",
+        ),
+        rx.cond(
+            shown < total,
+            rx.el.button(
+                "SHOW MORE",
+                on_click=on_show_more,
+                class_name="px-3 py-1 rounded border border-white/10 text-[10px] text-gray-400 font-bold tracking-wider hover:bg-white/5",
+            ),
+        ),
+        class_name="flex justify-between items-center mt-3",
+    )
@@ -20,7 +20,7 @@ def site_row(site: dict) -> rx.Component:
                     ),
                     class_name="flex items-center",
                 ),
-                href=f"/site/{site['name']}",
+                href=f"/site/{site['id']}",
                 class_name="hover:opacity-80 transition-opacity",
             ),
             class_name="px-6 py-4 whitespace-nowrap flex items-center gap-2 group",
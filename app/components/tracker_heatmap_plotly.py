@@ -1,5 +1,7 @@
 import reflex as rx
-from app.states.dashboard_state import DashboardState
+from app.states.dashboard_state import CLIENT_SIDE_SEARCH, DashboardState
+from app.components.client_issue_list import ClientIssueList
+from app.components.issue_list_footer import issue_list_footer
 
 
 def tracker_issue_row(issue: dict) -> rx.Component:
@@ -23,7 +25,35 @@ def tracker_issue_row(issue: dict) -> rx.Component:
     )
 
 
+def _tracker_issue_list() -> tuple:
+    """Search handler, rows and footer of the issue modal.
+
+    With ``CLIENT_SIDE_SEARCH`` the issue table is searched in the browser;
+    otherwise every search goes to ``DashboardState``.
+    """
+    if CLIENT_SIDE_SEARCH:
+        issues = ClientIssueList("tracker", DashboardState.tracker_issue_columns)
+        rows = issues.rows(
+            lambda c, k: {
+                "motor": c.cols[c.col[k]],
+                "controller": c.rows[c.row[k]],
+                "dc_capacity": c.capacity[k],
+                "lost_energy": c.lost[k],
+            }
+        )
+        return issues.on_search, rows, issues.footer()
+    return (
+        DashboardState.set_tracker_modal_search,
+        DashboardState.motors_with_issues_list,
+        issue_list_footer(
+            DashboardState.motors_with_issues_list.length(),
+            DashboardState.tracker_issue_count,
+        ),
+    )
+
+
 def tracker_issues_modal() -> rx.Component:
+    on_search, issues, footer = _tracker_issue_list()
     return rx.radix.primitives.dialog.root(
         rx.radix.primitives.dialog.portal(
             rx.radix.primitives.dialog.overlay(
@@ -51,7 +81,7 @@ def tracker_issues_modal() -> rx.Component:
                         rx.icon("search", class_name="h-4 w-4 text-gray-500 mr-2"),
                         rx.el.input(
                             placeholder="Search motors or controllers...",
-                            on_change=DashboardState.set_tracker_modal_search,
+                            on_change=on_search,
                             class_name="bg-transparent border-none text-sm text-white focus:ring-0 p-0 w-full",
                         ),
                         class_name="flex items-center bg-[#0a0f1a] border border-white/10 rounded-lg px-3 py-2 mb-4",
@@ -80,7 +110,7 @@ def tracker_issues_modal() -> rx.Component:
                             ),
                             rx.el.tbody(
                                 rx.foreach(
-                                    DashboardState.motors_with_issues_list,
+                                    issues,
                                     tracker_issue_row,
                                 )
                             ),
@@ -88,6 +118,7 @@ def tracker_issues_modal() -> rx.Component:
                         ),
                         class_name="max-h-[60vh] overflow-y-auto border border-white/5 rounded-lg bg-black/20",
                     ),
+                    footer,
                     class_name="bg-[#111827] border border-white/10 rounded-2xl p-6 w-full max-w-3xl",
                 ),
                 class_name="fixed top-1/2 left-1/2 -translate-x-1/2 -translate-y-1/2 z-[100] w-full max-w-3xl",
@@ -127,6 +158,32 @@ def tracker_kpi_card(
     )
 
 
+def tracker_zoom_bar() -> rx.Component:
+    return rx.cond(
+        DashboardState.tracker_window.length() > 0,
+        rx.el.div(
+            rx.el.p(
+                "Full resolution window",
+                class_name="text-[10px] text-gray-500 font-bold uppercase tracking-widest",
+            ),
+            rx.el.button(
+                rx.icon("zoom-out", class_name="h-3 w-3 mr-1"),
+                "Full Site",
+                on_click=DashboardState.reset_tracker_zoom,
+                class_name="flex items-center px-2 py-1 text-[10px] font-bold text-cyan-400 uppercase tracking-widest bg-white/5 rounded-md hover:bg-white/10 transition-colors",
+            ),
+            class_name="flex justify-between items-center mb-2",
+        ),
+        rx.cond(
+            DashboardState.tracker_heatmap_tiled,
+            rx.el.p(
+                "Aggregated overview - click a tile to view it at full resolution",
+                class_name="text-[10px] text-gray-500 font-bold uppercase tracking-widest mb-2",
+            ),
+        ),
+    )
+
+
 def tracker_heatmap_plotly() -> rx.Component:
     return rx.el.div(
         tracker_issues_modal(),
@@ -167,7 +224,12 @@ def tracker_heatmap_plotly() -> rx.Component:
         ),
         rx.el.div(
             rx.el.div(
-                rx.plotly(data=DashboardState.tracker_heatmap_fig, class_name="w-full"),
+                tracker_zoom_bar(),
+                rx.plotly(
+                    data=DashboardState.tracker_heatmap_fig,
+                    on_click=DashboardState.zoom_tracker_heatmap,
+                    class_name="w-full",
+                ),
                 class_name="bg-black/20 rounded-xl border border-white/5 p-4",
             ),
             class_name="flex flex-col relative",
@@ -0,0 +1,429 @@
+"""NumPy-backed equipment heatmap grids and their load-time aggregates."""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from app.data.metrics import PrefixSums
+from app.data.search_index import SearchIndex
+
+REVENUE_PER_MWH = 40.0
+TILE_MAX_ROWS = 100
+TILE_MAX_COLS = 200
+
+
+def _readonly(values, dtype) -> np.ndarray:
+    array = np.asarray(values, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+def _block_reduce(
+    values: np.ndarray, block_rows: int, block_cols: int, reduce, fill: float
+) -> np.ndarray:
+    """Reduce ``values`` over non-overlapping blocks, padding the last ones."""
+    n_rows = -(-values.shape[0] // block_rows)
+    n_cols = -(-values.shape[1] // block_cols)
+    padded = np.full(
+        (n_rows * block_rows, n_cols * block_cols), fill, dtype=values.dtype
+    )
+    padded[: values.shape[0], : values.shape[1]] = values
+    blocks = padded.reshape(n_rows, block_rows, n_cols, block_cols)
+    return reduce(blocks, axis=(1, 3))
+
+
+def _tile_labels(names: tuple[str, ...], block: int) -> tuple[str, ...]:
+    if block == 1:
+        return names
+    return tuple(
+        f"{names[i]} – {names[min(i + block, len(names)) - 1]}"
+        for i in range(0, len(names), block)
+    )
+
+
+@dataclass(frozen=True, eq=False)
+class GridTiles:
+    """A window of an ``EquipmentGrid`` aggregated into blocks of cells.
+
+    Each tile covers ``block_rows`` x ``block_cols`` cells starting at
+    ``window``'s top-left corner; ``lost`` and ``capacity`` are block sums and
+    ``peak`` is the largest single-cell loss in the block. With 1 x 1 blocks
+    the tiles are the cells themselves.
+    """
+
+    window: tuple[int, int, int, int]
+    block_rows: int
+    block_cols: int
+    rows: tuple[str, ...]
+    cols: tuple[str, ...]
+    lost: np.ndarray
+    peak: np.ndarray
+    capacity: np.ndarray
+
+    @property
+    def full_resolution(self) -> bool:
+        return self.block_rows == 1 and self.block_cols == 1
+
+    def tile_window(self, row_label: str, col_label: str) -> tuple[int, int, int, int]:
+        """Cell window ``(row_start, row_stop, col_start, col_stop)`` of a tile."""
+        row_start, row_stop, col_start, col_stop = self.window
+        i = row_start + self.rows.index(row_label) * self.block_rows
+        j = col_start + self.cols.index(col_label) * self.block_cols
+        return (
+            i,
+            min(i + self.block_rows, row_stop),
+            j,
+            min(j + self.block_cols, col_stop),
+        )
+
+
+@dataclass(frozen=True, eq=False)
+class IssueTable:
+    """The cells of an ``EquipmentGrid`` that lose energy, as sorted columns.
+
+    Entry ``k`` is cell ``(rows[k], cols[k])``. Entries are ordered by lost
+    energy (rounded to 0.1), largest first, so any filtered selection is
+    already in display order and its top N rows are its first N entries.
+    ``lost_display`` and ``capacity_display`` are the values rounded for
+    display.
+    """
+
+    rows: np.ndarray
+    cols: np.ndarray
+    lost: np.ndarray
+    lost_display: np.ndarray
+    capacity_display: np.ndarray
+
+    @classmethod
+    def build(cls, lost: np.ndarray, capacity: np.ndarray) -> "IssueTable":
+        rows, cols = np.nonzero(lost > 0)
+        lost_display = np.round(lost[rows, cols].astype(np.float64), 1)
+        order = np.argsort(-lost_display, kind="stable")
+        rows, cols = rows[order], cols[order]
+        return cls(
+            rows=_readonly(rows, np.int32),
+            cols=_readonly(cols, np.int32),
+            lost=_readonly(lost[rows, cols], np.float32),
+            lost_display=_readonly(lost_display[order], np.float64),
+            capacity_display=_readonly(
+                np.round(capacity[rows, cols].astype(np.float64), 1), np.float64
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def select(
+        self, threshold: float = 0.0, cell_mask: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Entries losing more than ``threshold``, in display order.
+
+        ``cell_mask`` optionally restricts them to the cells it marks.
+        """
+        keep = self.lost > threshold
+        if cell_mask is not None:
+            keep &= cell_mask[self.rows, self.cols]
+        return np.flatnonzero(keep)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (
+                self.rows,
+                self.cols,
+                self.lost,
+                self.lost_display,
+                self.capacity_display,
+            )
+        )
+
+
+@dataclass(frozen=True, eq=False)
+class EquipmentGrid:
+    """One equipment heatmap: labelled float32 matrices plus their aggregates.
+
+    ``lost`` drives the heatmap colour; ``layers`` holds any further float
+    matrices of the same shape and ``labels`` an optional per-cell string.
+    The aggregates are computed once, in a single vectorized pass, by
+    ``EquipmentGrid.build``. ``row_index`` and ``col_index`` are search
+    indexes over the row and column labels, shared by every window of a
+    ``GridSeries``.
+    """
+
+    rows: tuple[str, ...]
+    cols: tuple[str, ...]
+    lost: np.ndarray
+    capacity: np.ndarray
+    layers: Mapping[str, np.ndarray] = field(default_factory=dict)
+    labels: np.ndarray | None = None
+    issue_count: int = 0
+    total_lost: float = 0.0
+    total_revenue: float = 0.0
+    worst_row: str = "N/A"
+    worst_col: str = "N/A"
+    worst_cell: tuple[int, int] | None = None
+    row_index: SearchIndex | None = None
+    col_index: SearchIndex | None = None
+
+    @classmethod
+    def build(
+        cls,
+        rows,
+        cols,
+        lost,
+        capacity,
+        labels=None,
+        row_index: SearchIndex | None = None,
+        col_index: SearchIndex | None = None,
+        **layers,
+    ) -> "EquipmentGrid":
+        lost = _readonly(lost, np.float32).reshape(len(rows), len(cols))
+        worst_row, worst_col, worst_cell = "N/A", "N/A", None
+        total_lost = float(lost.sum(dtype=np.float64))
+        if lost.size:
+            worst_row = rows[int(np.argmax(lost.sum(axis=1, dtype=np.float64)))]
+            worst_col = cols[int(np.argmax(lost.sum(axis=0, dtype=np.float64)))]
+            worst_cell = tuple(
+                int(i) for i in np.unravel_index(np.argmax(lost), lost.shape)
+            )
+        return cls(
+            rows=tuple(rows),
+            cols=tuple(cols),
+            lost=lost,
+            capacity=_readonly(capacity, np.float32).reshape(lost.shape),
+            layers={
+                name: _readonly(values, np.float32).reshape(lost.shape)
+                for name, values in layers.items()
+            },
+            labels=None if labels is None else _readonly(labels, object),
+            issue_count=int(np.count_nonzero(lost > 0)),
+            total_lost=total_lost,
+            total_revenue=total_lost * REVENUE_PER_MWH,
+            worst_row=worst_row,
+            worst_col=worst_col,
+            worst_cell=worst_cell,
+            row_index=SearchIndex(rows) if row_index is None else row_index,
+            col_index=SearchIndex(cols) if col_index is None else col_index,
+        )
+
+    @cached_property
+    def issues(self) -> IssueTable:
+        """The grid's issue table, built on first use and kept with the grid."""
+        return IssueTable.build(self.lost, self.capacity)
+
+    def search_mask(self, query: str) -> np.ndarray:
+        """Cells whose row or column label contains ``query``."""
+        return self.row_index.mask(query)[:, None] | self.col_index.mask(query)
+
+    def tiles(
+        self,
+        window: tuple[int, int, int, int] | None = None,
+        max_rows: int = TILE_MAX_ROWS,
+        max_cols: int = TILE_MAX_COLS,
+    ) -> GridTiles:
+        """Aggregate a window of the grid into at most max_rows x max_cols tiles.
+
+        ``window`` is ``(row_start, row_stop, col_start, col_stop)`` in cells and
+        defaults to the whole grid. Windows that already fit are returned at
+        full resolution.
+        """
+        row_start, row_stop, col_start, col_stop = window or (
+            0,
+            len(self.rows),
+            0,
+            len(self.cols),
+        )
+        lost = self.lost[row_start:row_stop, col_start:col_stop]
+        capacity = self.capacity[row_start:row_stop, col_start:col_stop]
+        block_rows = max(1, -(-lost.shape[0] // max_rows))
+        block_cols = max(1, -(-lost.shape[1] // max_cols))
+        rows = _tile_labels(self.rows[row_start:row_stop], block_rows)
+        cols = _tile_labels(self.cols[col_start:col_stop], block_cols)
+        if block_rows == 1 and block_cols == 1:
+            peak = lost
+        else:
+            peak = _block_reduce(lost, block_rows, block_cols, np.max, -np.inf)
+            lost = _block_reduce(lost, block_rows, block_cols, np.sum, 0.0)
+            capacity = _block_reduce(capacity, block_rows, block_cols, np.sum, 0.0)
+        return GridTiles(
+            window=(row_start, row_stop, col_start, col_stop),
+            block_rows=block_rows,
+            block_cols=block_cols,
+            rows=rows,
+            cols=cols,
+            lost=lost,
+            peak=peak,
+            capacity=capacity,
+        )
+
+    def zoom_window(
+        self,
+        tile_window: tuple[int, int, int, int],
+        max_rows: int = TILE_MAX_ROWS,
+        max_cols: int = TILE_MAX_COLS,
+    ) -> tuple[int, int, int, int]:
+        """The largest full-resolution window centred on ``tile_window``."""
+        row_start, row_stop, col_start, col_stop = tile_window
+
+        def _span(start: int, stop: int, size: int, limit: int) -> tuple[int, int]:
+            length = min(size, limit)
+            begin = max(0, min((start + stop - length) // 2, size - length))
+            return begin, begin + length
+
+        return (
+            *_span(row_start, row_stop, len(self.rows), max_rows),
+            *_span(col_start, col_stop, len(self.cols), max_cols),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the grid's arrays."""
+        arrays = [self.lost, self.capacity, *self.layers.values()]
+        size = sum(array.nbytes for array in arrays)
+        if self.labels is not None:
+            size += self.labels.nbytes + sum(
+                len(label) for label in self.labels.flat if isinstance(label, str)
+            )
+        if "issues" in self.__dict__:
+            size += self.issues.nbytes
+        return size
+
+    @property
+    def worst_label(self) -> str:
+        if self.worst_cell is None or self.labels is None:
+            return "N/A"
+        return str(self.labels[self.worst_cell])
+
+
+class GridSeries:
+    """Daily per-cell values behind an equipment grid.
+
+    Each series holds one column per grid cell, in row-major order; trailing
+    cells without a column (padding) are zero. ``grid``
+    builds the ``EquipmentGrid`` of any date window from prefix sums, and
+    keeps the most recently used windows so sessions looking at the same
+    range share one grid (and its memoized figures). ``capacity`` may be a
+    fixed matrix instead of a series; ``lost`` defaults to the sum of the
+    layers.
+    """
+
+    def __init__(
+        self,
+        rows,
+        cols,
+        lost: PrefixSums | None,
+        capacity: PrefixSums | np.ndarray,
+        labels=None,
+        max_windows: int = 8,
+        **layers: PrefixSums,
+    ):
+        self.rows = list(rows)
+        self.cols = list(cols)
+        self._lost = lost
+        self._capacity = capacity
+        self._labels = labels
+        self._row_index = SearchIndex(self.rows)
+        self._col_index = SearchIndex(self.cols)
+        self._layers = layers
+        self._series = [
+            s for s in (lost, capacity, *layers.values()) if isinstance(s, PrefixSums)
+        ]
+        self._max_windows = max_windows
+        self._lock = threading.Lock()
+        self._grids: OrderedDict[tuple, EquipmentGrid] = OrderedDict()
+        self._nbytes = self._max_nbytes()
+
+    def _max_nbytes(self) -> int:
+        size = sum(series.nbytes for series in self._series)
+        size += self._row_index.nbytes + self._col_index.nbytes
+        if isinstance(self._capacity, np.ndarray):
+            size += self._capacity.nbytes
+        if self._labels is not None:
+            labels = np.asarray(self._labels, dtype=object)
+            size += labels.nbytes + sum(
+                len(label) for label in labels.flat if isinstance(label, str)
+            )
+        # A window grid holds float32 lost, capacity and layer matrices and
+        # an issue table of up to one entry (int32 row and column, float32
+        # lost, float64 display values) per cell; labels are shared.
+        cells = len(self.rows) * len(self.cols)
+        per_window = cells * (4 * (2 + len(self._layers)) + 28)
+        return size + self._max_windows * per_window
+
+    def _cells(self, values: np.ndarray) -> np.ndarray:
+        return np.pad(values, (0, len(self.rows) * len(self.cols) - len(values)))
+
+    def grid(self, start: str | None = None, end: str | None = None) -> EquipmentGrid:
+        """The grid summed over the inclusive ``start``..``end`` date window."""
+        key = tuple(series.bounds(start, end) for series in self._series)
+        with self._lock:
+            grid = self._grids.get(key)
+            if grid is not None:
+                self._grids.move_to_end(key)
+                return grid
+        layers = {
+            name: self._cells(s.sum(start, end)) for name, s in self._layers.items()
+        }
+        if self._lost is not None:
+            lost = self._cells(self._lost.sum(start, end))
+        else:
+            lost = np.sum(list(layers.values()), axis=0)
+        capacity = self._capacity
+        if isinstance(capacity, PrefixSums):
+            capacity = self._cells(capacity.sum(start, end))
+        grid = EquipmentGrid.build(
+            self.rows,
+            self.cols,
+            lost,
+            capacity,
+            labels=self._labels,
+            row_index=self._row_index,
+            col_index=self._col_index,
+            **layers,
+        )
+        with self._lock:
+            grid = self._grids.setdefault(key, grid)
+            while len(self._grids) > self._max_windows:
+                self._grids.popitem(last=False)
+        return grid
+
+    @property
+    def nbytes(self) -> int:
+        """Memory the series can hold: its prefix sums, search indexes and
+        labels plus a full cache of window grids.
+
+        Window grids are counted by their shape, so the size is fixed when
+        the series is built and the cache can never outgrow it.
+        """
+        return self._nbytes
+
+
+def pivot_columns(
+    sums: pd.Series,
+    keys: list[tuple[str, str]],
+    rows: list[str],
+    cols: list[str],
+    fill=0.0,
+) -> np.ndarray:
+    """Lay out per-column values as a rows x cols matrix.
+
+    ``keys`` gives the (row, col) position of each entry of ``sums``; cells
+    without a value are set to ``fill``.
+    """
+    if not keys:
+        return np.full((len(rows), len(cols)), fill, dtype=object)
+    series = pd.Series(
+        sums.to_numpy(), index=pd.MultiIndex.from_tuples(keys), dtype=object
+    )
+    return (
+        series.unstack()
+        .reindex(index=rows, columns=cols)
+        .fillna(fill)
+        .to_numpy(dtype=object)
+    )
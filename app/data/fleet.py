@@ -0,0 +1,389 @@
+"""Fleet-wide KPI summaries of every registered site.
+
+Reading a site's KPI sheets into prefix sums is CPU-bound pandas work, so
+the sites are fanned out across the shared process pool and the fleet page
+waits for the slowest site rather than for the sum of all of them. The
+prefix sums then stay in the server process until the site's workbooks
+change, so summarizing the fleet over another date window is an in-process
+O(1) lookup per site. A site that fails to load is reported on its own and
+never stops the others.
+
+The full-range fleet view (site rows, fleet totals and donut breakdowns) is
+materialized in a small JSON snapshot (``PEAK_FLEET_SNAPSHOT``), so the
+landing page reads one file instead of every site's workbooks. The snapshot
+records the size and mtime of every workbook it was built from and is
+rebuilt when any of them, or the site registry, changes.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import urllib.parse
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from app.data.pool import process_pool, reset_process_pool
+from app.data.sheet_cache import file_stamp, read_sheets
+from app.data.site_dataset import (
+    STAGE_SHEETS,
+    kpi_values,
+    load_kpis,
+    load_metadata,
+)
+from app.data.site_registry import Site, site_registry
+
+SNAPSHOT_FILE = Path(os.environ.get("PEAK_FLEET_SNAPSHOT", ".cache/fleet.json"))
+SNAPSHOT_VERSION = 2
+NO_DATA = "NO DATA"
+STATUS_COLORS = {
+    "CRITICAL": ("text-red-400", "#ef4444"),
+    "WARNING": ("text-amber-400", "#f59e0b"),
+    "HEALTHY": ("text-green-400", "#10b981"),
+}
+LOSS_CATEGORIES = [
+    ("DERATED", "derated_loss", "#f59e0b"),
+    ("PLANT OFFLINE", "plant_offline_loss", "#ef4444"),
+    ("INVERTERS OFFLINE", "inverters_offline_loss", "#f97316"),
+    ("UNDERPERFORMING", "underperformance_loss", "#8b5cf6"),
+]
+
+_snapshot_lock = threading.Lock()
+_snapshot_cache: tuple[list[int], dict[str, Any]] | None = None
+
+
+_series_lock = threading.Lock()
+_series_load_lock = threading.Lock()
+# Site id -> (stamps of the site's workbooks, its KPI series or the error
+# message it failed with).
+_series_cache: dict[str, tuple[list, dict[str, Any] | str]] = {}
+
+
+def site_series(site: Site) -> dict[str, Any]:
+    """KPI prefix sums and fixed details of one site.
+
+    Runs in a worker process; raises if the site's master report cannot be
+    read.
+    """
+    sheets = read_sheets(site.master_file, STAGE_SHEETS["kpis"], missing_ok=True)
+    series = load_kpis(sheets)
+    metadata: dict[str, Any] = {}
+    coordinates = None
+    try:
+        load_metadata(site.epc_file, metadata)
+        ac_capacity = f"{metadata['ac_capacity']} AC"
+        coordinates = [float(metadata["lat"]), float(metadata["lon"])]
+    except Exception as e:
+        logging.exception(f"Error loading site details for {site.id}: {e}")
+        ac_capacity = "N/A"
+    return {"series": series, "ac_capacity": ac_capacity, "coordinates": coordinates}
+
+
+def _window_summary(
+    kpi: dict[str, Any], start: str | None, end: str | None
+) -> dict[str, Any]:
+    series = kpi["series"]
+    kpis = kpi_values(series, start, end)
+    metrics = series["Site Metrics"]
+    return {
+        "ac_capacity": kpi["ac_capacity"],
+        "coordinates": kpi["coordinates"],
+        "availability": kpis["availability"],
+        "performance": kpis["performance"],
+        "measured_energy": round(kpis["measured_energy"], 1),
+        "modeled_energy": round(kpis["modeled_energy"], 1),
+        "derated_loss": kpis["derated_loss"],
+        "plant_offline_loss": kpis["plant_offline_loss"],
+        "inverters_offline_loss": kpis["inverters_offline_loss"],
+        "underperformance_loss": kpis["underperformance_loss"],
+        "first_date": metrics.first_date,
+        "last_date": metrics.last_date,
+    }
+
+
+def site_summary(
+    site: Site, start: str | None = None, end: str | None = None
+) -> dict[str, Any]:
+    """KPI row of one site over the inclusive ``start``..``end`` window.
+
+    Raises if the site's master report cannot be summarized.
+    """
+    return _window_summary(site_series(site), start, end)
+
+
+def _load_series(
+    sites: list[Site],
+) -> tuple[dict[str, dict[str, Any]], dict[str, str], list[Site]]:
+    """Build the KPI series of ``sites`` in parallel on the process pool.
+
+    Returns the series and the error message of every site that failed, both
+    keyed by site id, and the sites lost to a dead worker.
+    """
+    loaded: dict[str, dict[str, Any]] = {}
+    failures: dict[str, str] = {}
+    pending = list(sites)
+    for _attempt in range(2):
+        pool = process_pool()
+        try:
+            futures = {pool.submit(site_series, site): site for site in pending}
+        except BrokenProcessPool:
+            reset_process_pool(pool)
+            continue
+        broken = False
+        for future in as_completed(futures):
+            site = futures[future]
+            try:
+                loaded[site.id] = future.result()
+            except BrokenProcessPool:
+                broken = True
+            except Exception as e:
+                logging.error(f"Error summarizing site {site.id}: {e}")
+                failures[site.id] = str(e) or type(e).__name__
+        pending = [
+            site
+            for site in pending
+            if site.id not in loaded and site.id not in failures
+        ]
+        if not broken:
+            break
+        # A worker died (e.g. out of memory): retry the unfinished sites once
+        # on a fresh pool rather than failing all of them.
+        reset_process_pool(pool)
+    return loaded, failures, pending
+
+
+def _resident_series(sites: list[Site]) -> dict[str, dict[str, Any] | str]:
+    """Each site's KPI series (or load error), loading the missing or stale ones.
+
+    Concurrent callers share one load.
+    """
+    stamps = {
+        site.id: [file_stamp(site.epc_file), file_stamp(site.master_file)]
+        for site in sites
+    }
+
+    def _cached() -> dict[str, dict[str, Any] | str]:
+        with _series_lock:
+            return {
+                site.id: _series_cache[site.id][1]
+                for site in sites
+                if site.id in _series_cache
+                and _series_cache[site.id][0] == stamps[site.id]
+            }
+
+    resident = _cached()
+    if len(resident) == len(sites):
+        return resident
+    with _series_load_lock:
+        resident = _cached()
+        missing = [site for site in sites if site.id not in resident]
+        if not missing:
+            return resident
+        loaded, failures, lost = _load_series(missing)
+        with _series_lock:
+            for site_id, value in (*loaded.items(), *failures.items()):
+                _series_cache[site_id] = (stamps[site_id], value)
+    resident.update(loaded)
+    resident.update(failures)
+    resident.update((site.id, "worker process terminated") for site in lost)
+    return resident
+
+
+def summarize_sites(
+    sites: list[Site], start: str | None = None, end: str | None = None
+) -> tuple[dict[str, dict[str, Any]], dict[str, str]]:
+    """Summarize ``sites`` over the inclusive ``start``..``end`` window.
+
+    Only sites whose KPI series are not yet resident (or whose workbooks
+    changed) are read, in parallel on the process pool; every window is
+    then answered from the resident prefix sums. Returns the summaries and
+    the error message of every site that failed, both keyed by site id.
+    """
+    summaries: dict[str, dict[str, Any]] = {}
+    failures: dict[str, str] = {}
+    for site_id, kpi in _resident_series(sites).items():
+        if isinstance(kpi, str):
+            failures[site_id] = kpi
+            continue
+        try:
+            summaries[site_id] = _window_summary(kpi, start, end)
+        except Exception as e:
+            logging.error(f"Error summarizing site {site_id}: {e}")
+            failures[site_id] = str(e) or type(e).__name__
+    return summaries, failures
+
+
+def _site_row(site: Site, summary: dict[str, Any] | None) -> dict[str, Any]:
+    row = {
+        "id": urllib.parse.quote(site.id),
+        "name": site.name,
+        "location": site.location,
+        "status": NO_DATA,
+        "status_color": "text-gray-400",
+        "ac_capacity": "N/A",
+        "availability": 0.0,
+        "performance": 0.0,
+        "measured_energy": 0.0,
+        "modeled_energy": 0.0,
+        "temperature": "--",
+        "weather_icon": "cloud",
+        "weather_condition": "",
+    }
+    if summary is not None:
+        row.update(
+            {key: summary[key] for key in row if key in summary},
+            status="HEALTHY",
+            status_color=STATUS_COLORS["HEALTHY"][0],
+        )
+    return row
+
+
+def fleet_view(
+    sites: list[Site],
+    summaries: dict[str, dict[str, Any]],
+    failures: dict[str, str],
+) -> dict[str, Any]:
+    """Everything the fleet page shows, built from per-site summaries.
+
+    Averages and totals only count the sites that loaded.
+    """
+    rows = [_site_row(site, summaries.get(site.id)) for site in sites]
+    loaded = [summaries[site.id] for site in sites if site.id in summaries]
+    count = len(loaded) or 1
+    losses = {
+        key: sum(summary[key] for summary in loaded) for _, key, _ in LOSS_CATEGORIES
+    }
+    loss_total = sum(losses.values())
+    first_dates = [s["first_date"] for s in loaded if s["first_date"]]
+    last_dates = [s["last_date"] for s in loaded if s["last_date"]]
+    return {
+        "sites": rows,
+        "failed_sites": [
+            f"{site.name}: {failures[site.id]}" for site in sites if site.id in failures
+        ],
+        "total_sites": len(rows),
+        "avg_availability": round(sum(s["availability"] for s in loaded) / count, 1),
+        "avg_performance": round(sum(s["performance"] for s in loaded) / count, 1),
+        "total_measured_energy": sum(s["measured_energy"] for s in loaded),
+        "total_lost_energy": sum(
+            s["modeled_energy"] - s["measured_energy"] for s in loaded
+        ),
+        "site_distribution": [
+            {
+                "name": status,
+                "value": sum(row["status"] == status for row in rows),
+                "fill": fill,
+            }
+            for status, (_, fill) in STATUS_COLORS.items()
+        ],
+        "loss_breakdown": [
+            {
+                "name": name,
+                "value": round(losses[key] / loss_total * 100, 1)
+                if loss_total
+                else 0.0,
+                "fill": fill,
+            }
+            for name, key, fill in LOSS_CATEGORIES
+        ],
+        "coordinates": {
+            site.id: summaries[site.id]["coordinates"]
+            for site in sites
+            if site.id in summaries and summaries[site.id]["coordinates"]
+        },
+        "start_date": min(first_dates) if first_dates else None,
+        "end_date": max(last_dates) if last_dates else None,
+    }
+
+
+def _sources(sites: list[Site]) -> list[list]:
+    """What a snapshot depends on: every site and the stamps of its files."""
+    return [
+        [
+            site.id,
+            site.name,
+            site.location,
+            file_stamp(site.epc_file),
+            file_stamp(site.master_file),
+        ]
+        for site in sites
+    ]
+
+
+def build_snapshot(sites: list[Site] | None = None) -> dict[str, Any]:
+    """Summarize every site and return the fleet snapshot."""
+    sites = site_registry.sites() if sites is None else sites
+    sources = _sources(sites)
+    summaries, failures = summarize_sites(sites)
+    return {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now(UTC).isoformat(),
+        "sources": sources,
+        **fleet_view(sites, summaries, failures),
+    }
+
+
+def write_snapshot(snapshot: dict[str, Any], path: str | Path = SNAPSHOT_FILE):
+    """Atomically replace the snapshot file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temporary name: the ingest CLI, the site watcher and request
+    # handlers may write the snapshot from different processes at once.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _read_snapshot(path: Path) -> dict[str, Any] | None:
+    """The snapshot at ``path``, kept in memory until the file changes."""
+    global _snapshot_cache
+    stamp = file_stamp(path)
+    if stamp is None:
+        return None
+    if _snapshot_cache is not None and _snapshot_cache[0] == stamp:
+        return _snapshot_cache[1]
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable fleet snapshot {path}: {e}")
+        return None
+    _snapshot_cache = (stamp, snapshot)
+    return snapshot
+
+
+def fleet_snapshot(path: str | Path = SNAPSHOT_FILE) -> dict[str, Any]:
+    """The current fleet snapshot, rebuilding it if any site has changed.
+
+    Concurrent callers share one rebuild: the first one builds and writes
+    the snapshot while the others wait and then read it.
+    """
+    path = Path(path)
+    sites = site_registry.sites()
+    sources = _sources(sites)
+
+    def _fresh(snapshot):
+        return (
+            snapshot is not None
+            and snapshot.get("version") == SNAPSHOT_VERSION
+            and snapshot.get("sources") == sources
+        )
+
+    snapshot = _read_snapshot(path)
+    if _fresh(snapshot):
+        return snapshot
+    with _snapshot_lock:
+        snapshot = _read_snapshot(path)
+        if _fresh(snapshot):
+            return snapshot
+        snapshot = build_snapshot(sites)
+        try:
+            write_snapshot(snapshot, path)
+        except OSError as e:
+            logging.exception(f"Error writing fleet snapshot: {e}")
+        return snapshot
@@ -0,0 +1,94 @@
+"""Daily time series stored as prefix sums for constant-time date windows."""
+
+import numpy as np
+import pandas as pd
+
+
+def _day(value: str | None) -> np.datetime64 | None:
+    if not value:
+        return None
+    try:
+        return np.datetime64(pd.Timestamp(value).date(), "D")
+    except (TypeError, ValueError):
+        return None
+
+
+class PrefixSums:
+    """Cumulative per-day sums of a set of columns.
+
+    The sum of any column over any date window is the difference of two
+    cumulative rows, so windows cost O(1) per column regardless of how many
+    days the series covers.
+    """
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray, columns: list[str]):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.columns = tuple(columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        cumulative = np.zeros((len(self.dates) + 1, len(self.columns)))
+        np.cumsum(np.asarray(values, dtype=np.float64), axis=0, out=cumulative[1:])
+        cumulative.setflags(write=False)
+        self._cumulative = cumulative
+
+    @classmethod
+    def from_frame(
+        cls, frame: pd.DataFrame, date_column: str, columns: list[str] | None = None
+    ) -> "PrefixSums":
+        """Sum ``columns`` of ``frame`` per day of ``date_column``.
+
+        Missing values count as zero; rows without a valid date are dropped.
+        """
+        columns = list(
+            columns if columns is not None else frame.columns.drop(date_column)
+        )
+        days = pd.to_datetime(frame[date_column], errors="coerce").dt.normalize()
+        values = frame[columns].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+        daily = values[days.notna().to_numpy()].groupby(days.dropna()).sum()
+        return cls(daily.index.to_numpy(), daily.to_numpy(), columns)
+
+    @property
+    def nbytes(self) -> int:
+        return self._cumulative.nbytes + self.dates.nbytes
+
+    @property
+    def first_date(self) -> str | None:
+        return str(self.dates[0]) if len(self.dates) else None
+
+    @property
+    def last_date(self) -> str | None:
+        return str(self.dates[-1]) if len(self.dates) else None
+
+    def bounds(self, start: str | None, end: str | None) -> tuple[int, int]:
+        """Half-open range of day indices covered by a date window."""
+        first, last = _day(start), _day(end)
+        lo = 0 if first is None else int(np.searchsorted(self.dates, first, "left"))
+        hi = (
+            len(self.dates)
+            if last is None
+            else int(np.searchsorted(self.dates, last, "right"))
+        )
+        return lo, max(lo, hi)
+
+    def days(self, start: str | None = None, end: str | None = None) -> int:
+        """Number of days with data in the window."""
+        lo, hi = self.bounds(start, end)
+        return hi - lo
+
+    def sum(self, start: str | None = None, end: str | None = None) -> np.ndarray:
+        """Per-column sums over the inclusive ``start``..``end`` window.
+
+        Either bound may be omitted (or unparseable) to leave that side open.
+        """
+        lo, hi = self.bounds(start, end)
+        return self._cumulative[hi] - self._cumulative[lo]
+
+    def total(
+        self, column: str, start: str | None = None, end: str | None = None
+    ) -> float:
+        """Sum of one column over the window."""
+        lo, hi = self.bounds(start, end)
+        i = self._index[column]
+        return float(self._cumulative[hi, i] - self._cumulative[lo, i])
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._index
@@ -0,0 +1,50 @@
+"""Worker pools that keep blocking ingestion work off the event loop."""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("PEAK_INGEST_WORKERS", "4")),
+    thread_name_prefix="peak-ingest",
+)
+
+_process_lock = threading.Lock()
+_process_executor: ProcessPoolExecutor | None = None
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking callable in the ingestion pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args))
+
+
+def process_pool() -> ProcessPoolExecutor:
+    """Shared pool of worker processes for CPU-bound work.
+
+    Sized by ``PEAK_PROCESS_WORKERS`` (every core by default). Workers are
+    spawned rather than forked so they never inherit the server's threads and
+    locks, and they stay up between calls so later batches skip the start-up.
+    """
+    global _process_executor
+    with _process_lock:
+        if _process_executor is None:
+            workers = int(os.environ.get("PEAK_PROCESS_WORKERS", "0"))
+            _process_executor = ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_executor
+
+
+def reset_process_pool(broken: ProcessPoolExecutor):
+    """Replace the shared process pool after one of its workers died."""
+    global _process_executor
+    with _process_lock:
+        if _process_executor is broken:
+            _process_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,111 @@
+"""N-gram index for as-you-type substring search over names and IDs."""
+
+from collections import defaultdict
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+
+GRAM = 3
+
+
+def _grams(text: str, n: int) -> set[str]:
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+class SearchIndex:
+    """Case-insensitive substring search over a fixed list of items.
+
+    Each item is one string or a sequence of strings (for example a site's
+    name and location); an item matches when any of its strings contains
+    the query. Every 1-, 2- and 3-gram of every string maps to the sorted
+    IDs (positions) of the items containing it, so a query only checks the
+    items that contain all of its grams instead of scanning every string.
+    """
+
+    def __init__(self, items: Sequence[str | Sequence[str]]):
+        self._fields = [
+            (item.lower(),)
+            if isinstance(item, str)
+            else tuple(str(f).lower() for f in item)
+            for item in items
+        ]
+        postings: dict[str, list[int]] = defaultdict(list)
+        for i, fields in enumerate(self._fields):
+            grams: set[str] = set()
+            for text in fields:
+                for n in range(1, GRAM + 1):
+                    grams |= _grams(text, n)
+            for gram in grams:
+                postings[gram].append(i)
+        self._postings = {
+            gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+        # Fields are joined with a separator no query contains, so a query
+        # longer than a gram can be verified with one vectorized find.
+        self._text = np.array(["\x00".join(fields) for fields in self._fields])
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the posting arrays and item strings."""
+        return sum(ids.nbytes for ids in self._postings.values()) + self._text.nbytes
+
+    def matches(self, query: str) -> np.ndarray:
+        """Sorted IDs of the items containing ``query``; all items if it is empty."""
+        q = query.strip().lower()
+        if not q:
+            return np.arange(len(self._fields), dtype=np.int32)
+        grams = sorted(
+            _grams(q, min(GRAM, len(q))),
+            key=lambda g: len(self._postings.get(g, ())),
+        )
+        ids = self._postings.get(grams[0])
+        if ids is None:
+            return np.empty(0, dtype=np.int32)
+        for gram in grams[1:]:
+            ids = np.intersect1d(ids, self._postings.get(gram, ()), assume_unique=True)
+            if not ids.size:
+                return ids
+        if len(q) > GRAM:
+            ids = ids[np.char.find(self._text[ids], q) >= 0]
+        return ids
+
+    def mask(self, query: str) -> np.ndarray:
+        """Boolean array marking the items that contain ``query``."""
+        mask = np.zeros(len(self._fields), dtype=bool)
+        mask[self.matches(query)] = True
+        return mask
+
+    def search(self, query: str, limit: int | None = None) -> np.ndarray:
+        """IDs of the matching items, best first.
+
+        Exact matches rank above prefix matches, which rank above other
+        substring matches; ties go to the earlier match position, then the
+        lower ID.
+        """
+        ids = self.matches(query)
+        q = query.strip().lower()
+        if not q:
+            return ids[:limit]
+
+        def _rank(i: int) -> tuple[int, int, int]:
+            best = (3, 0)
+            for text in self._fields[i]:
+                pos = text.find(q)
+                if pos < 0:
+                    continue
+                kind = 0 if text == q else 1 if pos == 0 else 2
+                best = min(best, (kind, pos))
+            return (*best, i)
+
+        ranked = sorted(ids.tolist(), key=_rank)
+        return np.asarray(ranked[:limit], dtype=np.int32)
+
+
+@lru_cache(maxsize=32)
+def cached_index(items: tuple[str | tuple[str, ...], ...]) -> SearchIndex:
+    """A ``SearchIndex`` over ``items``, shared by every caller with the same items."""
+    return SearchIndex(items)
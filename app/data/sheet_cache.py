@@ -0,0 +1,473 @@
+"""Columnar Parquet cache for the Excel workbooks the dashboard reads.
+
+Each sheet is converted to Parquet the first time it is requested and the
+result is keyed by the workbook's content hash, so later loads read small
+columnar files instead of re-parsing the zipped XML. Every sheet also has
+its own content hash, taken from its part of the xlsx package, so when a
+workbook changes only the sheets whose content changed are converted
+again. Object columns mixing value types (such as the "Value" column of an
+EPC file's "Site Details"), which Parquet cannot hold as is, are stored as
+JSON text and decoded when the sheet is read back.
+
+Server workers, process-pool workers and the ingest CLI share one cache
+directory, so every access to a workbook's cache holds a ``flock`` on its
+lock file. Reads of sheets that are already cached share the lock; checking
+the workbook for changes and converting sheets take it exclusively. Files
+are written under unique temporary names before being renamed into place.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+import zipfile
+from datetime import datetime, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.data.workbook import WorkbookSession
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized.
+    fcntl = None
+
+CACHE_DIR = Path(os.environ.get("PEAK_CACHE_DIR", ".cache/sheets"))
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+MANIFEST_VERSION = 3
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_PACKAGE_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+# A cell holding a shared string: <c ... t="s" ...><v>index</v>.
+_SHARED_CELL = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+
+_locks: dict[Path, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(cache_dir: Path) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(cache_dir, threading.Lock())
+
+
+@contextlib.contextmanager
+def _locked(cache_dir: Path, shared: bool = False):
+    """Hold a workbook's cache directory against other threads and processes.
+
+    Shared holds only exclude exclusive ones, so cached sheets can be read
+    by every worker at once.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        with _lock_for(cache_dir):
+            yield
+        return
+    # Each hold opens the lock file itself, and flock locks taken through
+    # separate opens exclude each other even within one process.
+    with open(cache_dir / LOCK_NAME, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _temp_path(cache_dir: Path) -> Path:
+    """A new, uniquely named temporary file in ``cache_dir``."""
+    fd, name = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    return Path(name)
+
+
+def file_stamp(path: str | Path) -> list[int] | None:
+    """Modification time and size of a file, or None if it cannot be read.
+
+    A list rather than a tuple so stamps compare equal after a JSON round trip.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def file_hash(path: str | Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _package_part(target: str) -> str:
+    return target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+
+
+def sheet_hashes(path: str | Path) -> dict[str, str]:
+    """SHA-256 of each sheet's content, keyed by sheet name.
+
+    Read from the xlsx package without parsing any cells: a sheet's hash
+    covers its worksheet XML, the text of the shared strings its cells
+    refer to and the workbook's styles (which decide whether a number reads
+    as a date). Returns an empty mapping if the file is not an xlsx package.
+    """
+    try:
+        with zipfile.ZipFile(path) as package:
+            rels = ET.fromstring(package.read("xl/_rels/workbook.xml.rels"))
+            targets = {
+                rel.get("Id"): rel.get("Target")
+                for rel in rels.iter(f"{_PACKAGE_REL}Relationship")
+            }
+            parts = set(package.namelist())
+            strings: list[bytes] = []
+            if "xl/sharedStrings.xml" in parts:
+                shared = ET.fromstring(package.read("xl/sharedStrings.xml"))
+                strings = [
+                    "".join(item.itertext()).encode()
+                    for item in shared.iter(f"{_MAIN_NS}si")
+                ]
+            styles = hashlib.sha256(
+                package.read("xl/styles.xml") if "xl/styles.xml" in parts else b""
+            ).digest()
+            workbook = ET.fromstring(package.read("xl/workbook.xml"))
+            hashes = {}
+            for sheet in workbook.iter(f"{_MAIN_NS}sheet"):
+                data = package.read(_package_part(targets[sheet.get(_REL_ID)]))
+                digest = hashlib.sha256(data)
+                digest.update(styles)
+                for index in _SHARED_CELL.findall(data):
+                    digest.update(strings[int(index)])
+                    digest.update(b"\0")
+                hashes[sheet.get("name")] = digest.hexdigest()
+            return hashes
+    except (zipfile.BadZipFile, KeyError, IndexError, ET.ParseError) as e:
+        logging.warning(f"Hashing the whole workbook for every sheet of {path}: {e}")
+        return {}
+
+
+def cache_dir_for(path: str | Path) -> Path:
+    """Directory holding the cached sheets of one workbook."""
+    source = Path(path).resolve()
+    key = hashlib.sha1(str(source).encode()).hexdigest()[:12]
+    return CACHE_DIR / f"{source.stem.replace(' ', '_')}-{key}"
+
+
+def _read_manifest(cache_dir: Path) -> dict | None:
+    try:
+        with open(cache_dir / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(cache_dir: Path, manifest: dict):
+    tmp = _temp_path(cache_dir)
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, cache_dir / MANIFEST_NAME)
+
+
+def _is_current(path: Path, manifest: dict | None) -> bool:
+    """Whether a manifest was written for the workbook's current mtime/size."""
+    if manifest is None or manifest.get("version") != MANIFEST_VERSION:
+        return False
+    stat = path.stat()
+    return stat.st_mtime_ns == manifest["mtime_ns"] and stat.st_size == manifest["size"]
+
+
+def _is_fresh(path: Path, cache_dir: Path, manifest: dict | None) -> bool:
+    """Check a manifest against the workbook, rehashing only if mtime/size moved."""
+    if manifest is None or manifest.get("version") != MANIFEST_VERSION:
+        return False
+    if _is_current(path, manifest):
+        return True
+    stat = path.stat()
+    if file_hash(path) != manifest["hash"]:
+        return False
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    manifest["size"] = stat.st_size
+    _write_manifest(cache_dir, manifest)
+    return True
+
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, time):
+        return {"time": value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _from_json(obj: dict):
+    if obj.keys() == {"datetime"}:
+        return datetime.fromisoformat(obj["datetime"])
+    if obj.keys() == {"time"}:
+        return time.fromisoformat(obj["time"])
+    return obj
+
+
+def _encode_mixed(df: pd.DataFrame) -> tuple[pd.DataFrame, list[int]]:
+    """Replace object columns mixing value types with their cells as JSON.
+
+    Returns the positions of the replaced columns; their labels may be dates
+    or numbers, which the JSON manifest could not hold.
+    """
+    positions = [
+        i
+        for i, (_, column) in enumerate(df.items())
+        if column.dtype == object
+        and pd.api.types.infer_dtype(column, skipna=True).startswith("mixed")
+    ]
+    if not positions:
+        return df, []
+    encoded = df.copy()
+    for i in positions:
+        encoded.isetitem(
+            i,
+            [
+                None if pd.isna(value) else json.dumps(value, default=_to_json)
+                for value in df.iloc[:, i]
+            ],
+        )
+    return encoded, positions
+
+
+def _decode_mixed(df: pd.DataFrame, positions: list[int]) -> pd.DataFrame:
+    for i in positions:
+        df.isetitem(
+            i,
+            pd.Series(
+                [
+                    np.nan
+                    if pd.isna(value)
+                    else json.loads(value, object_hook=_from_json)
+                    for value in df.iloc[:, i]
+                ],
+                index=df.index,
+                dtype=object,
+            ),
+        )
+    return df
+
+
+def _write_sheet(df: pd.DataFrame, target: Path) -> dict | None:
+    """Write one sheet to Parquet and return how to read it back, or None if
+    it is not representable."""
+    tmp = _temp_path(target.parent)
+    try:
+        encoded, json_columns = _encode_mixed(df)
+        encoded.to_parquet(tmp, engine="pyarrow", index=False)
+    except Exception as e:
+        logging.warning(f"Sheet kept in Excel form ({target.name}): {e}")
+        tmp.unlink(missing_ok=True)
+        return None
+    os.replace(tmp, target)
+    entry = {"file": target.name, "json_columns": json_columns}
+    # Parquet stores column labels as text; keep dates and numbers as such.
+    if not all(isinstance(label, str) for label in df.columns):
+        entry["labels"] = json.dumps(list(df.columns), default=_to_json)
+    return entry
+
+
+def _read_sheet(cache_dir: Path, entry: dict) -> pd.DataFrame:
+    df = pd.read_parquet(cache_dir / entry["file"])
+    if "labels" in entry:
+        df.columns = json.loads(entry["labels"], object_hook=_from_json)
+    return _decode_mixed(df, entry["json_columns"])
+
+
+def _load_manifest(path: Path, cache_dir: Path, session: WorkbookSession) -> dict:
+    """Return the workbook's manifest, rebuilding it if the content hash changed.
+
+    Sheets whose own hash is unchanged keep their cached files; files no
+    sheet refers to any more are deleted.
+    """
+    manifest = _read_manifest(cache_dir)
+    if _is_fresh(path, cache_dir, manifest):
+        return manifest
+    previous = {}
+    if manifest is not None and manifest.get("version") == MANIFEST_VERSION:
+        previous = manifest["sheets"]
+    stat = path.stat()
+    digest = file_hash(path)
+    hashes = sheet_hashes(path)
+    names = session.sheet_names
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "source": str(path.resolve()),
+        "hash": digest,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sheet_names": names,
+        "sheet_hashes": {name: hashes.get(name, digest) for name in names},
+    }
+    manifest["sheets"] = {
+        name: entry
+        for name, entry in previous.items()
+        if name in names and entry["hash"] == manifest["sheet_hashes"][name]
+    }
+    _write_manifest(cache_dir, manifest)
+    files = {entry["file"] for entry in manifest["sheets"].values()}
+    for old in cache_dir.glob("*.parquet"):
+        if old.name not in files:
+            old.unlink()
+    return manifest
+
+
+def _fill(
+    cache_dir: Path, manifest: dict, session: WorkbookSession, sheet_names: list[str]
+) -> dict[str, pd.DataFrame]:
+    """Parse the uncached sheets in one workbook pass and store them.
+
+    Each sheet's file is named after its content hash.
+    """
+    pending = [
+        name
+        for name in dict.fromkeys(sheet_names)
+        if name in manifest["sheet_names"] and name not in manifest["sheets"]
+    ]
+    if not pending:
+        return {}
+    frames = session.sheets(pending)
+    for name, df in frames.items():
+        sheet_hash = manifest["sheet_hashes"][name]
+        entry = _write_sheet(df, cache_dir / f"{sheet_hash[:32]}.parquet")
+        manifest["sheets"][name] = {"hash": sheet_hash, **(entry or {"file": None})}
+    _write_manifest(cache_dir, manifest)
+    return frames
+
+
+def is_cached(path: str | Path) -> bool:
+    """Whether every sheet of a workbook is cached for its current contents.
+
+    Like every cache lookup this only rehashes the workbook if its size or
+    mtime moved, so a touched but unchanged file still counts as cached.
+    """
+    path = Path(path)
+    cache_dir = cache_dir_for(path)
+    with _locked(cache_dir):
+        manifest = _read_manifest(cache_dir)
+        if not _is_fresh(path, cache_dir, manifest):
+            return False
+        return all(name in manifest["sheets"] for name in manifest["sheet_names"])
+
+
+def ensure_cache(path: str | Path, sheet_names: list[str] | None = None) -> dict:
+    """Bring a workbook's cache up to date and return its manifest.
+
+    Converts the requested sheets, or every sheet when ``sheet_names`` is None.
+    """
+    path = Path(path)
+    cache_dir = cache_dir_for(path)
+    with _locked(cache_dir), WorkbookSession(path) as session:
+        manifest = _load_manifest(path, cache_dir, session)
+        if sheet_names is None:
+            sheet_names = manifest["sheet_names"]
+        _fill(cache_dir, manifest, session, sheet_names)
+    return manifest
+
+
+def clear_cache(path: str | Path):
+    """Drop every cached sheet of a workbook so the next read reconverts it."""
+    cache_dir = cache_dir_for(path)
+    with _locked(cache_dir):
+        for entry in cache_dir.iterdir():
+            if entry.name != LOCK_NAME:
+                entry.unlink()
+
+
+def refresh_cache(path: str | Path) -> list[str]:
+    """Re-convert the cached sheets whose content changed with the workbook.
+
+    Sheets whose own content is unchanged keep their cached files, and
+    sheets nobody has read are left to be converted on demand. Returns the
+    names of the sheets that were converted.
+    """
+    path = Path(path)
+    cache_dir = cache_dir_for(path)
+    with _locked(cache_dir):
+        manifest = _read_manifest(cache_dir)
+        if _is_fresh(path, cache_dir, manifest):
+            return []
+        cached = list(manifest["sheets"]) if manifest else []
+        with WorkbookSession(path) as session:
+            manifest = _load_manifest(path, cache_dir, session)
+            return list(_fill(cache_dir, manifest, session, cached))
+
+
+def read_sheets(
+    path: str | Path, sheet_names: list[str], missing_ok: bool = False
+) -> dict[str, pd.DataFrame]:
+    """Read several sheets of a workbook through the Parquet cache.
+
+    Uncached sheets are parsed together from a single open of the workbook.
+    Missing sheets raise ``ValueError`` like ``pd.read_excel`` does, unless
+    ``missing_ok`` is set, in which case they are left out of the result.
+    """
+    path = Path(path)
+    cache_dir = cache_dir_for(path)
+    # Sheets already cached for the workbook's current contents are read
+    # under a shared lock; anything else is checked and converted under an
+    # exclusive one.
+    with _locked(cache_dir, shared=True), WorkbookSession(path) as session:
+        manifest = _read_manifest(cache_dir)
+        if _is_current(path, manifest):
+            known = _known_sheets(manifest, sheet_names, missing_ok)
+            if all(name in manifest["sheets"] for name in known):
+                return _read_cached(cache_dir, manifest, session, known, {})
+    with _locked(cache_dir), WorkbookSession(path) as session:
+        manifest = _load_manifest(path, cache_dir, session)
+        known = _known_sheets(manifest, sheet_names, missing_ok)
+        frames = _fill(cache_dir, manifest, session, known)
+        return _read_cached(cache_dir, manifest, session, known, frames)
+
+
+def _known_sheets(
+    manifest: dict, sheet_names: list[str], missing_ok: bool
+) -> list[str]:
+    """The requested sheets the workbook has; raises for others unless
+    ``missing_ok``."""
+    unknown = [n for n in sheet_names if n not in manifest["sheet_names"]]
+    if unknown and not missing_ok:
+        raise ValueError(f"Worksheet named '{unknown[0]}' not found")
+    return [n for n in sheet_names if n not in unknown]
+
+
+def _read_cached(
+    cache_dir: Path,
+    manifest: dict,
+    session: WorkbookSession,
+    sheet_names: list[str],
+    frames: dict[str, pd.DataFrame],
+) -> dict[str, pd.DataFrame]:
+    """Add the cached sheets missing from ``frames``, in request order.
+
+    Sheets kept in Excel form are parsed from the workbook.
+    """
+    excel_only = []
+    for name in sheet_names:
+        if name in frames:
+            continue
+        if manifest["sheets"][name]["file"] is None:
+            excel_only.append(name)
+        else:
+            frames[name] = _read_sheet(cache_dir, manifest["sheets"][name])
+    if excel_only:
+        frames.update(session.sheets(excel_only))
+    return {name: frames[name] for name in sheet_names}
+
+
+def read_sheet(path: str | Path, sheet_name: str) -> pd.DataFrame:
+    """Read a single sheet of a workbook through the Parquet cache."""
+    return read_sheets(path, [sheet_name])[sheet_name]
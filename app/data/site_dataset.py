@@ -0,0 +1,447 @@
+"""Read-only site dataset built from a site's EPC input file and master report.
+
+A dataset is assembled once per site and shared between every session that
+views it, so all values are immutable (read-only arrays and mappings). The
+data is split into stages (site metadata, KPI metrics, tracker grid, CB grid
+and inverter grid); each maps ``DashboardState`` field names to its values.
+"""
+
+import functools
+import logging
+import threading
+from concurrent.futures import Future
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from app.data.equipment_grid import (
+    REVENUE_PER_MWH,
+    EquipmentGrid,
+    GridSeries,
+    pivot_columns,
+)
+from app.data.metrics import PrefixSums
+from app.data.sheet_cache import read_sheet, read_sheets
+
+EPC_FILE = "assets/EPC Input File - Airport Solar.xlsx"
+MASTER_FILE = "assets/master_report.xlsx"
+DAILY_LOSS_SHEET = "All - Daily Lost Energy"
+PERFORMANCE_DAYS = "Performance Days"
+LOSS_DRIVER_COLUMNS = {
+    "Plant Outage": "Plant Outage",
+    "Inverters": "Inverters",
+    "Inverter Modules": "Modules",
+    "Derate": "Derate",
+    "DC": "DC",
+    "Trackers": "Trackers",
+}
+STAGES = ("metadata", "kpis", "tracker", "cb", "inverter")
+STAGE_SHEETS = {
+    "kpis": [
+        "Site Metrics",
+        "inv_kW_offline_lost",
+        "inv_kW_derate_lost",
+        "site_kW_plant_offline_loss (pi)",
+        "All - Daily Lost Energy",
+    ],
+    "tracker": ["Tracker - Affected DC Capacity", "Tracker - Lost Energy"],
+    "cb": ["DC - Lost Energy", "DC - Affected Capacity", "DC - Classification"],
+    "inverter": [
+        "Inverter - Lost Energy",
+        "Inverter - DC Capacity",
+        "Inverter Mod - Lost Energy",
+    ],
+}
+
+
+def load_metadata(epc_file: str, values: dict[str, Any]):
+    """Fill ``values`` with the site details from the EPC input file."""
+    site_details = read_sheet(epc_file, "Site Details")
+
+    def _get_val(desc_name, default):
+        row = site_details[site_details["Description"] == desc_name]
+        return row["Value"].iloc[0] if not row.empty else default
+
+    values["client"] = str(_get_val("Client Name", "DESRI"))
+    plant_ac = _get_val("Plant AC Capacity (kW)", 48600)
+    plant_dc = _get_val("Plant DC Capacity (kW)", 60697.91)
+    values["ac_capacity"] = f"{float(plant_ac) / 1000:.2f} MW"
+    values["dc_capacity"] = f"{float(plant_dc) / 1000:.2f} MW"
+    values["lat"] = str(_get_val("Latitude", 42.16))
+    values["lon"] = str(_get_val("Longitude", -120.4))
+    values["location"] = "OREGON"
+    values["inception_date"] = str(
+        _get_val("Plant Substantial Completion Date", "7/3/2023")
+    )
+    values["inverter_type"] = str(_get_val("Inverter Model", "Power Electronics"))
+    poi_val = _get_val("POI Curtail Limit (kW)", None)
+    if poi_val is None or (isinstance(poi_val, float) and pd.isna(poi_val)):
+        poi_val = _get_val("poi_curtail_sp", 48600)
+    values["poi_limit"] = f"{float(poi_val) / 1000:.2f} MW"
+    values["weather_location"] = "LAKEVIEW"
+
+
+def _row_totals(frame: pd.DataFrame, date_column: str) -> PrefixSums:
+    """Daily totals of all numeric columns of a kW loss sheet, in MWh."""
+    totals = frame.select_dtypes(include=["number"]).sum(axis=1) / 1000.0
+    daily = pd.DataFrame({date_column: frame[date_column], "total": totals})
+    return PrefixSums.from_frame(daily, date_column)
+
+
+def load_kpis(sheets: dict[str, pd.DataFrame]) -> dict[str, PrefixSums]:
+    site_metrics = sheets["Site Metrics"].assign(
+        **{PERFORMANCE_DAYS: lambda df: df["Performance"].notna().astype(float)}
+    )
+    series = {
+        "Site Metrics": PrefixSums.from_frame(
+            site_metrics,
+            "DateTime",
+            [
+                "Measured Energy",
+                "Expected Energy",
+                "Curtailed Energy",
+                "Performance",
+                PERFORMANCE_DAYS,
+            ],
+        )
+    }
+    for sheet_name in (
+        "inv_kW_offline_lost",
+        "inv_kW_derate_lost",
+        "site_kW_plant_offline_loss (pi)",
+    ):
+        try:
+            series[sheet_name] = _row_totals(sheets[sheet_name], "Unnamed: 0")
+        except Exception as e:
+            logging.exception(f"Error reading sheet {sheet_name}: {e}")
+    try:
+        series[DAILY_LOSS_SHEET] = PrefixSums.from_frame(
+            sheets[DAILY_LOSS_SHEET], "Unnamed: 0"
+        )
+    except Exception as e:
+        logging.exception(f"Error reading sheet {DAILY_LOSS_SHEET}: {e}")
+    return series
+
+
+def kpi_values(
+    series: dict[str, PrefixSums], start: str | None, end: str | None
+) -> dict[str, Any]:
+    """KPI fields for the inclusive ``start``..``end`` window."""
+    metrics = series["Site Metrics"]
+    values: dict[str, Any] = {}
+    measured_energy = metrics.total("Measured Energy", start, end)
+    expected_energy = metrics.total("Expected Energy", start, end)
+    curtailed_energy = metrics.total("Curtailed Energy", start, end)
+    performance_days = metrics.total(PERFORMANCE_DAYS, start, end)
+    values["measured_energy"] = measured_energy
+    values["expected_energy"] = expected_energy
+    values["curtailed_energy"] = curtailed_energy
+    values["performance"] = (
+        round(metrics.total("Performance", start, end) / performance_days, 1)
+        if performance_days
+        else 0.0
+    )
+    values["availability"] = 98.5
+    values["modeled_energy"] = expected_energy / 0.98 if expected_energy else 0.0
+
+    def _loss_total(sheet_name, default=0.0):
+        if sheet_name not in series:
+            return default
+        return series[sheet_name].total("total", start, end)
+
+    inverters_offline_loss = _loss_total("inv_kW_offline_lost")
+    derated_loss = _loss_total("inv_kW_derate_lost")
+    plant_offline_loss = _loss_total("site_kW_plant_offline_loss (pi)", 2.5)
+    underperformance_loss = 0.0
+    values["inverters_offline_loss"] = inverters_offline_loss
+    values["derated_loss"] = derated_loss
+    values["plant_offline_loss"] = plant_offline_loss
+    values["underperformance_loss"] = underperformance_loss
+    values["total_lost_energy"] = (
+        inverters_offline_loss
+        + plant_offline_loss
+        + derated_loss
+        + underperformance_loss
+        + curtailed_energy
+    )
+    values["potential_lds"] = -42097.0
+    values["contractual_availability"] = 98.2
+    values["excused_energy"] = 1739.8
+    daily_loss = series.get(DAILY_LOSS_SHEET)
+    values["_loss_driver_mwh"] = (
+        {}
+        if daily_loss is None
+        else dict(zip(daily_loss.columns, daily_loss.sum(start, end).tolist()))
+    )
+    return values
+
+
+def loss_driver_data(
+    drivers: list[dict],
+    driver_mwh: Mapping[str, float],
+    expected_energy: float,
+    measured_energy: float,
+) -> list[dict]:
+    """Loss driver rows with energy, share and revenue for a date window.
+
+    Drivers with a column in the daily lost energy sheet take their energy from
+    it; soiling and vegetation keep their share of expected energy and Misc is
+    whatever lost energy the other drivers do not account for.
+    """
+    if not driver_mwh:
+        return drivers
+    rows = [dict(driver) for driver in drivers]
+    for row in rows:
+        column = LOSS_DRIVER_COLUMNS.get(row["name"])
+        if column in driver_mwh:
+            row["mwh"] = float(driver_mwh[column])
+        elif row["name"] in ("Soiling", "Vegetation"):
+            row["mwh"] = float(row["loss_pct"]) * expected_energy / 100
+    explained = sum(float(row["mwh"]) for row in rows if row["name"] != "Misc")
+    for row in rows:
+        if row["name"] == "Misc":
+            row["mwh"] = max(0.0, expected_energy - measured_energy - explained)
+    return [
+        {
+            **row,
+            "mwh": round(float(row["mwh"]), 1),
+            "loss_pct": round(float(row["mwh"]) / expected_energy * 100, 1)
+            if expected_energy
+            else 0.0,
+            "revenue": round(float(row["mwh"]) * REVENUE_PER_MWH, 2),
+        }
+        for row in rows
+    ]
+
+
+def _grid_frame(frame: pd.DataFrame, date_column: str, names: list[str]):
+    return PrefixSums.from_frame(
+        frame.reindex(columns=[date_column, *names]), date_column
+    )
+
+
+def _load_tracker(sheets: dict[str, pd.DataFrame]) -> GridSeries:
+    t_dc_df = sheets["Tracker - Affected DC Capacity"]
+    t_lost_df = sheets["Tracker - Lost Energy"]
+    t_cols = [c for c in t_dc_df.columns if c != "DateTime"]
+    controllers = sorted(list(set((c.split("/")[0] for c in t_cols))))
+    motors = sorted(list(set((c.split("/")[1] for c in t_cols if "/" in c))))
+    names = [f"{controller}/{motor}" for controller in controllers for motor in motors]
+    return GridSeries(
+        controllers,
+        motors,
+        lost=_grid_frame(t_lost_df, "DateTime", names),
+        capacity=_grid_frame(t_dc_df, "DateTime", names),
+    )
+
+
+def _tracker_values(grid: EquipmentGrid) -> dict[str, Any]:
+    return {
+        "_tracker_grid": grid,
+        "tracker_motors_with_issues": grid.issue_count,
+        "tracker_total_lost_energy": grid.total_lost,
+        "tracker_total_lost_revenue": grid.total_revenue,
+        "tracker_most_problematic_controller": grid.worst_row,
+    }
+
+
+def _load_cb(sheets: dict[str, pd.DataFrame]) -> GridSeries:
+    dc_lost_df = sheets["DC - Lost Energy"]
+    dc_cap_df = sheets["DC - Affected Capacity"]
+    dc_class_df = sheets["DC - Classification"]
+    cols = [c for c in dc_lost_df.columns if c != "timestamp"]
+    cells = [c for c in cols if c.count(" - ") == 1]
+    keys = [tuple(c.split(" - ")) for c in cells]
+    inverters = sorted({inv for inv, _ in keys})
+    combiner_boxes = sorted({cb for _, cb in keys})
+    names = [f"{inv} - {cb}" for inv in inverters for cb in combiner_boxes]
+    class_cols = [c for c in cells if c in dc_class_df.columns]
+    modes = dc_class_df[class_cols].mode()
+    class_map = pd.Series("Healthy", index=cells, dtype=object)
+    if not modes.empty:
+        class_map.update(modes.iloc[0].dropna().astype(str))
+    return GridSeries(
+        inverters,
+        combiner_boxes,
+        lost=_grid_frame(dc_lost_df, "timestamp", names),
+        capacity=_grid_frame(dc_cap_df, "timestamp", names),
+        labels=pivot_columns(
+            class_map, keys, inverters, combiner_boxes, fill="Healthy"
+        ),
+    )
+
+
+def _cb_values(grid: EquipmentGrid) -> dict[str, Any]:
+    return {
+        "_cb_grid": grid,
+        "cb_combiner_boxes_with_issues": grid.issue_count,
+        "cb_total_lost_energy": grid.total_lost,
+        "cb_total_lost_revenue": grid.total_revenue,
+        "cb_most_problematic_box": grid.worst_col,
+    }
+
+
+def _load_inverter(sheets: dict[str, pd.DataFrame]) -> GridSeries:
+    inv_lost_df = sheets["Inverter - Lost Energy"]
+    inv_dc_df = sheets["Inverter - DC Capacity"]
+    inv_mod_lost_df = sheets["Inverter Mod - Lost Energy"]
+    rows, cols_grid = (3, 6)
+    size = rows * cols_grid
+    cols = sorted([c for c in inv_lost_df.columns if c != "Unnamed: 0"])[:size]
+    pad = size - len(cols)
+    capacity = np.pad(inv_dc_df[cols].iloc[0].to_numpy(dtype=float), (0, pad))
+    return GridSeries(
+        [str(i + 1) for i in range(rows)],
+        [str(i + 1) for i in range(cols_grid)],
+        lost=None,
+        capacity=capacity,
+        labels=np.array(cols + ["Empty"] * pad, dtype=object).reshape(rows, cols_grid),
+        offline=_grid_frame(inv_lost_df, "Unnamed: 0", cols),
+        module=_grid_frame(inv_mod_lost_df, "Unnamed: 0", cols),
+    )
+
+
+def _inverter_values(grid: EquipmentGrid) -> dict[str, Any]:
+    return {
+        "_inv_grid": grid,
+        "inv_inverters_with_issues": grid.issue_count,
+        "inv_total_lost_energy": grid.total_lost,
+        "inv_total_lost_revenue": grid.total_revenue,
+        "inv_most_problematic_block": grid.worst_label,
+    }
+
+
+_GRID_STAGES = {
+    "tracker": (_load_tracker, _tracker_values, "Tracker"),
+    "cb": (_load_cb, _cb_values, "CB"),
+    "inverter": (_load_inverter, _inverter_values, "Inverter"),
+}
+
+
+WindowFn = Callable[[str | None, str | None], dict[str, Any]]
+
+
+def _load_stage(
+    site_id: str, stage: str, epc_file: str, master_file: str
+) -> tuple[dict[str, Any], WindowFn | None, tuple]:
+    """Load one stage: its full-range values, for time series a function
+    returning the values of any date window, and the objects (with an
+    ``nbytes`` size) that the stage keeps in memory."""
+    if stage == "metadata":
+        metadata: dict[str, Any] = {}
+        try:
+            load_metadata(epc_file, metadata)
+        except Exception as e:
+            logging.exception(f"Error loading real data for {site_id}: {e}")
+            metadata["location"] = "OREGON (FALLBACK)"
+        return metadata, None, ()
+    try:
+        sheets = read_sheets(master_file, STAGE_SHEETS[stage], missing_ok=True)
+    except Exception as e:
+        logging.exception(f"Error reading {stage} sheets for {site_id}: {e}")
+        return {}, None, ()
+    if stage == "kpis":
+        try:
+            series = load_kpis(sheets)
+            metrics = series["Site Metrics"]
+            values = kpi_values(series, None, None)
+        except Exception as e:
+            logging.exception(f"KPI data error: {e}")
+            return {}, None, ()
+        if metrics.first_date is not None:
+            values["start_date"] = metrics.first_date
+            values["end_date"] = metrics.last_date
+        return values, functools.partial(kpi_values, series), tuple(series.values())
+    load, to_values, label = _GRID_STAGES[stage]
+    try:
+        grids = load(sheets)
+        values = to_values(grids.grid())
+    except Exception as e:
+        logging.exception(f"{label} data error: {e}")
+        return {}, None, ()
+    return (
+        values,
+        lambda start, end: to_values(grids.grid(start, end)),
+        (grids,),
+    )
+
+
+class SiteDataset:
+    """Read-only stages of one site's data, each loaded on first use.
+
+    Stages load independently so a page only pays for what it shows. A stage
+    is loaded at most once even when several sessions ask for it at the same
+    time; later callers wait for the first load.
+    """
+
+    def __init__(
+        self, site_id: str, epc_file: str = EPC_FILE, master_file: str = MASTER_FILE
+    ):
+        self.site_id = site_id
+        self.epc_file = epc_file
+        self.master_file = master_file
+        self._lock = threading.Lock()
+        self._stages: dict[str, Future] = {}
+        self._sizes: dict[str, int] = {}
+        # Called with the dataset and the stage's size after a stage loads.
+        self.on_load: Callable[["SiteDataset", int], None] | None = None
+
+    def _load(self, name: str) -> tuple[Mapping[str, Any], WindowFn | None, tuple]:
+        if name not in STAGES:
+            raise ValueError(f"Unknown site data stage '{name}'")
+        with self._lock:
+            future = self._stages.get(name)
+            owner = future is None
+            if owner:
+                future = self._stages[name] = Future()
+        if owner:
+            try:
+                values, window, sources = _load_stage(
+                    self.site_id, name, self.epc_file, self.master_file
+                )
+                nbytes = sum(source.nbytes for source in sources)
+                with self._lock:
+                    self._sizes[name] = nbytes
+                future.set_result((MappingProxyType(values), window, sources))
+            except BaseException as e:
+                # Waiting callers get the error; the next call retries.
+                with self._lock:
+                    self._stages.pop(name, None)
+                    self._sizes.pop(name, None)
+                future.set_exception(e)
+                raise
+            if self.on_load is not None:
+                self.on_load(self, nbytes)
+        return future.result()
+
+    def stage(self, name: str) -> Mapping[str, Any]:
+        """Values of one stage over all dates, keyed by the state field they
+        populate."""
+        return self._load(name)[0]
+
+    def window(
+        self, name: str, start: str | None, end: str | None
+    ) -> Mapping[str, Any]:
+        """Values of one stage over the inclusive ``start``..``end`` date window.
+
+        Windows are answered from prefix sums built when the stage loads, so
+        changing the date range never re-reads the workbooks. Stages without
+        time series (site metadata, or data that failed to load) return
+        their full-range values.
+        """
+        values, window, _ = self._load(name)
+        if window is None:
+            return values
+        return MappingProxyType(window(start, end))
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            future = self._stages.get(name)
+        return future is not None and future.done()
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the loaded stages, measured as each loads."""
+        with self._lock:
+            return sum(self._sizes.values())
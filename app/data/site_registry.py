@@ -0,0 +1,100 @@
+"""Registry of the sites the dashboard serves.
+
+Sites are listed in a JSON manifest (``assets/sites.json`` by default, or the
+path in ``PEAK_SITES_MANIFEST``)::
+
+    {"sites": [{"id": "airport-solar", "name": "Airport Solar",
+                "location": "OREGON",
+                "epc_file": "assets/EPC Input File - Airport Solar.xlsx",
+                "master_file": "assets/master_report.xlsx"}]}
+
+The manifest is re-read whenever it changes on disk, so sites can be added
+without restarting the app.
+"""
+
+import json
+import logging
+import os
+import threading
+import urllib.parse
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.data.site_dataset import EPC_FILE, MASTER_FILE
+
+MANIFEST_FILE = os.environ.get("PEAK_SITES_MANIFEST", "assets/sites.json")
+
+
+@dataclass(frozen=True)
+class Site:
+    id: str
+    name: str
+    epc_file: str
+    master_file: str
+    location: str = ""
+
+
+DEFAULT_SITES = (
+    Site(
+        id="airport-solar",
+        name="Airport Solar",
+        epc_file=EPC_FILE,
+        master_file=MASTER_FILE,
+        location="OREGON",
+    ),
+)
+
+
+def _read_manifest(path: Path) -> tuple[Site, ...]:
+    with open(path) as f:
+        entries = json.load(f)["sites"]
+    return tuple(
+        Site(
+            id=str(entry["id"]),
+            name=str(entry.get("name", entry["id"])),
+            epc_file=str(entry["epc_file"]),
+            master_file=str(entry["master_file"]),
+            location=str(entry.get("location", "")),
+        )
+        for entry in entries
+    )
+
+
+class SiteRegistry:
+    """Sites listed in a manifest file, reloaded when the file changes."""
+
+    def __init__(self, manifest: str | Path = MANIFEST_FILE):
+        self._manifest = Path(manifest)
+        self._lock = threading.Lock()
+        self._stamp: tuple[int, int] | None = None
+        self._sites: tuple[Site, ...] = DEFAULT_SITES
+
+    def sites(self) -> list[Site]:
+        """Every registered site, in manifest order."""
+        try:
+            stat = self._manifest.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return list(DEFAULT_SITES)
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    self._sites = _read_manifest(self._manifest) or DEFAULT_SITES
+                except Exception as e:
+                    logging.exception(f"Error reading site manifest: {e}")
+                self._stamp = stamp
+            return list(self._sites)
+
+    def get(self, site_id: str) -> Site | None:
+        """Look a site up by id or name (URL-quoted and case-insensitive)."""
+        key = urllib.parse.unquote(site_id or "").strip().lower()
+        for site in self.sites():
+            if key in (site.id.lower(), site.name.lower()):
+                return site
+        return None
+
+    def default(self) -> Site:
+        return self.sites()[0]
+
+
+site_registry = SiteRegistry()
@@ -0,0 +1,202 @@
+"""Process-wide store of loaded site datasets.
+
+Every session viewing a site reads the same immutable ``SiteDataset`` instead
+of re-parsing the workbooks. Each stage of a dataset loads single-flight, so
+concurrent requests for a stage that is still loading wait for the first
+load rather than starting their own. Sessions hold a reference while they
+display a site; datasets nobody references stay cached in least recently
+used order until the loaded datasets exceed the memory budget
+(``PEAK_SITE_CACHE_MB``, 512 MB by default), so switching back to a recently
+viewed site does not parse its workbooks again. Each dataset's size is
+tallied as its stages load, and the budget is enforced when a reference is
+taken or dropped and when a stage loads, never on plain lookups.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+from app.data.equipment_grid import EquipmentGrid
+from app.data.site_dataset import STAGES, SiteDataset
+from app.data.site_registry import site_registry
+
+SITE_CACHE_BYTES = int(float(os.environ.get("PEAK_SITE_CACHE_MB", "512")) * 2**20)
+
+
+def dataset_for_site(site_id: str) -> SiteDataset:
+    """Build the dataset of a registered site."""
+    site = site_registry.get(site_id)
+    if site is None:
+        raise KeyError(f"Unknown site '{site_id}'")
+    return SiteDataset(site.id, site.epc_file, site.master_file)
+
+
+@dataclass(frozen=True)
+class GridRef:
+    """Picklable reference to an equipment grid of a stored site dataset.
+
+    Sessions keep these in their state instead of the grids themselves, so
+    the state serialized between events stays the same size however large
+    the plant is. ``version`` is the site's data version when the grid was
+    shown, so a reload changes the reference even for the same window.
+    """
+
+    site_id: str
+    version: int
+    stage: str
+    field: str
+    start: str | None = None
+    end: str | None = None
+
+
+class SiteStore:
+    """Reference-counted, memory-bounded LRU cache of site datasets."""
+
+    def __init__(
+        self,
+        factory: Callable[[str], SiteDataset] = dataset_for_site,
+        max_bytes: int = SITE_CACHE_BYTES,
+    ):
+        self._factory = factory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: dict[str, SiteDataset] = {}
+        self._sizes: dict[str, int] = {}
+        self._refs: dict[str, int] = {}
+        self._idle: OrderedDict[str, None] = OrderedDict()
+
+    def _entry(self, site_id: str) -> SiteDataset:
+        dataset = self._entries.get(site_id)
+        if dataset is None:
+            dataset = self._entries[site_id] = self._factory(site_id)
+            self._track(dataset)
+        return dataset
+
+    def _track(self, dataset: SiteDataset):
+        dataset.on_load = self._loaded
+        self._sizes[dataset.site_id] = dataset.memory_usage()
+
+    def _loaded(self, dataset: SiteDataset, nbytes: int):
+        """Count a newly loaded stage against the budget."""
+        with self._lock:
+            if self._entries.get(dataset.site_id) is not dataset:
+                return
+            self._sizes[dataset.site_id] += nbytes
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used idle datasets while over the budget."""
+        used = sum(self._sizes.values())
+        while used > self._max_bytes and self._idle:
+            site_id, _ = self._idle.popitem(last=False)
+            if self._entries.pop(site_id, None) is not None:
+                used -= self._sizes.pop(site_id)
+
+    def add(self, dataset: SiteDataset):
+        """Cache a dataset built outside the registry, such as a benchmark's."""
+        with self._lock:
+            self._entries[dataset.site_id] = dataset
+            self._track(dataset)
+            if dataset.site_id not in self._refs:
+                self._idle[dataset.site_id] = None
+                self._idle.move_to_end(dataset.site_id)
+            self._evict()
+
+    def acquire(self, site_id: str) -> SiteDataset:
+        """Return the shared dataset for a site and hold a reference to it."""
+        with self._lock:
+            dataset = self._entry(site_id)
+            self._refs[site_id] = self._refs.get(site_id, 0) + 1
+            self._idle.pop(site_id, None)
+            self._evict()
+            return dataset
+
+    def get(self, site_id: str) -> SiteDataset:
+        """Return the shared dataset for a site without taking a reference."""
+        with self._lock:
+            dataset = self._entry(site_id)
+            if site_id not in self._refs:
+                self._idle[site_id] = None
+                self._idle.move_to_end(site_id)
+            return dataset
+
+    def grid(self, ref: GridRef | None) -> EquipmentGrid | None:
+        """The grid ``ref`` points to, or None if its stage is not resident.
+
+        Computed vars call this on the event loop, so it never loads
+        anything: a stage this process has not loaded (state restored on
+        another worker, or after an eviction or restart) is reloaded by the
+        session through the ingestion pool instead.
+        """
+        if ref is None:
+            return None
+        with self._lock:
+            dataset = self._entries.get(ref.site_id)
+            if ref.site_id in self._idle:
+                self._idle.move_to_end(ref.site_id)
+        if dataset is None or not dataset.is_loaded(ref.stage):
+            return None
+        return dataset.window(ref.stage, ref.start, ref.end).get(ref.field)
+
+    def is_resident(self, ref: GridRef) -> bool:
+        """Whether the stage ``ref`` points to is loaded in this process."""
+        with self._lock:
+            dataset = self._entries.get(ref.site_id)
+        return dataset is not None and dataset.is_loaded(ref.stage)
+
+    def release(self, site_id: str):
+        """Drop a reference taken by ``acquire``."""
+        with self._lock:
+            count = self._refs.get(site_id, 0) - 1
+            if count > 0:
+                self._refs[site_id] = count
+                return
+            self._refs.pop(site_id, None)
+            if site_id not in self._entries:
+                return
+            self._idle[site_id] = None
+            self._idle.move_to_end(site_id)
+            self._evict()
+
+    def reload(self, site_id: str) -> SiteDataset | None:
+        """Replace a cached site's dataset with a freshly loaded one.
+
+        The stages the old dataset had loaded are loaded into the new one
+        before it is swapped in, so sessions keep reading the old data until
+        the new data is complete. Returns None if the site was not cached.
+        """
+        with self._lock:
+            old = self._entries.get(site_id)
+        if old is None:
+            return None
+        dataset = self._factory(site_id)
+        for stage in STAGES:
+            if old.is_loaded(stage):
+                dataset.stage(stage)
+        with self._lock:
+            if self._entries.get(site_id) is old:
+                self._entries[site_id] = dataset
+                self._track(dataset)
+            self._evict()
+            return self._entries.get(site_id)
+
+    def invalidate(self, site_id: str):
+        """Forget a site's dataset so the next ``acquire`` reloads it."""
+        with self._lock:
+            self._entries.pop(site_id, None)
+            self._sizes.pop(site_id, None)
+            self._idle.pop(site_id, None)
+
+    def ref_count(self, site_id: str) -> int:
+        with self._lock:
+            return self._refs.get(site_id, 0)
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by every cached dataset."""
+        with self._lock:
+            return sum(self._sizes.values())
+
+
+site_store = SiteStore()
@@ -0,0 +1,123 @@
+"""Detect updated site workbooks and reload them once for every session.
+
+``SiteWatcher.poll`` compares the size and mtime of every registered site's
+workbooks with the previous poll. For each site that changed it re-converts
+the sheets that were cached, reloads the site's dataset in the store,
+rebuilds the fleet snapshot and bumps the site's data version. All of this
+happens once per change, in the watcher, so sessions only have to apply
+the already-loaded data instead of each re-reading the workbooks.
+
+``SessionRegistry`` remembers which client sessions view which site (or
+the fleet page) so the app can push the new data to exactly those sessions.
+It also holds each session's reference to its site in the site store, so a
+site stays loaded while someone views it and becomes evictable once its
+last viewer moves on or disconnects.
+"""
+
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from app.data.fleet import fleet_snapshot
+from app.data.sheet_cache import file_stamp, refresh_cache
+from app.data.site_registry import Site, site_registry
+from app.data.site_store import SiteStore, site_store
+
+WATCH_INTERVAL = float(os.environ.get("PEAK_WATCH_INTERVAL", "10"))
+FLEET = "fleet"
+
+
+class SiteWatcher:
+    """Polls the registered sites' workbooks for changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamps: dict[str, tuple] = {}
+        self._versions: dict[str, int] = defaultdict(int)
+
+    def version(self, site_id: str) -> int:
+        """How many times a site's data has been reloaded."""
+        with self._lock:
+            return self._versions[site_id]
+
+    def _changed(self, sites: list[Site]) -> list[Site]:
+        changed = []
+        with self._lock:
+            for site in sites:
+                stamp = (file_stamp(site.epc_file), file_stamp(site.master_file))
+                previous = self._stamps.get(site.id)
+                self._stamps[site.id] = stamp
+                if previous is not None and previous != stamp:
+                    changed.append(site)
+        return changed
+
+    def poll(self) -> list[Site]:
+        """Reload every site whose workbooks changed since the last poll.
+
+        The first poll only records the current state of the files. Returns
+        the sites that were reloaded.
+        """
+        changed = self._changed(site_registry.sites())
+        for site in changed:
+            try:
+                for path in (site.epc_file, site.master_file):
+                    if os.path.exists(path):
+                        refresh_cache(path)
+                site_store.reload(site.id)
+            except Exception as e:
+                logging.exception(f"Error reloading site {site.id}: {e}")
+                site_store.invalidate(site.id)
+            with self._lock:
+                self._versions[site.id] += 1
+        if changed:
+            try:
+                fleet_snapshot()
+            except Exception as e:
+                logging.exception(f"Error rebuilding fleet snapshot: {e}")
+        return changed
+
+
+class SessionRegistry:
+    """Client sessions viewing each site, or the fleet page (``FLEET``)."""
+
+    def __init__(self, store: SiteStore = site_store):
+        self._store = store
+        self._lock = threading.Lock()
+        self._topics: dict[str, str] = {}
+
+    def _release(self, topic: str | None):
+        if topic is not None and topic != FLEET:
+            self._store.release(topic)
+
+    def view(self, token: str, topic: str):
+        """Record that a session now views ``topic``.
+
+        Viewing a site holds a reference to it in the site store until the
+        session views something else or is forgotten.
+        """
+        with self._lock:
+            previous = self._topics.get(token)
+            if previous == topic:
+                return
+            self._topics[token] = topic
+            if topic != FLEET:
+                self._store.acquire(topic)
+            self._release(previous)
+
+    def forget(self, token: str):
+        """Drop a session that has gone away, releasing the site it held."""
+        with self._lock:
+            self._release(self._topics.pop(token, None))
+
+    def tokens(self) -> list[str]:
+        with self._lock:
+            return list(self._topics)
+
+    def viewers(self, topic: str) -> list[str]:
+        with self._lock:
+            return [token for token, t in self._topics.items() if t == topic]
+
+
+site_watcher = SiteWatcher()
+sessions = SessionRegistry()
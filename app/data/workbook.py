@@ -0,0 +1,66 @@
+"""Single-open reader for Excel workbooks.
+
+``pd.read_excel`` re-opens the zip archive and re-decodes sharedStrings.xml on
+every call. A ``WorkbookSession`` opens the file once and parses only the
+sheets that are asked for, batching them into a single ``parse`` call.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+
+class WorkbookSession:
+    """An open workbook that hands out parsed sheets on request."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._excel: pd.ExcelFile | None = None
+        self._frames: dict[str, pd.DataFrame] = {}
+
+    def __enter__(self) -> "WorkbookSession":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self) -> pd.ExcelFile:
+        if self._excel is None:
+            self._excel = pd.ExcelFile(self.path, engine="openpyxl")
+        return self._excel
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self._open().sheet_names)
+
+    def sheets(
+        self, sheet_names: list[str], missing_ok: bool = False
+    ) -> dict[str, pd.DataFrame]:
+        """Parse the requested sheets, reusing any already parsed ones.
+
+        Unknown sheet names raise ``ValueError`` unless ``missing_ok`` is set,
+        in which case they are left out of the result.
+        """
+        available = set(self.sheet_names)
+        unknown = [name for name in sheet_names if name not in available]
+        if unknown and not missing_ok:
+            raise ValueError(f"Worksheet named '{unknown[0]}' not found")
+        pending = [
+            name
+            for name in dict.fromkeys(sheet_names)
+            if name in available and name not in self._frames
+        ]
+        if pending:
+            self._frames.update(self._open().parse(sheet_name=pending))
+        return {
+            name: self._frames[name] for name in sheet_names if name in self._frames
+        }
+
+    def sheet(self, sheet_name: str) -> pd.DataFrame:
+        return self.sheets([sheet_name])[sheet_name]
+
+    def close(self):
+        if self._excel is not None:
+            self._excel.close()
+            self._excel = None
+        self._frames = {}
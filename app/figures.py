@@ -0,0 +1,321 @@
+"""Plotly figure builders shared by every session.
+
+Figures are built from immutable inputs (equipment grids and KPI values), so
+each one is built once per input and reused by every session and event that
+asks for it. The serialized form of a figure is cached on the figure, so a
+reused figure is not re-encoded either.
+"""
+
+import functools
+import inspect
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+import plotly.graph_objects as go
+import reflex as rx
+from plotly.io import to_json
+
+from app.data.equipment_grid import REVENUE_PER_MWH, EquipmentGrid
+
+
+def _shared(fig: go.Figure) -> go.Figure:
+    """Mark a cached figure as shared so its serialized form can be reused.
+
+    Shared figures must not be modified after they are returned.
+    """
+    fig._shared_json = None
+    return fig
+
+
+def _hover_columns(*columns: np.ndarray) -> np.ndarray:
+    """Stack per-cell hover values into one float32 ``customdata`` array.
+
+    Plotly encodes NumPy arrays as base64 typed arrays (``bdata``), so keeping
+    ``z`` and ``customdata`` as float32 arrays rather than nested lists keeps
+    the payload compact and cheap for the browser to decode.
+    """
+    return np.stack(columns, axis=-1).astype(np.float32, copy=False)
+
+
+def _cost(lost: np.ndarray) -> np.ndarray:
+    return lost * np.float32(REVENUE_PER_MWH)
+
+
+def _memoize_on_grid(
+    builder: Callable[..., go.Figure], per_grid: int = 16
+) -> Callable[..., go.Figure]:
+    """Cache a grid's figures for as long as the grid itself is alive.
+
+    Extra (hashable) builder arguments are part of the key; only the
+    ``per_grid`` most recently used variants of each grid are kept.
+    """
+    cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    lock = threading.Lock()
+    signature = inspect.signature(builder)
+
+    @functools.wraps(builder)
+    def wrapper(grid: EquipmentGrid | None, *args) -> go.Figure:
+        if grid is None:
+            return go.Figure()
+        bound = signature.bind(grid, *args)
+        bound.apply_defaults()
+        args = bound.args[1:]
+        with lock:
+            variants = cache.setdefault(grid, OrderedDict())
+            fig = variants.get(args)
+            if fig is not None:
+                variants.move_to_end(args)
+                return fig
+        fig = _shared(builder(grid, *args))
+        with lock:
+            fig = variants.setdefault(args, fig)
+            while len(variants) > per_grid:
+                variants.popitem(last=False)
+        return fig
+
+    return wrapper
+
+
+@functools.lru_cache(maxsize=64)
+def waterfall_figure(
+    expected_energy: float,
+    measured_energy: float,
+    loss_drivers: tuple[tuple[str, float], ...],
+) -> go.Figure:
+    """Waterfall chart of the energy loss profile, shared per set of inputs."""
+    x_data = ["Expected Energy"]
+    y_data = [float(expected_energy)]
+    measure = ["absolute"]
+    text_data = [f"{expected_energy:,.1f} MWh"]
+    for name, mwh in loss_drivers:
+        x_data.append(name)
+        loss_val = -abs(mwh)
+        y_data.append(loss_val)
+        measure.append("relative")
+        text_data.append(f"{loss_val:,.1f} MWh" if abs(loss_val) > 0.01 else "")
+    x_data.append("Measured Energy")
+    y_data.append(0)
+    measure.append("total")
+    text_data.append(f"{measured_energy:,.1f} MWh")
+    fig = go.Figure(
+        go.Waterfall(
+            name="Energy Profile",
+            orientation="v",
+            measure=measure,
+            x=x_data,
+            textposition="outside",
+            text=text_data,
+            y=y_data,
+            connector={"line": {"color": "rgba(255,255,255,0.2)"}},
+            increasing={"marker": {"color": "#10b981"}},
+            decreasing={"marker": {"color": "#ef4444"}},
+            totals={"marker": {"color": "#06b6d4"}},
+            textfont=dict(color="white", size=11, family="Inter"),
+            hovertemplate="%{x}: %{y:,.1f} MWh<extra></extra>",
+        )
+    )
+    max_val = max(expected_energy, measured_energy) * 1.15
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="#9ca3af", size=10, family="Inter"),
+        margin=dict(l=10, r=10, t=5, b=10),
+        xaxis=dict(
+            showgrid=False, zeroline=False, tickfont=dict(color="#9ca3af", size=10)
+        ),
+        yaxis=dict(
+            title=dict(text="ENERGY (MWh)", font=dict(size=10)),
+            showgrid=True,
+            gridcolor="rgba(255,255,255,0.05)",
+            zeroline=False,
+            tickfont=dict(color="#9ca3af", size=10),
+            range=[0, max_val],
+        ),
+        height=310,
+        showlegend=False,
+        hoverlabel=dict(
+            bgcolor="#111827",
+            bordercolor="rgba(255,255,255,0.1)",
+            font=dict(color="white", size=12, family="Inter"),
+            align="left",
+        ),
+    )
+    return _shared(fig)
+
+
+@_memoize_on_grid
+def tracker_heatmap_figure(
+    grid: EquipmentGrid, window: tuple[int, int, int, int] | None = None
+) -> go.Figure:
+    """Tracker heatmap of ``window`` (the whole grid by default).
+
+    Windows larger than the tile limits are drawn as aggregated tiles, so the
+    number of cells sent to the browser stays bounded however many motors a
+    site has.
+    """
+    tiles = grid.tiles(window)
+    if tiles.full_resolution:
+        customdata = _hover_columns(tiles.capacity, _cost(tiles.lost))
+        hovertemplate = (
+            "<b>Controller:</b> %{y}<br>"
+            + "<b>Motor:</b> %{x}<br>"
+            + "<b>Lost Energy:</b> %{z:,.1f} MWh<br>"
+            + "<b>DC Capacity:</b> %{customdata[0]:,.1f} kW<br>"
+            + "<b>Cost Impact:</b> $%{customdata[1]:,.1f}<extra></extra>"
+        )
+    else:
+        customdata = _hover_columns(tiles.capacity, _cost(tiles.lost), tiles.peak)
+        hovertemplate = (
+            "<b>Controllers:</b> %{y}<br>"
+            + "<b>Motors:</b> %{x}<br>"
+            + "<b>Lost Energy:</b> %{z:,.1f} MWh<br>"
+            + "<b>Worst Motor:</b> %{customdata[2]:,.1f} MWh<br>"
+            + "<b>DC Capacity:</b> %{customdata[0]:,.1f} kW<br>"
+            + "<b>Cost Impact:</b> $%{customdata[1]:,.1f}<br>"
+            + "<i>Click to view at full resolution</i><extra></extra>"
+        )
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=tiles.lost,
+            x=list(tiles.cols),
+            y=list(tiles.rows),
+            customdata=customdata,
+            colorscale="RdYlGn_r",
+            colorbar=dict(
+                title=dict(text="Lost Energy (MWh)", font=dict(color="#9ca3af")),
+                tickfont=dict(color="#9ca3af"),
+            ),
+            hovertemplate=hovertemplate,
+        )
+    )
+    fig.update_layout(
+        title=None,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="#9ca3af", size=10, family="Inter"),
+        margin=dict(l=10, r=40, t=20, b=10),
+        xaxis=dict(
+            type="category",
+            showgrid=False,
+            zeroline=False,
+            showticklabels=False,
+            title=dict(text="MOTORS", font=dict(size=10)),
+        ),
+        yaxis=dict(
+            type="category",
+            showgrid=False,
+            zeroline=False,
+            autorange="reversed",
+            title=dict(text="CONTROLLERS", font=dict(size=10)),
+        ),
+        height=600,
+    )
+    return fig
+
+
+@_memoize_on_grid
+def inv_heatmap_figure(grid: EquipmentGrid) -> go.Figure:
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=grid.lost,
+            x=list(grid.cols),
+            y=list(grid.rows),
+            text=grid.labels.tolist(),
+            customdata=_hover_columns(
+                grid.layers["offline"],
+                grid.layers["module"],
+                grid.capacity,
+                _cost(grid.lost),
+            ),
+            colorscale="RdYlGn_r",
+            colorbar=dict(
+                title=dict(text="Lost Energy (MWh)", font=dict(color="#9ca3af")),
+                tickfont=dict(color="#9ca3af"),
+                thickness=15,
+            ),
+            hovertemplate="<b>Inverter ID:</b> %{text}<br>"
+            + "<b>Combined Lost Energy:</b> %{z:,.1f} MWh<br>"
+            + "<b>Offline Lost Energy:</b> %{customdata[0]:,.1f} MWh<br>"
+            + "<b>Module Lost Energy:</b> %{customdata[1]:,.1f} MWh<br>"
+            + "<b>DC Capacity:</b> %{customdata[2]:,.1f} kW<br>"
+            + "<b>Revenue Impact:</b> $%{customdata[3]:,.1f}<extra></extra>",
+            showscale=True,
+        )
+    )
+    fig.update_layout(
+        title=None,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="#9ca3af", size=10, family="Inter"),
+        margin=dict(l=5, r=5, t=5, b=5),
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, title=None),
+        yaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            autorange="reversed",
+            showticklabels=False,
+            title=None,
+        ),
+        height=250,
+        dragmode=False,
+    )
+    return fig
+
+
+@_memoize_on_grid
+def cb_heatmap_figure(grid: EquipmentGrid) -> go.Figure:
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=grid.lost,
+            x=list(grid.cols),
+            y=list(grid.rows),
+            text=grid.labels.tolist(),
+            customdata=_hover_columns(grid.capacity, _cost(grid.lost)),
+            colorscale="RdYlGn_r",
+            colorbar=dict(
+                title=dict(text="Lost Energy (MWh)", font=dict(color="#9ca3af")),
+                tickfont=dict(color="#9ca3af"),
+            ),
+            hovertemplate="<b>Inverter:</b> %{y}<br>"
+            + "<b>Combiner Box:</b> %{x}<br>"
+            + "<b>Lost Energy:</b> %{z:,.1f} MWh<br>"
+            + "<b>DC Capacity:</b> %{customdata[0]:,.1f} kW<br>"
+            + "<b>Cost Impact:</b> $%{customdata[1]:,.1f}<br>"
+            + "<b>Description:</b> %{text}<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        title=None,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="#9ca3af", size=10, family="Inter"),
+        margin=dict(l=10, r=40, t=20, b=10),
+        xaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            showticklabels=True,
+            title=dict(text="COMBINER BOXES", font=dict(size=10)),
+        ),
+        yaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            autorange="reversed",
+            title=dict(text="INVERTERS", font=dict(size=10)),
+        ),
+        height=600,
+    )
+    return fig
+
+
+@rx.serializer(overwrite=True)
+def serialize_figure(figure: go.Figure) -> dict:
+    """Serialize a figure, reusing the cached result for shared figures."""
+    if not hasattr(figure, "_shared_json"):
+        return json.loads(str(to_json(figure)))
+    if figure._shared_json is None:
+        figure._shared_json = json.loads(str(to_json(figure)))
+    return figure._shared_json
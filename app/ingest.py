@@ -0,0 +1,108 @@
+"""Precompile site workbooks into the Parquet cache the dashboard reads.
+
+Usage::
+
+    python -m app.ingest [--assets assets] [--workers 8] [--force]
+
+Every workbook listed in the site registry, plus every ``.xlsx`` file in the
+asset directory (EPC inputs, master reports, site mappings), is converted on
+its own worker process. Workbooks whose cache already matches their content
+hash are skipped. The fleet snapshot is rebuilt afterwards, so the first
+visitor after a nightly report drop gets warm data.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from app.data.fleet import SNAPSHOT_FILE, build_snapshot, write_snapshot
+from app.data.sheet_cache import clear_cache, ensure_cache, is_cached
+from app.data.site_registry import site_registry
+
+
+def _workbooks(assets: Path) -> list[Path]:
+    """Registered site workbooks and the workbooks in ``assets``, deduplicated."""
+    paths = [
+        Path(path)
+        for site in site_registry.sites()
+        for path in (site.epc_file, site.master_file)
+    ]
+    paths += sorted(assets.glob("*.xlsx"))
+    unique = {}
+    for path in paths:
+        if path.is_file() and not path.name.startswith("~$"):
+            unique.setdefault(path.resolve(), path)
+    return list(unique.values())
+
+
+def _ingest(path: Path, force: bool) -> tuple[str, int]:
+    """Bring one workbook's cache up to date; returns (outcome, sheet count)."""
+    if force:
+        clear_cache(path)
+    elif is_cached(path):
+        return "unchanged", 0
+    manifest = ensure_cache(path)
+    return "converted", len(manifest["sheet_names"])
+
+
+def _timed_ingest(path: Path, force: bool) -> tuple[str, int, float]:
+    start = time.perf_counter()
+    outcome, sheets = _ingest(path, force)
+    return outcome, sheets, time.perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", default="assets", help="site asset directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--force", action="store_true", help="reconvert workbooks even if unchanged"
+    )
+    parser.add_argument(
+        "--no-snapshot", action="store_true", help="skip rebuilding the fleet snapshot"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    paths = _workbooks(Path(args.assets))
+    if not paths:
+        print(f"No workbooks found in {args.assets} or the site registry")
+    failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(args.workers, len(paths) or 1)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        futures = {pool.submit(_timed_ingest, path, args.force): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                outcome, sheets, elapsed = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"{'failed':<10}  {'':>9}  {path}: {e}")
+                continue
+            detail = f"{sheets} sheets" if outcome == "converted" else ""
+            print(f"{outcome:<10}  {elapsed:8.2f}s  {path}  {detail}".rstrip())
+    print(f"Ingested {len(paths)} workbooks in {time.perf_counter() - start:.2f}s")
+
+    if not args.no_snapshot:
+        start = time.perf_counter()
+        snapshot = build_snapshot()
+        write_snapshot(snapshot)
+        print(
+            f"Fleet snapshot of {snapshot['total_sites']} sites written to "
+            f"{SNAPSHOT_FILE} in {time.perf_counter() - start:.2f}s"
+        )
+        for error in snapshot["failed_sites"]:
+            print(f"  failed: {error}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""Timing metrics for event handlers and computed vars.
+
+State classes declare their computed vars with ``computed_var``, which
+lists the vars each one depends on explicitly (Reflex only recomputes a
+cached var when one of those changes) and times every recompute against
+the event being processed. ``EventRecorder`` is the app middleware that
+times each event from the moment its state is acquired until its handler
+(for background events, the whole background task) finishes, and records
+the size of its arguments. ``record_deltas`` is a lifespan task recording
+the size of every state delta sent to the browser, by the event that
+produced it.
+
+Everything is kept in process-wide Prometheus histograms and counters,
+served in the Prometheus text format by ``metrics_api`` at ``/metrics``.
+Recomputes are also logged at debug level.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable
+
+import reflex as rx
+from reflex.middleware import Middleware
+from reflex_base.utils import format
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+SECONDS_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+BYTES_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+_current_event: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_event", default=None
+)
+
+
+def _labels(pairs) -> str:
+    """``name="value",...`` with the values escaped for the text format."""
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    """A Prometheus counter with one series per label set."""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            labels = _labels(zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value!r}")
+        return lines
+
+
+class Histogram:
+    """A Prometheus histogram with one series per label set."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...],
+        buckets: tuple[float, ...] = SECONDS_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._bounds = [str(bound) for bound in buckets] + ["+Inf"]
+        self._lock = threading.Lock()
+        # Per label set: the count of each bucket (non-cumulative, plus +Inf),
+        # and the sum of all observations.
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            counts, total = self._series.setdefault(
+                label_values, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = sorted(
+                (labels, list(counts), total[0])
+                for labels, (counts, total) in self._series.items()
+            )
+        for label_values, counts, total in series:
+            base = tuple(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self._bounds, counts):
+                cumulative += count
+                labels = _labels((*base, ("le", bound)))
+                lines.append(f"{self.name}_bucket{{{labels}}} {cumulative}")
+            labels = _labels(base)
+            lines.append(f"{self.name}_sum{{{labels}}} {total!r}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+event_seconds = Histogram(
+    "peak_event_duration_seconds",
+    "Wall time of each event handler, including the delta it sends.",
+    ("event",),
+)
+event_argument_bytes = Histogram(
+    "peak_event_argument_bytes",
+    "Size of each event's JSON arguments, as received from the browser.",
+    ("event",),
+    BYTES_BUCKETS,
+)
+event_delta_bytes = Histogram(
+    "peak_event_delta_bytes",
+    "Size of each JSON state delta sent to the browser, by the event that produced it.",
+    ("event",),
+    BYTES_BUCKETS,
+)
+computed_var_seconds = Histogram(
+    "peak_computed_var_duration_seconds",
+    "Wall time of each computed var recompute.",
+    ("var",),
+)
+computed_var_recomputes = Counter(
+    "peak_computed_var_recomputes_total",
+    "Computed var recomputes, by the event that caused them.",
+    ("var", "event"),
+)
+METRICS = (
+    event_seconds,
+    event_argument_bytes,
+    event_delta_bytes,
+    computed_var_seconds,
+    computed_var_recomputes,
+)
+
+
+def _event_label(name: str) -> str:
+    """``dashboard_state.set_tab`` for a full Reflex event name."""
+    state, _, handler = name.rpartition(".")
+    state = state.rpartition(".")[2].rpartition("____")[2]
+    return f"{state}.{handler}" if state else handler
+
+
+def computed_var(*deps: str, **kwargs) -> Callable[[Callable], rx.Var]:
+    """``rx.var`` with explicit dependencies that records its recomputes.
+
+    ``deps`` names the state vars the computed var reads; it is only
+    recomputed when one of them changes.
+    """
+
+    def decorator(fget: Callable) -> rx.Var:
+        @functools.wraps(fget)
+        def recorded(state):
+            start = time.perf_counter()
+            try:
+                return fget(state)
+            finally:
+                elapsed = time.perf_counter() - start
+                event = _current_event.get() or "(no event)"
+                var = f"{type(state).__name__}.{fget.__name__}"
+                computed_var_seconds.observe(elapsed, var)
+                computed_var_recomputes.inc(var, event)
+                logging.debug(f"{event} recomputed {var} in {elapsed * 1000:.1f} ms")
+
+        return rx.var(recorded, deps=list(deps), auto_deps=False, **kwargs)
+
+    return decorator
+
+
+class EventRecorder(Middleware):
+    """Time every event and attribute computed-var recomputes to it.
+
+    Reflex runs each event in its own task, so the event ends when that
+    task does.
+    """
+
+    async def preprocess(self, app, state, event):
+        label = _event_label(event.name)
+        _current_event.set(label)
+        try:
+            size = len(json.dumps(event.payload, default=str))
+        except (TypeError, ValueError):
+            size = 0
+        event_argument_bytes.observe(size, label)
+        task = asyncio.current_task()
+        if task is not None:
+            start = time.perf_counter()
+            task.add_done_callback(
+                lambda _: event_seconds.observe(time.perf_counter() - start, label)
+            )
+        return None
+
+
+@contextlib.asynccontextmanager
+async def record_deltas(app: rx.App):
+    """Record the size of every state delta the app sends, while it runs.
+
+    Reflex does not call middleware ``postprocess``, so deltas are measured
+    where they are emitted. Each is attributed to the event whose task sends
+    it; deltas pushed outside any event (such as site reloads) are recorded
+    as "(no event)".
+    """
+    namespace = app.event_namespace
+    if namespace is None:
+        yield
+        return
+    emit_update = namespace.emit_update
+
+    async def recorded(update, token: str):
+        if update.delta:
+            event_delta_bytes.observe(
+                len(format.json_dumps(update.delta)),
+                _current_event.get() or "(no event)",
+            )
+        await emit_update(update=update, token=token)
+
+    namespace.emit_update = recorded
+    try:
+        yield
+    finally:
+        del namespace.emit_update
+
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+async def _metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+metrics_api = Starlette(routes=[Route("/metrics", _metrics)])
@@ -64,7 +64,7 @@ def site_header() -> rx.Component:
                     rx.el.div(
                         rx.el.input(
                             type="date",
-                            default_value=DashboardState.start_date,
+                            value=DashboardState.start_date,
                             on_change=DashboardState.set_start_date,
                             class_name="bg-transparent text-white text-xs border-none focus:ring-0 p-0 cursor-pointer w-24",
                         ),
@@ -83,7 +83,7 @@ def site_header() -> rx.Component:
                     rx.el.div(
                         rx.el.input(
                             type="date",
-                            default_value=DashboardState.end_date,
+                            value=DashboardState.end_date,
                             on_change=DashboardState.set_end_date,
                             class_name="bg-transparent text-white text-xs border-none focus:ring-0 p-0 cursor-pointer w-24",
                         ),
@@ -105,9 +105,9 @@ def site_header() -> rx.Component:
                     rx.el.select(
                         rx.foreach(
                             DashboardState.available_sites,
-                            lambda s: rx.el.option(s, value=s),
+                            lambda s: rx.el.option(s["name"], value=s["id"]),
                         ),
-                        value=DashboardState.site_name,
+                        value=DashboardState.current_site_id,
                         on_change=lambda val: rx.redirect(f"/site/{val}"),
                         class_name="bg-[#111827] text-white text-xs border border-white/10 rounded px-3 py-1.5 w-48 appearance-none",
                     ),
@@ -1,15 +1,108 @@
 import reflex as rx
-import pandas as pd
 from datetime import datetime
 import logging
+import os
+from typing import Any, Mapping, TypedDict
 import random
+import urllib.parse
+import numpy as np
 import plotly.graph_objects as go
-import httpx
 from app.weather_utils import get_weather_info
+from app.weather_service import weather_service
+from app.data.equipment_grid import EquipmentGrid
+from app.data.pool import run_blocking
+from app.data.search_index import cached_index
+from app.data.site_dataset import SiteDataset, loss_driver_data
+from app.data.site_registry import site_registry
+from app.data.site_store import GridRef, site_store
+from app.data.site_watcher import sessions, site_watcher
+from app.instrumentation import computed_var
+from app.figures import (
+    cb_heatmap_figure,
+    inv_heatmap_figure,
+    tracker_heatmap_figure,
+    waterfall_figure,
+)
+
+
+ISSUE_PAGE_SIZE = 100
+# Stage values holding equipment grids, and the state vars that keep a
+# reference to them instead.
+GRID_REFS = {
+    "_tracker_grid": "_tracker_grid_ref",
+    "_cb_grid": "_cb_grid_ref",
+    "_inv_grid": "_inv_grid_ref",
+}
+# Heatmap stages and the state flag telling the page each one is shown.
+HEATMAP_FLAGS = {
+    "tracker": "tracker_loaded",
+    "cb": "cb_loaded",
+    "inverter": "inv_loaded",
+}
+# Ship each issue table to the browser once and search it there, instead of
+# sending every keystroke of the issue modal searches to the server.
+CLIENT_SIDE_SEARCH = os.environ.get("PEAK_CLIENT_SIDE_SEARCH", "0") == "1"
+
+
+class IssueColumns(TypedDict):
+    """An issue table in columnar form, for filtering in the browser.
+
+    Entry ``k`` is the cell ``(rows[row[k]], cols[col[k]])``; entries are
+    ordered by lost energy, largest first.
+    """
+
+    rows: list[str]
+    cols: list[str]
+    row: list[int]
+    col: list[int]
+    capacity: list[float]
+    lost: list[float]
+
+
+def _inverter_name_mask(grid: EquipmentGrid, query: str) -> np.ndarray:
+    """Cells whose displayed "<block> P<column>" inverter name contains ``query``."""
+    names = tuple(f"{row} P{col}" for row in grid.rows for col in grid.cols)
+    return cached_index(names).mask(query).reshape(grid.lost.shape)
+
+
+def _selected_issues(
+    grid: EquipmentGrid | None,
+    query: str,
+    threshold: float = 0.0,
+    search=EquipmentGrid.search_mask,
+) -> np.ndarray:
+    """Entries of the grid's issue table matching a modal's search, in order."""
+    if grid is None:
+        return np.empty(0, dtype=np.intp)
+    cell_mask = search(grid, query) if query.strip() else None
+    return grid.issues.select(threshold, cell_mask)
+
+
+def _issue_columns(grid: EquipmentGrid | None, threshold: float = 0.0) -> IssueColumns:
+    if grid is None or not CLIENT_SIDE_SEARCH:
+        return {
+            "rows": [],
+            "cols": [],
+            "row": [],
+            "col": [],
+            "capacity": [],
+            "lost": [],
+        }
+    issues = grid.issues
+    selected = issues.select(threshold)
+    return {
+        "rows": list(grid.rows),
+        "cols": list(grid.cols),
+        "row": issues.rows[selected].tolist(),
+        "col": issues.cols[selected].tolist(),
+        "capacity": issues.capacity_display[selected].tolist(),
+        "lost": issues.lost_display[selected].tolist(),
+    }
 
 
 class DashboardState(rx.State):
-    current_site_id: str = "Airport Solar"
+    current_site_id: str = "airport-solar"
+    data_version: int = 0
     active_tab: str = "Executive Summary"
     start_date: str = "2025-01-01"
     end_date: str = "2025-12-10"
@@ -24,7 +117,9 @@ class DashboardState(rx.State):
     inception_date: str = "7/3/2023"
     inverter_type: str = "Power Electronics"
     poi_limit: str = "48.60 MW"
-    available_sites: list[str] = ["AIRPORT SOLAR"]
+    available_sites: list[dict[str, str]] = [
+        {"id": "airport-solar", "name": "AIRPORT SOLAR"}
+    ]
     show_settings_modal: bool = False
     soiling_loss_pct: float = 0.5
     vegetation_loss_pct: float = 0.0
@@ -43,6 +138,20 @@ class DashboardState(rx.State):
     }
     tabs: list[str] = ["Executive Summary", "Priority View", "Equipment Heatmap"]
 
+    def __getstate__(self):
+        """Serialize the state without its cached computed values.
+
+        They can be as large as the plant (heatmap figures, issue tables) and
+        are recomputed on demand from the shared site store, so only the
+        session's own fields and grid references are written out.
+        """
+        cached = {var._cache_attr for var in self.computed_vars.values()}
+        return {
+            name: value
+            for name, value in super().__getstate__().items()
+            if name not in cached
+        }
+
     @rx.event
     def set_tab(self, tab: str):
         self.active_tab = tab
@@ -168,7 +277,7 @@ class DashboardState(rx.State):
     def set_loss_driver_unit(self, unit: str):
         self.loss_driver_unit = unit
 
-    @rx.var
+    @computed_var("primary_loss_data", "loss_driver_unit")
     def loss_drivers(self) -> list[dict[str, str | float]]:
         """Prepare sorted data for the Loss Drivers panel based on selected unit."""
         raw_data = self.primary_loss_data
@@ -204,69 +313,19 @@ class DashboardState(rx.State):
             )
         return drivers
 
-    @rx.var
+    @computed_var("expected_energy", "measured_energy", "primary_loss_data")
     def waterfall_plotly_fig(self) -> go.Figure:
         """Generate a Plotly Waterfall chart for energy loss profile with units."""
-        x_data = ["Expected Energy"]
-        y_data = [float(self.expected_energy)]
-        measure = ["absolute"]
-        text_data = [f"{self.expected_energy:,.1f} MWh"]
-        for driver in self.primary_loss_data:
-            x_data.append(driver["name"])
-            loss_val = -abs(float(driver.get("mwh", 0.0)))
-            y_data.append(loss_val)
-            measure.append("relative")
-            text_data.append(f"{loss_val:,.1f} MWh" if abs(loss_val) > 0.01 else "")
-        x_data.append("Measured Energy")
-        y_data.append(0)
-        measure.append("total")
-        text_data.append(f"{self.measured_energy:,.1f} MWh")
-        fig = go.Figure(
-            go.Waterfall(
-                name="Energy Profile",
-                orientation="v",
-                measure=measure,
-                x=x_data,
-                textposition="outside",
-                text=text_data,
-                y=y_data,
-                connector={"line": {"color": "rgba(255,255,255,0.2)"}},
-                increasing={"marker": {"color": "#10b981"}},
-                decreasing={"marker": {"color": "#ef4444"}},
-                totals={"marker": {"color": "#06b6d4"}},
-                textfont=dict(color="white", size=11, family="Inter"),
-                hovertemplate="%{x}: %{y:,.1f} MWh<extra></extra>",
-            )
-        )
-        max_val = max(self.expected_energy, self.measured_energy) * 1.15
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#9ca3af", size=10, family="Inter"),
-            margin=dict(l=10, r=10, t=5, b=10),
-            xaxis=dict(
-                showgrid=False, zeroline=False, tickfont=dict(color="#9ca3af", size=10)
-            ),
-            yaxis=dict(
-                title=dict(text="ENERGY (MWh)", font=dict(size=10)),
-                showgrid=True,
-                gridcolor="rgba(255,255,255,0.05)",
-                zeroline=False,
-                tickfont=dict(color="#9ca3af", size=10),
-                range=[0, max_val],
-            ),
-            height=310,
-            showlegend=False,
-            hoverlabel=dict(
-                bgcolor="#111827",
-                bordercolor="rgba(255,255,255,0.1)",
-                font=dict(color="white", size=12, family="Inter"),
-                align="left",
+        return waterfall_figure(
+            self.expected_energy,
+            self.measured_energy,
+            tuple(
+                (driver["name"], float(driver.get("mwh", 0.0)))
+                for driver in self.primary_loss_data
             ),
         )
-        return fig
 
-    @rx.var
+    @computed_var()
     def dynamic_summary(self) -> list[str]:
         """Generate a list of strings representing the 5-point analysis narrative."""
         return [
@@ -283,292 +342,203 @@ class DashboardState(rx.State):
         try:
             lat = float(self.lat) if self.lat else 42.16
             lon = float(self.lon) if self.lon else -120.4
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.open-meteo.com/v1/forecast",
-                    params={
-                        "latitude": lat,
-                        "longitude": lon,
-                        "current": "temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m,is_day",
-                        "daily": "weather_code,temperature_2m_max,temperature_2m_min",
-                        "timezone": "auto",
-                        "forecast_days": 7,
-                        "temperature_unit": "celsius",
-                        "wind_speed_unit": "kmh",
-                    },
-                    timeout=10.0,
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    current = data.get("current", {})
-                    daily = data.get("daily", {})
-                    temp = round(current.get("temperature_2m", 0))
-                    feels_like = round(current.get("apparent_temperature", 0))
-                    humidity = current.get("relative_humidity_2m", 0)
-                    wind = current.get("wind_speed_10m", 0)
-                    code = current.get("weather_code", 0)
-                    is_day = current.get("is_day", 1)
-                    icon, condition = get_weather_info(code, is_day)
-                    forecast_items = []
-                    times = daily.get("time", [])
-                    highs = daily.get("temperature_2m_max", [])
-                    lows = daily.get("temperature_2m_min", [])
-                    codes = daily.get("weather_code", [])
-                    for i in range(min(7, len(times))):
-                        date_str = times[i]
-                        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-                        day_name = date_obj.strftime("%a").upper()
-                        icon, _ = get_weather_info(codes[i], 1)
-                        forecast_items.append(
-                            {
-                                "day": day_name,
-                                "icon": icon,
-                                "high": round(highs[i]),
-                                "low": round(lows[i]),
-                            }
-                        )
-                    async with self:
-                        self.current_temp = str(temp)
-                        self.current_feels_like = str(feels_like)
-                        self.current_humidity = f"{humidity}%"
-                        self.current_wind = f"{wind} km/h"
-                        self.current_condition = condition
-                        self.current_icon = icon
-                        self.weather_forecast = forecast_items
+            data = await weather_service.forecast(lat, lon)
+            if data is not None:
+                current = data.get("current", {})
+                daily = data.get("daily", {})
+                temp = round(current.get("temperature_2m", 0))
+                feels_like = round(current.get("apparent_temperature", 0))
+                humidity = current.get("relative_humidity_2m", 0)
+                wind = current.get("wind_speed_10m", 0)
+                code = current.get("weather_code", 0)
+                is_day = current.get("is_day", 1)
+                icon, condition = get_weather_info(code, is_day)
+                forecast_items = []
+                times = daily.get("time", [])
+                highs = daily.get("temperature_2m_max", [])
+                lows = daily.get("temperature_2m_min", [])
+                codes = daily.get("weather_code", [])
+                for i in range(min(7, len(times))):
+                    date_str = times[i]
+                    date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+                    day_name = date_obj.strftime("%a").upper()
+                    day_icon, _ = get_weather_info(codes[i], 1)
+                    forecast_items.append(
+                        {
+                            "day": day_name,
+                            "icon": day_icon,
+                            "high": round(highs[i]),
+                            "low": round(lows[i]),
+                        }
+                    )
+                async with self:
+                    self.current_temp = str(temp)
+                    self.current_feels_like = str(feels_like)
+                    self.current_humidity = f"{humidity}%"
+                    self.current_wind = f"{wind} km/h"
+                    self.current_condition = condition
+                    self.current_icon = icon
+                    self.weather_forecast = forecast_items
         except Exception as e:
             logging.exception(f"Error fetching site weather data: {e}")
 
-    @rx.event
+    @rx.event(background=True)
     async def load_site_data(self):
-        """Load data from the provided Excel files with proper metadata extraction."""
-        route_site_id = self.router.url.query_parameters.get("site_id")
-        self.active_tab = "Executive Summary"
-        self.site_name = "AIRPORT SOLAR"
-        self.current_site_id = "Airport Solar"
-        self.available_sites = ["AIRPORT SOLAR"]
-        try:
-            epc_file = "assets/EPC Input File - Airport Solar.xlsx"
-            site_details = pd.read_excel(epc_file, sheet_name="Site Details")
-
-            def _get_val(desc_name, default):
-                row = site_details[site_details["Description"] == desc_name]
-                return row["Value"].iloc[0] if not row.empty else default
-
-            self.client = str(_get_val("Client Name", "DESRI"))
-            plant_ac = _get_val("Plant AC Capacity (kW)", 48600)
-            plant_dc = _get_val("Plant DC Capacity (kW)", 60697.91)
-            self.ac_capacity = f"{float(plant_ac) / 1000:.2f} MW"
-            self.dc_capacity = f"{float(plant_dc) / 1000:.2f} MW"
-            lat_val = _get_val("Latitude", 42.16)
-            lon_val = _get_val("Longitude", -120.4)
-            self.lat = str(lat_val)
-            self.lon = str(lon_val)
-            self.location = "OREGON"
-            self.inception_date = str(
-                _get_val("Plant Substantial Completion Date", "7/3/2023")
+        """Stream the site's shared dataset into the page, metadata then KPIs.
+
+        Stages are loaded in the ingestion pool so a slow workbook never blocks
+        the event loop, and each stage is pushed to the client as it completes.
+        """
+        async with self:
+            sites = site_registry.sites()
+            site = site_registry.get(getattr(self, "site_id", "")) or sites[0]
+            self.active_tab = "Executive Summary"
+            self.site_name = site.name.upper()
+            self.current_site_id = site.id
+            self.data_version = site_watcher.version(site.id)
+            sessions.view(self.router.session.client_token, site.id)
+            self.available_sites = [{"id": s.id, "name": s.name.upper()} for s in sites]
+            dataset = site_store.get(self.current_site_id)
+            self._held_site_id = self.current_site_id
+            self.tracker_loaded = False
+            self.tracker_window = []
+            self.cb_loaded = False
+            self.inv_loaded = False
+        for stage in ("metadata", "kpis"):
+            values = await run_blocking(dataset.stage, stage)
+            async with self:
+                if self._held_site_id != dataset.site_id:
+                    return
+                self._apply_stage_values(values)
+
+    @rx.event(background=True)
+    async def load_heatmap_stage(self, stage: str):
+        """Load one equipment heatmap's data the first time it is shown, or
+        again if it is no longer resident in this process."""
+        async with self:
+            if not self._held_site_id:
+                return
+            dataset = site_store.get(self._held_site_id)
+            if getattr(self, HEATMAP_FLAGS[stage]) and dataset.is_loaded(stage):
+                return
+        await self._show_stage(dataset, stage)
+
+    @rx.event(background=True)
+    async def reload_stages(self, stages: list[str]):
+        """Reload shown stages that this process no longer holds."""
+        async with self:
+            if not self._held_site_id:
+                return
+            dataset = site_store.get(self._held_site_id)
+        for stage in stages:
+            if not await self._show_stage(dataset, stage):
+                return
+
+    async def _show_stage(self, dataset: SiteDataset, stage: str) -> bool:
+        """Load a stage in the ingestion pool and show the selected window.
+
+        Returns False if the session moved to another site in the meantime.
+        """
+        await run_blocking(dataset.stage, stage)
+        async with self:
+            if self._held_site_id != dataset.site_id:
+                return False
+            self._apply_stage_values(
+                dataset.window(stage, self.start_date, self.end_date), stage
             )
-            self.inverter_type = str(_get_val("Inverter Model", "Power Electronics"))
-            poi_val = _get_val("POI Curtail Limit (kW)", None)
-            if poi_val is None or (isinstance(poi_val, float) and pd.isna(poi_val)):
-                poi_val = _get_val("poi_curtail_sp", 48600)
-            self.poi_limit = f"{float(poi_val) / 1000:.2f} MW"
-            self.weather_location = "LAKEVIEW"
-            master_file = "assets/master_report.xlsx"
-            site_metrics = pd.read_excel(master_file, sheet_name="Site Metrics")
-            if not site_metrics.empty:
-                if "DateTime" in site_metrics.columns:
-                    dates = pd.to_datetime(site_metrics["DateTime"])
-                    self.start_date = dates.min().strftime("%Y-%m-%d")
-                    self.end_date = dates.max().strftime("%Y-%m-%d")
-                self.measured_energy = float(site_metrics["Measured Energy"].sum())
-                self.expected_energy = float(site_metrics["Expected Energy"].sum())
-                self.curtailed_energy = float(site_metrics["Curtailed Energy"].sum())
-                self.performance = round(float(site_metrics["Performance"].mean()), 1)
-                self.availability = 98.5
-                self.modeled_energy = (
-                    self.expected_energy / 0.98 if self.expected_energy else 0.0
-                )
-
-                def _get_sheet_sum(sheet_name, is_kwh=True):
-                    try:
-                        df = pd.read_excel(master_file, sheet_name=sheet_name)
-                        numeric_cols = df.select_dtypes(include=["number"])
-                        total = numeric_cols.sum().sum()
-                        return total / 1000.0 if is_kwh else total
-                    except Exception as e:
-                        logging.exception(f"Error reading sheet {sheet_name}: {e}")
-                        return 0.0
-
-                self.inverters_offline_loss = _get_sheet_sum("inv_kW_offline_lost")
-                self.derated_loss = _get_sheet_sum("inv_kW_derate_lost")
-                try:
-                    plant_offline_df = pd.read_excel(
-                        master_file, sheet_name="site_kW_plant_offline_loss (pi)"
-                    )
-                    self.plant_offline_loss = (
-                        plant_offline_df.select_dtypes(include=["number"]).sum().sum()
-                        / 1000.0
-                    )
-                except Exception as e:
-                    logging.exception(f"Error reading plant offline sheet: {e}")
-                    self.plant_offline_loss = 2.5
-                self.underperformance_loss = 0.0
-                self.total_lost_energy = (
-                    self.inverters_offline_loss
-                    + self.plant_offline_loss
-                    + self.derated_loss
-                    + self.underperformance_loss
-                    + self.curtailed_energy
-                )
-                self.potential_lds = -42097.0
-                self.contractual_availability = 98.2
-                self.excused_energy = 1739.8
-                try:
-                    t_dc_df = pd.read_excel(
-                        master_file, sheet_name="Tracker - Affected DC Capacity"
-                    )
-                    t_lost_df = pd.read_excel(
-                        master_file, sheet_name="Tracker - Lost Energy"
-                    )
-                    t_cols = [c for c in t_dc_df.columns if c != "DateTime"]
-                    controllers = sorted(list(set((c.split("/")[0] for c in t_cols))))
-                    motors = sorted(
-                        list(set((c.split("/")[1] for c in t_cols if "/" in c)))
-                    )
-                    t_dc_sum = t_dc_df[t_cols].sum()
-                    t_lost_sum = t_lost_df[t_cols].sum()
-                    z_dc = []
-                    z_lost = []
-                    for ctrl in controllers:
-                        row_dc = []
-                        row_lost = []
-                        for motor in motors:
-                            col_name = f"{ctrl}/{motor}"
-                            row_dc.append(float(t_dc_sum.get(col_name, 0.0)))
-                            row_lost.append(float(t_lost_sum.get(col_name, 0.0)))
-                        z_dc.append(row_dc)
-                        z_lost.append(row_lost)
-                    self.tracker_z_dc = z_dc
-                    self.tracker_z_lost = z_lost
-                    self.tracker_x_motors = motors
-                    self.tracker_y_controllers = controllers
-                except Exception as e:
-                    logging.exception(f"Tracker data error: {e}")
-                try:
-                    dc_lost_df = pd.read_excel(
-                        master_file, sheet_name="DC - Lost Energy"
-                    )
-                    dc_cap_df = pd.read_excel(
-                        master_file, sheet_name="DC - Affected Capacity"
-                    )
-                    dc_class_df = pd.read_excel(
-                        master_file, sheet_name="DC - Classification"
+            if stage in HEATMAP_FLAGS:
+                setattr(self, HEATMAP_FLAGS[stage], True)
+            return True
+
+    def _apply_stage_values(self, values: Mapping[str, Any], stage: str = ""):
+        for name, value in values.items():
+            if name in GRID_REFS:
+                # Grids stay in the shared site store; the state only keeps
+                # a reference to the window of the stage being shown.
+                if value is not None:
+                    value = GridRef(
+                        self._held_site_id,
+                        self.data_version,
+                        stage,
+                        name,
+                        self.start_date,
+                        self.end_date,
                     )
-                    cols = [c for c in dc_lost_df.columns if c != "timestamp"]
-                    raw_inverters = set()
-                    raw_cbs = set()
-                    for c in cols:
-                        if " - " in c:
-                            parts = c.split(" - ")
-                            raw_inverters.add(parts[0])
-                            raw_cbs.add(parts[1])
-                    self.cb_y_inverters = sorted(list(raw_inverters))
-                    self.cb_x_combiner_boxes = sorted(list(raw_cbs))
-                    lost_sums = dc_lost_df[cols].sum()
-                    cap_sums = dc_cap_df[cols].sum()
-
-                    @rx.event
-                    def get_mode_class(col):
-                        if col not in dc_class_df.columns:
-                            return "Healthy"
-                        mode_series = dc_class_df[col].dropna().mode()
-                        return (
-                            str(mode_series.iloc[0])
-                            if not mode_series.empty
-                            else "Healthy"
-                        )
-
-                    class_map = {c: get_mode_class(c) for c in cols}
-                    z_lost, z_cap, z_class = ([], [], [])
-                    for inv in self.cb_y_inverters:
-                        row_lost, row_cap, row_class = ([], [], [])
-                        for cb in self.cb_x_combiner_boxes:
-                            col_name = f"{inv} - {cb}"
-                            row_lost.append(float(lost_sums.get(col_name, 0.0)))
-                            row_cap.append(float(cap_sums.get(col_name, 0.0)))
-                            row_class.append(class_map.get(col_name, "Healthy"))
-                        z_lost.append(row_lost)
-                        z_cap.append(row_cap)
-                        z_class.append(row_class)
-                    self.cb_z_lost = z_lost
-                    self.cb_z_capacity = z_cap
-                    self.cb_z_classifications = z_class
-                except Exception as e:
-                    logging.exception(f"CB data error: {e}")
-                try:
-                    import re
-                    import math
-
-                    inv_lost_df = pd.read_excel(
-                        master_file, sheet_name="Inverter - Lost Energy"
-                    )
-                    inv_dc_df = pd.read_excel(
-                        master_file, sheet_name="Inverter - DC Capacity"
-                    )
-                    inv_mod_lost_df = pd.read_excel(
-                        master_file, sheet_name="Inverter Mod - Lost Energy"
-                    )
-                    cols = sorted([c for c in inv_lost_df.columns if c != "Unnamed: 0"])
-                    rows, cols_grid = (3, 6)
-                    z_lost, z_cap, z_offline, z_module, z_names = ([], [], [], [], [])
-                    for r in range(rows):
-                        row_lost, row_cap, row_offline, row_module, row_names = (
-                            [],
-                            [],
-                            [],
-                            [],
-                            [],
-                        )
-                        for c in range(cols_grid):
-                            idx = r * cols_grid + c
-                            if idx < len(cols):
-                                col_name = cols[idx]
-                                off_val = float(inv_lost_df[col_name].sum())
-                                mod_val = float(inv_mod_lost_df[col_name].sum())
-                                row_offline.append(off_val)
-                                row_module.append(mod_val)
-                                row_lost.append(off_val + mod_val)
-                                row_cap.append(float(inv_dc_df[col_name].iloc[0]))
-                                row_names.append(col_name)
-                            else:
-                                row_offline.append(0.0)
-                                row_module.append(0.0)
-                                row_lost.append(0.0)
-                                row_cap.append(0.0)
-                                row_names.append("Empty")
-                        z_lost.append(row_lost)
-                        z_cap.append(row_cap)
-                        z_offline.append(row_offline)
-                        z_module.append(row_module)
-                        z_names.append(row_names)
-                    self.inv_z_lost_energy = z_lost
-                    self.inv_z_dc_capacity = z_cap
-                    self.inv_z_offline_lost = z_offline
-                    self.inv_z_module_lost = z_module
-                    self.inv_inverter_names = z_names
-                    self.inv_x_positions = [str(i + 1) for i in range(cols_grid)]
-                    self.inv_y_blocks = [str(i + 1) for i in range(rows)]
-                except Exception as e:
-                    logging.exception(f"Inverter data error: {e}")
-        except Exception as e:
-            logging.exception(f"Error loading real data for Airport Solar: {e}")
-            self.location = "OREGON (FALLBACK)"
+                name = GRID_REFS[name]
+            setattr(self, name, value)
+        if "_loss_driver_mwh" in values:
+            self.primary_loss_data = loss_driver_data(
+                self.primary_loss_data,
+                self._loss_driver_mwh,
+                self.expected_energy,
+                self.measured_energy,
+            )
+
+    def _apply_date_range(self):
+        """Recompute the loaded KPIs and heatmaps for the selected dates.
+
+        Every window is answered from the prefix sums built at load time, so
+        this never re-reads the workbooks. Shown stages this process does not
+        hold are not loaded here, on the event loop; the returned event
+        reloads them in the background.
+        """
+        if not self._held_site_id:
+            return None
+        dataset = site_store.get(self._held_site_id)
+        missing = []
+        for stage in ("kpis", *HEATMAP_FLAGS):
+            if stage in HEATMAP_FLAGS and not getattr(self, HEATMAP_FLAGS[stage]):
+                continue
+            if not dataset.is_loaded(stage):
+                missing.append(stage)
+                continue
+            self._apply_stage_values(
+                dataset.window(stage, self.start_date, self.end_date), stage
+            )
+        return DashboardState.reload_stages(missing) if missing else None
+
+    def _reload_missing_grids(self):
+        """Reload the shown grids this process does not hold, in the background.
+
+        A session restored on another worker, or after an eviction or restart,
+        keeps its grid references, but their stages may not be resident here.
+        Events that recompute the grid vars return this so those vars are
+        filled again instead of staying empty.
+        """
+        missing = [
+            ref.stage
+            for ref in (self._tracker_grid_ref, self._cb_grid_ref, self._inv_grid_ref)
+            if ref is not None and not site_store.is_resident(ref)
+        ]
+        return DashboardState.reload_stages(missing) if missing else None
+
+    def _refresh_site_data(self, site_id: str):
+        """Show a reloaded site's data; the watcher has already loaded it."""
+        if self._held_site_id != site_id:
+            return
+        dataset = site_store.get(site_id)
+        if dataset.is_loaded("metadata"):
+            self._apply_stage_values(dataset.stage("metadata"))
+        self.tracker_window = []
+        self.data_version = site_watcher.version(site_id)
+        self._apply_date_range()
+
+    @rx.event
+    def set_start_date(self, value: str):
+        self.start_date = value
+        return self._apply_date_range()
+
+    @rx.event
+    def set_end_date(self, value: str):
+        self.end_date = value
+        return self._apply_date_range()
 
     @rx.event
     async def finalize_site_load(self):
         """Finalize site data loading after async operations if needed."""
         self.sites_data = [
             {
+                "id": urllib.parse.quote(self.current_site_id),
                 "name": self.site_name,
                 "status": "HEALTHY",
                 "ac_capacity": self.ac_capacity,
@@ -581,7 +551,7 @@ class DashboardState(rx.State):
         ]
         yield DashboardState.load_weather_data
 
-    @rx.var
+    @computed_var()
     def current_year(self) -> str:
         return str(datetime.now().year)
 
@@ -589,30 +559,36 @@ class DashboardState(rx.State):
     outstanding_transformers: int = 3
     outstanding_breakers: int = 1
     outstanding_trackers: int = 5
+    tracker_loaded: bool = False
+    cb_loaded: bool = False
+    inv_loaded: bool = False
+    tracker_window: list[int] = []
     show_tracker_modal: bool = False
     tracker_modal_search: str = ""
-    tracker_z_dc: list[list[float]] = []
-    tracker_z_lost: list[list[float]] = []
-    tracker_x_motors: list[str] = []
-    tracker_y_controllers: list[str] = []
-    cb_z_lost: list[list[float]] = []
-    cb_z_capacity: list[list[float]] = []
-    cb_z_classifications: list[list[str]] = []
-    cb_x_combiner_boxes: list[str] = []
-    cb_y_inverters: list[str] = []
+    tracker_motors_with_issues: int = 0
+    tracker_total_lost_energy: float = 0.0
+    tracker_total_lost_revenue: float = 0.0
+    tracker_most_problematic_controller: str = "N/A"
+    _tracker_grid_ref: GridRef | None = None
+    cb_combiner_boxes_with_issues: int = 0
+    cb_total_lost_energy: float = 0.0
+    cb_total_lost_revenue: float = 0.0
+    cb_most_problematic_box: str = "N/A"
+    _cb_grid_ref: GridRef | None = None
     cb_heatmap_mode: str = "CAPACITY"
     show_cb_modal: bool = False
     cb_modal_search: str = ""
-    inv_z_dc_capacity: list[list[float]] = []
-    inv_z_lost_energy: list[list[float]] = []
-    inv_z_offline_lost: list[list[float]] = []
-    inv_z_module_lost: list[list[float]] = []
-    inv_inverter_names: list[list[str]] = []
-    inv_x_positions: list[str] = []
-    inv_y_blocks: list[str] = []
+    inv_inverters_with_issues: int = 0
+    inv_total_lost_energy: float = 0.0
+    inv_total_lost_revenue: float = 0.0
+    inv_most_problematic_block: str = "N/A"
+    _inv_grid_ref: GridRef | None = None
     show_inv_modal: bool = False
     inv_modal_search: str = ""
+    issue_limit: int = ISSUE_PAGE_SIZE
     site_search: str = ""
+    _held_site_id: str = ""
+    _loss_driver_mwh: dict[str, float] = {}
     sites_data: list[dict[str, str | float]] = []
 
     @rx.event
@@ -622,10 +598,36 @@ class DashboardState(rx.State):
     @rx.event
     def toggle_tracker_modal(self):
         self.show_tracker_modal = not self.show_tracker_modal
+        self._reset_issue_limit()
+        return self._reload_missing_grids()
 
     @rx.event
     def set_tracker_modal_search(self, val: str):
         self.tracker_modal_search = val
+        self._reset_issue_limit()
+        return self._reload_missing_grids()
+
+    @rx.event
+    def zoom_tracker_heatmap(self, points: list[dict]):
+        """Show the clicked tile of the tracker overview at full resolution."""
+        grid = site_store.grid(self._tracker_grid_ref)
+        if grid is None:
+            return self._reload_missing_grids()
+        if not points:
+            return
+        tiles = grid.tiles(tuple(self.tracker_window) or None)
+        if tiles.full_resolution:
+            return
+        try:
+            tile = tiles.tile_window(str(points[0]["y"]), str(points[0]["x"]))
+        except (KeyError, ValueError):
+            return
+        self.tracker_window = list(grid.zoom_window(tile))
+
+    @rx.event
+    def reset_tracker_zoom(self):
+        self.tracker_window = []
+        return self._reload_missing_grids()
 
     @rx.event
     def set_cb_heatmap_mode(self, mode: str):
@@ -634,394 +636,175 @@ class DashboardState(rx.State):
     @rx.event
     def toggle_cb_modal(self):
         self.show_cb_modal = not self.show_cb_modal
+        self._reset_issue_limit()
+        return self._reload_missing_grids()
 
     @rx.event
     def set_cb_modal_search(self, val: str):
         self.cb_modal_search = val
+        self._reset_issue_limit()
+        return self._reload_missing_grids()
+
+    def _reset_issue_limit(self):
+        # Assigning marks the var dirty even when unchanged, which would
+        # recompute the issue lists of the other two modals as well.
+        if self.issue_limit != ISSUE_PAGE_SIZE:
+            self.issue_limit = ISSUE_PAGE_SIZE
+
+    @rx.event
+    def show_more_issues(self):
+        self.issue_limit += ISSUE_PAGE_SIZE
+        return self._reload_missing_grids()
 
     @rx.event
     def toggle_inv_modal(self):
         self.show_inv_modal = not self.show_inv_modal
+        self._reset_issue_limit()
+        return self._reload_missing_grids()
 
     @rx.event
     def set_inv_modal_search(self, val: str):
         self.inv_modal_search = val
+        self._reset_issue_limit()
+        return self._reload_missing_grids()
 
-    @rx.var
+    @computed_var("sites_data", "site_search")
     def filtered_sites(self) -> list[dict[str, str | float]]:
-        if not self.site_search:
+        if not self.site_search.strip():
             return self.sites_data
-        query = self.site_search.lower()
-        return [site for site in self.sites_data if query in site["name"].lower()]
-
-    @rx.var
-    def tracker_motors_with_issues(self) -> int:
-        """Count total motor-controller combinations with lost energy > 0."""
-        if not self.tracker_z_lost:
-            return 0
-        total_issues = 0
-        for row in self.tracker_z_lost:
-            for val in row:
-                if val > 0:
-                    total_issues += 1
-        return total_issues
-
-    @rx.var
-    def tracker_total_lost_energy(self) -> float:
-        """Sum of all lost energy values in tracker_z_lost (already in MWh)."""
-        total = 0.0
-        for row in self.tracker_z_lost:
-            for val in row:
-                total += val
-        return total
-
-    @rx.var
-    def tracker_total_lost_revenue(self) -> float:
-        """Total Lost Revenue for trackers: Lost Energy MWh * $40/MWh."""
-        return self.tracker_total_lost_energy * 40.0
-
-    @rx.var
+        index = cached_index(tuple(site["name"] for site in self.sites_data))
+        return [self.sites_data[i] for i in index.search(self.site_search)]
+
+    @computed_var("_tracker_grid_ref", "tracker_modal_search")
+    def tracker_issue_count(self) -> int:
+        return len(
+            _selected_issues(
+                site_store.grid(self._tracker_grid_ref), self.tracker_modal_search, 0.1
+            )
+        )
+
+    @computed_var("_tracker_grid_ref", "tracker_modal_search", "issue_limit")
     def motors_with_issues_list(self) -> list[dict[str, str | float]]:
-        """Extract unique list of tracker motors with issues > 0.1kWh lost energy."""
-        if (
-            not self.tracker_z_lost
-            or not self.tracker_x_motors
-            or (not self.tracker_y_controllers)
-        ):
+        """The top tracker motors losing more than 0.1 kWh, largest loss first."""
+        if CLIENT_SIDE_SEARCH:
             return []
-        issues = []
-        for i, controller in enumerate(self.tracker_y_controllers):
-            for j, motor in enumerate(self.tracker_x_motors):
-                lost_val = self.tracker_z_lost[i][j]
-                if lost_val > 0.1:
-                    dc_val = self.tracker_z_dc[i][j]
-                    issues.append(
-                        {
-                            "motor": motor,
-                            "controller": controller,
-                            "dc_capacity": round(float(dc_val), 1),
-                            "lost_energy": round(float(lost_val), 1),
-                        }
-                    )
-        if self.tracker_modal_search:
-            q = self.tracker_modal_search.lower()
-            issues = [
-                i
-                for i in issues
-                if q in str(i["motor"]).lower() or q in str(i["controller"]).lower()
-            ]
-        return sorted(issues, key=lambda x: x["lost_energy"], reverse=True)
-
-    @rx.var
-    def tracker_most_problematic_controller(self) -> str:
-        """Find the controller name with the highest total lost energy."""
-        if not self.tracker_z_lost or not self.tracker_y_controllers:
-            return "N/A"
-        max_loss = -1.0
-        best_idx = 0
-        for i, row in enumerate(self.tracker_z_lost):
-            row_sum = sum(row)
-            if row_sum > max_loss:
-                max_loss = row_sum
-                best_idx = i
-        if best_idx < len(self.tracker_y_controllers):
-            return self.tracker_y_controllers[best_idx]
-        return "N/A"
-
-    @rx.var
-    def tracker_heatmap_fig(self) -> go.Figure:
-        custom_data = []
-        for i in range(len(self.tracker_z_lost)):
-            row = []
-            for j in range(len(self.tracker_z_lost[i])):
-                lost_val = self.tracker_z_lost[i][j]
-                cost_val = lost_val * 40.0
-                cap_val = self.tracker_z_dc[i][j]
-                row.append([lost_val, cost_val, cap_val])
-            custom_data.append(row)
-        fig = go.Figure(
-            data=go.Heatmap(
-                z=self.tracker_z_lost,
-                x=self.tracker_x_motors,
-                y=self.tracker_y_controllers,
-                customdata=custom_data,
-                colorscale="RdYlGn_r",
-                colorbar=dict(
-                    title=dict(text="Lost Energy (MWh)", font=dict(color="#9ca3af")),
-                    tickfont=dict(color="#9ca3af"),
-                ),
-                hovertemplate="<b>Controller:</b> %{y}<br>"
-                + "<b>Motor:</b> %{x}<br>"
-                + "<b>Lost Energy:</b> %{z:,.1f} MWh<br>"
-                + "<b>DC Capacity:</b> %{customdata[2]:,.1f} kW<br>"
-                + "<b>Cost Impact:</b> $%{customdata[1]:,.1f}<extra></extra>",
+        grid = site_store.grid(self._tracker_grid_ref)
+        selected = _selected_issues(grid, self.tracker_modal_search, 0.1)
+        selected = selected[: self.issue_limit]
+        if not selected.size:
+            return []
+        issues = grid.issues
+        return [
+            {
+                "motor": grid.cols[j],
+                "controller": grid.rows[i],
+                "dc_capacity": capacity,
+                "lost_energy": lost,
+            }
+            for i, j, capacity, lost in zip(
+                issues.rows[selected].tolist(),
+                issues.cols[selected].tolist(),
+                issues.capacity_display[selected].tolist(),
+                issues.lost_display[selected].tolist(),
             )
+        ]
+
+    @computed_var("_tracker_grid_ref")
+    def tracker_issue_columns(self) -> IssueColumns:
+        return _issue_columns(site_store.grid(self._tracker_grid_ref), 0.1)
+
+    @computed_var("_tracker_grid_ref", "tracker_window")
+    def tracker_heatmap_fig(self) -> go.Figure:
+        return tracker_heatmap_figure(
+            site_store.grid(self._tracker_grid_ref), tuple(self.tracker_window) or None
         )
-        fig.update_layout(
-            title=None,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#9ca3af", size=10, family="Inter"),
-            margin=dict(l=10, r=40, t=20, b=10),
-            xaxis=dict(
-                showgrid=False,
-                zeroline=False,
-                showticklabels=False,
-                title=dict(text="MOTORS", font=dict(size=10)),
-            ),
-            yaxis=dict(
-                showgrid=False,
-                zeroline=False,
-                autorange="reversed",
-                title=dict(text="CONTROLLERS", font=dict(size=10)),
-            ),
-            height=600,
+
+    @computed_var("_tracker_grid_ref")
+    def tracker_heatmap_tiled(self) -> bool:
+        """Whether the whole tracker grid is too large to draw cell by cell."""
+        grid = site_store.grid(self._tracker_grid_ref)
+        return grid is not None and not grid.tiles().full_resolution
+
+    @computed_var("_cb_grid_ref", "cb_modal_search")
+    def cb_issue_count(self) -> int:
+        return len(
+            _selected_issues(site_store.grid(self._cb_grid_ref), self.cb_modal_search)
         )
-        return fig
-
-    @rx.var
-    def cb_combiner_boxes_with_issues(self) -> int:
-        """Count total instances of CB-Inverter combinations with issues (lost energy > 0)."""
-        if not self.cb_z_lost:
-            return 0
-        total_issues = 0
-        for row in self.cb_z_lost:
-            for val in row:
-                if val > 0:
-                    total_issues += 1
-        return total_issues
-
-    @rx.var
-    def cb_total_lost_energy(self) -> float:
-        """Sum of all lost energy values in cb_z_lost (already in MWh)."""
-        total = 0.0
-        for row in self.cb_z_lost:
-            total += sum(row)
-        return total
-
-    @rx.var
-    def cb_total_lost_revenue(self) -> float:
-        """Total Lost Revenue for Combiner Boxes: Lost Energy MWh * $40/MWh."""
-        return self.cb_total_lost_energy * 40.0
-
-    @rx.var
-    def cb_most_problematic_box(self) -> str:
-        """Find the CB name with the highest total lost energy."""
-        if not self.cb_z_lost or not self.cb_x_combiner_boxes:
-            return "N/A"
-        num_rows = len(self.cb_z_lost)
-        if num_rows == 0:
-            return "N/A"
-        num_cols = len(self.cb_z_lost[0])
-        max_loss = -1.0
-        best_col_idx = 0
-        for j in range(num_cols):
-            col_sum = 0.0
-            for i in range(num_rows):
-                if j < len(self.cb_z_lost[i]):
-                    col_sum += self.cb_z_lost[i][j]
-            if col_sum > max_loss:
-                max_loss = col_sum
-                best_col_idx = j
-        if best_col_idx < len(self.cb_x_combiner_boxes):
-            return self.cb_x_combiner_boxes[best_col_idx]
-        return "N/A"
-
-    @rx.var
+
+    @computed_var("_cb_grid_ref", "cb_modal_search", "issue_limit")
     def cb_issues_list(self) -> list[dict[str, str | float]]:
-        """Extract list of inverters with issues > 0 kWh lost energy."""
-        if (
-            not self.cb_z_lost
-            or not self.cb_x_combiner_boxes
-            or (not self.cb_y_inverters)
-        ):
+        """The top combiner boxes losing energy, largest loss first."""
+        if CLIENT_SIDE_SEARCH:
             return []
-        issues = []
-        for i, inv in enumerate(self.cb_y_inverters):
-            for j, cb in enumerate(self.cb_x_combiner_boxes):
-                lost_val = self.cb_z_lost[i][j]
-                if lost_val > 0:
-                    cap_val = self.cb_z_capacity[i][j]
-                    issues.append(
-                        {
-                            "inverter": inv,
-                            "cb": cb,
-                            "capacity": round(float(cap_val), 1),
-                            "lost_energy": round(float(lost_val), 1),
-                        }
-                    )
-        if self.cb_modal_search:
-            q = self.cb_modal_search.lower()
-            issues = [
-                i
-                for i in issues
-                if q in str(i["inverter"]).lower() or q in str(i["cb"]).lower()
-            ]
-        return sorted(issues, key=lambda x: x["lost_energy"], reverse=True)
-
-    @rx.var
-    def inv_inverters_with_issues(self) -> int:
-        if not self.inv_z_lost_energy:
-            return 0
-        return sum((1 for row in self.inv_z_lost_energy for val in row if val > 0))
-
-    @rx.var
-    def inv_total_lost_energy(self) -> float:
-        if not self.inv_z_lost_energy:
-            return 0.0
-        return sum((sum(row) for row in self.inv_z_lost_energy))
-
-    @rx.var
-    def inv_total_lost_revenue(self) -> float:
-        return self.inv_total_lost_energy * 40.0
-
-    @rx.var
-    def inv_most_problematic_block(self) -> str:
-        """Returns the name of the inverter with the highest loss."""
-        if not self.inv_z_lost_energy or not self.inv_inverter_names:
-            return "N/A"
-        max_loss = -1.0
-        best_inv = "N/A"
-        for i, row in enumerate(self.inv_z_lost_energy):
-            for j, val in enumerate(row):
-                if val > max_loss:
-                    max_loss = val
-                    best_inv = self.inv_inverter_names[i][j]
-        return best_inv
-
-    @rx.var
-    def inv_issues_list(self) -> list[dict[str, str | float]]:
-        if not self.inv_z_lost_energy:
+        grid = site_store.grid(self._cb_grid_ref)
+        selected = _selected_issues(grid, self.cb_modal_search)[: self.issue_limit]
+        if not selected.size:
             return []
-        issues = []
-        for i, block in enumerate(self.inv_y_blocks):
-            for j, pos in enumerate(self.inv_x_positions):
-                lost_val = self.inv_z_lost_energy[i][j]
-                if lost_val > 0:
-                    issues.append(
-                        {
-                            "inverter": f"{block} P{pos}",
-                            "block": block,
-                            "capacity": round(float(self.inv_z_dc_capacity[i][j]), 1),
-                            "lost_energy": round(float(lost_val), 1),
-                        }
-                    )
-        if self.inv_modal_search:
-            q = self.inv_modal_search.lower()
-            issues = [i for i in issues if q in i["inverter"].lower()]
-        return sorted(issues, key=lambda x: x["lost_energy"], reverse=True)
+        issues = grid.issues
+        return [
+            {
+                "inverter": grid.rows[i],
+                "cb": grid.cols[j],
+                "capacity": capacity,
+                "lost_energy": lost,
+            }
+            for i, j, capacity, lost in zip(
+                issues.rows[selected].tolist(),
+                issues.cols[selected].tolist(),
+                issues.capacity_display[selected].tolist(),
+                issues.lost_display[selected].tolist(),
+            )
+        ]
 
-    @rx.var
-    def inv_heatmap_fig(self) -> go.Figure:
-        if not self.inv_z_lost_energy:
-            return go.Figure()
-        custom_data = []
-        for i in range(len(self.inv_z_lost_energy)):
-            row = []
-            for j in range(len(self.inv_z_lost_energy[i])):
-                name = self.inv_inverter_names[i][j]
-                lost = self.inv_z_lost_energy[i][j]
-                off = self.inv_z_offline_lost[i][j]
-                mod = self.inv_z_module_lost[i][j]
-                cap = self.inv_z_dc_capacity[i][j]
-                row.append([name, lost, off, mod, cap, lost * 40.0])
-            custom_data.append(row)
-        fig = go.Figure(
-            data=go.Heatmap(
-                z=self.inv_z_lost_energy,
-                x=self.inv_x_positions,
-                y=self.inv_y_blocks,
-                customdata=custom_data,
-                colorscale="RdYlGn_r",
-                colorbar=dict(
-                    title=dict(text="Lost Energy (MWh)", font=dict(color="#9ca3af")),
-                    tickfont=dict(color="#9ca3af"),
-                    thickness=15,
-                ),
-                hovertemplate="<b>Inverter ID:</b> %{customdata[0]}<br>"
-                + "<b>Combined Lost Energy:</b> %{customdata[1]:,.1f} MWh<br>"
-                + "<b>Offline Lost Energy:</b> %{customdata[2]:,.1f} MWh<br>"
-                + "<b>Module Lost Energy:</b> %{customdata[3]:,.1f} MWh<br>"
-                + "<b>DC Capacity:</b> %{customdata[4]:,.1f} kW<br>"
-                + "<b>Revenue Impact:</b> $%{customdata[5]:,.1f}<extra></extra>",
-                showscale=True,
+    @computed_var("_cb_grid_ref")
+    def cb_issue_columns(self) -> IssueColumns:
+        return _issue_columns(site_store.grid(self._cb_grid_ref))
+
+    @computed_var("_inv_grid_ref", "inv_modal_search")
+    def inv_issue_count(self) -> int:
+        return len(
+            _selected_issues(
+                site_store.grid(self._inv_grid_ref),
+                self.inv_modal_search,
+                search=_inverter_name_mask,
             )
         )
-        fig.update_layout(
-            title=None,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#9ca3af", size=10, family="Inter"),
-            margin=dict(l=5, r=5, t=5, b=5),
-            xaxis=dict(
-                showgrid=False, zeroline=False, showticklabels=False, title=None
-            ),
-            yaxis=dict(
-                showgrid=False,
-                zeroline=False,
-                autorange="reversed",
-                showticklabels=False,
-                title=None,
-            ),
-            height=250,
-            dragmode=False,
-        )
-        return fig
 
-    @rx.var
-    def cb_heatmap_fig(self) -> go.Figure:
-        custom_data = []
-        for i in range(len(self.cb_z_lost)):
-            row = []
-            for j in range(len(self.cb_z_lost[i])):
-                desc = (
-                    self.cb_z_classifications[i][j]
-                    if i < len(self.cb_z_classifications)
-                    and j < len(self.cb_z_classifications[i])
-                    else "N/A"
-                )
-                lost_val = self.cb_z_lost[i][j]
-                cost_val = lost_val * 40.0
-                cap_val = self.cb_z_capacity[i][j]
-                row.append([desc, cost_val, cap_val])
-            custom_data.append(row)
-        fig = go.Figure(
-            data=go.Heatmap(
-                z=self.cb_z_lost,
-                x=self.cb_x_combiner_boxes,
-                y=self.cb_y_inverters,
-                customdata=custom_data,
-                colorscale="RdYlGn_r",
-                colorbar=dict(
-                    title=dict(text="Lost Energy (MWh)", font=dict(color="#9ca3af")),
-                    tickfont=dict(color="#9ca3af"),
-                ),
-                hovertemplate="<b>Inverter:</b> %{y}<br>"
-                + "<b>Combiner Box:</b> %{x}<br>"
-                + "<b>Lost Energy:</b> %{z:,.1f} MWh<br>"
-                + "<b>DC Capacity:</b> %{customdata[2]:,.1f} kW<br>"
-                + "<b>Cost Impact:</b> $%{customdata[1]:,.1f}<br>"
-                + "<b>Description:</b> %{customdata[0]}<extra></extra>",
+    @computed_var("_inv_grid_ref", "inv_modal_search", "issue_limit")
+    def inv_issues_list(self) -> list[dict[str, str | float]]:
+        """The top inverters losing energy, largest loss first."""
+        if CLIENT_SIDE_SEARCH:
+            return []
+        grid = site_store.grid(self._inv_grid_ref)
+        selected = _selected_issues(
+            grid, self.inv_modal_search, search=_inverter_name_mask
+        )[: self.issue_limit]
+        if not selected.size:
+            return []
+        issues = grid.issues
+        return [
+            {
+                "inverter": f"{grid.rows[i]} P{grid.cols[j]}",
+                "block": grid.rows[i],
+                "capacity": capacity,
+                "lost_energy": lost,
+            }
+            for i, j, capacity, lost in zip(
+                issues.rows[selected].tolist(),
+                issues.cols[selected].tolist(),
+                issues.capacity_display[selected].tolist(),
+                issues.lost_display[selected].tolist(),
             )
-        )
-        fig.update_layout(
-            title=None,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#9ca3af", size=10, family="Inter"),
-            margin=dict(l=10, r=40, t=20, b=10),
-            xaxis=dict(
-                showgrid=False,
-                zeroline=False,
-                showticklabels=True,
-                title=dict(text="COMBINER BOXES", font=dict(size=10)),
-            ),
-            yaxis=dict(
-                showgrid=False,
-                zeroline=False,
-                autorange="reversed",
-                title=dict(text="INVERTERS", font=dict(size=10)),
-            ),
-            height=600,
-        )
-        return fig
\ No newline at end of file
+        ]
+
+    @computed_var("_inv_grid_ref")
+    def inv_issue_columns(self) -> IssueColumns:
+        return _issue_columns(site_store.grid(self._inv_grid_ref))
+
+    @computed_var("_inv_grid_ref")
+    def inv_heatmap_fig(self) -> go.Figure:
+        return inv_heatmap_figure(site_store.grid(self._inv_grid_ref))
+
+    @computed_var("_cb_grid_ref")
+    def cb_heatmap_fig(self) -> go.Figure:
+        return cb_heatmap_figure(site_store.grid(self._cb_grid_ref))
\ No newline at end of file
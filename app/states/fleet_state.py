@@ -1,8 +1,15 @@
 import reflex as rx
+import logging
 import urllib.parse
-from typing import TypedDict
-import httpx
+from typing import Any, Mapping, TypedDict
 from app.weather_utils import get_weather_info
+from app.weather_service import weather_service
+from app.data.fleet import fleet_snapshot, fleet_view, summarize_sites
+from app.data.pool import run_blocking
+from app.data.search_index import cached_index
+from app.data.site_registry import site_registry
+from app.data.site_watcher import FLEET, sessions
+from app.instrumentation import computed_var
 
 
 class SiteData(TypedDict):
@@ -16,6 +23,9 @@ class SiteData(TypedDict):
     performance: float
     measured_energy: float
     modeled_energy: float
+    temperature: str
+    weather_icon: str
+    weather_condition: str
 
 
 class DistributionData(TypedDict):
@@ -30,10 +40,45 @@ class LossData(TypedDict):
     fill: str
 
 
+PAGE_SIZE = 25
+SORT_KEYS = {
+    "name": str.lower,
+    "availability": float,
+    "performance": float,
+    "measured_energy": float,
+    "modeled_energy": float,
+}
+
+
+def _current_weather(data: Mapping[str, Any]) -> dict[str, str]:
+    current = data.get("current", {})
+    icon, condition = get_weather_info(
+        current.get("weather_code", 0), current.get("is_day", 1)
+    )
+    return {
+        "temperature": f"{round(current.get('temperature_2m', 0))}°C",
+        "weather_icon": icon,
+        "weather_condition": condition,
+    }
+
+
+FLEET_FIELDS = (
+    "failed_sites",
+    "total_sites",
+    "avg_availability",
+    "avg_performance",
+    "total_measured_energy",
+    "total_lost_energy",
+    "site_distribution",
+    "loss_breakdown",
+)
+
+
 class FleetState(rx.State):
     """State for the Fleet Overview page."""
 
-    sites: list[SiteData] = []
+    page: int = 0
+    failed_sites: list[str] = []
     search_query: str = ""
     sort_field: str = "name"
     sort_reverse: bool = False
@@ -50,65 +95,74 @@ class FleetState(rx.State):
     current_humidity: str = "--%"
     current_wind: str = "-- km/h"
     weather_icon: str = "cloud"
+    site_distribution: list[DistributionData] = [
+        {"name": "CRITICAL", "value": 0, "fill": "#ef4444"},
+        {"name": "WARNING", "value": 0, "fill": "#f59e0b"},
+        {"name": "HEALTHY", "value": 1, "fill": "#10b981"},
+    ]
+    loss_breakdown: list[LossData] = [
+        {"name": "DERATED", "value": 3.2, "fill": "#f59e0b"},
+        {"name": "PLANT OFFLINE", "value": 32.3, "fill": "#ef4444"},
+        {"name": "INVERTERS OFFLINE", "value": 64.5, "fill": "#f97316"},
+        {"name": "UNDERPERFORMING", "value": 0.0, "fill": "#8b5cf6"},
+    ]
+    _fleet_loading: bool = False
+    _sites: list[SiteData] = []
+    _sort_index: dict[str, list[int]] = {}
+    _search_mask: list[bool] = []
+    _coordinates: dict[str, list[float]] = {}
+    _site_weather: dict[str, dict[str, str]] = {}
 
     @rx.event(background=True)
     async def load_weather_data(self):
-        """Fetch weather data for San Diego, CA from Open-Meteo."""
+        """Fetch current conditions for San Diego, CA and every site at once.
+
+        All locations go to Open-Meteo in one batched request; the results are
+        cached, so site pages opened afterwards get their weather instantly.
+        """
         try:
             lat = 32.7157
             lon = -117.1611
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.open-meteo.com/v1/forecast",
-                    params={
-                        "latitude": lat,
-                        "longitude": lon,
-                        "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m,is_day",
-                        "temperature_unit": "celsius",
-                        "wind_speed_unit": "kmh",
-                    },
-                    timeout=10.0,
-                )
-                if response.status_code == 200:
-                    data = response.json()
+            async with self:
+                coordinates = dict(self._coordinates)
+            results = await weather_service.forecast_many(
+                [(lat, lon), *coordinates.values()]
+            )
+            data = results[0]
+            site_weather = {
+                site_id: _current_weather(result)
+                for site_id, result in zip(coordinates, results[1:])
+                if result is not None
+            }
+            async with self:
+                if data is not None:
                     current = data.get("current", {})
-                    temp = round(current.get("temperature_2m", 0))
                     humidity = current.get("relative_humidity_2m", 0)
                     wind = current.get("wind_speed_10m", 0)
-                    code = current.get("weather_code", 0)
-                    is_day = current.get("is_day", 1)
-                    icon, desc = get_weather_info(code, is_day)
-                    async with self:
-                        self.current_temp = f"{temp}°C"
-                        self.current_humidity = f"{humidity}%"
-                        self.current_wind = f"{wind} km/h"
-                        self.current_condition = desc
-                        self.weather_icon = icon
+                    weather = _current_weather(data)
+                    self.current_temp = weather["temperature"]
+                    self.current_humidity = f"{humidity}%"
+                    self.current_wind = f"{wind} km/h"
+                    self.current_condition = weather["weather_condition"]
+                    self.weather_icon = weather["weather_icon"]
+                self._site_weather = site_weather
+                self._merge_site_weather()
         except Exception as e:
-            import logging
-
             logging.exception(f"Error fetching weather data: {e}")
 
-    @rx.var
-    def site_distribution(self) -> list[DistributionData]:
-        return [
-            {"name": "CRITICAL", "value": 0, "fill": "#ef4444"},
-            {"name": "WARNING", "value": 0, "fill": "#f59e0b"},
-            {"name": "HEALTHY", "value": 1, "fill": "#10b981"},
-        ]
-
-    @rx.var
-    def loss_breakdown(self) -> list[LossData]:
-        return [
-            {"name": "DERATED", "value": 3.2, "fill": "#f59e0b"},
-            {"name": "PLANT OFFLINE", "value": 32.3, "fill": "#ef4444"},
-            {"name": "INVERTERS OFFLINE", "value": 64.5, "fill": "#f97316"},
-            {"name": "UNDERPERFORMING", "value": 0.0, "fill": "#8b5cf6"},
-        ]
-
     @rx.event
     def set_search(self, val: str):
         self.search_query = val
+        self.page = 0
+        self._update_search_mask()
+
+    def _update_search_mask(self):
+        q = self.search_query.strip()
+        if not q:
+            self._search_mask = []
+            return
+        index = cached_index(tuple((s["name"], s["location"]) for s in self._sites))
+        self._search_mask = index.mask(q).tolist()
 
     @rx.event
     def toggle_sort(self, field: str):
@@ -117,81 +171,132 @@ class FleetState(rx.State):
         else:
             self.sort_field = field
             self.sort_reverse = False
-
-    @rx.var
-    def filtered_sites(self) -> list[SiteData]:
-        data = self.sites
-        if self.search_query:
-            q = self.search_query.lower()
-            data = [
-                s for s in data if q in s["name"].lower() or q in s["location"].lower()
-            ]
-        return sorted(
-            data, key=lambda x: x.get(self.sort_field, ""), reverse=self.sort_reverse
-        )
+        self.page = 0
 
     @rx.event
-    def load_fleet_data(self):
-        """Load fleet data focusing only on Airport Solar."""
-        if len(self.sites) > 0:
-            return
-        import pandas as pd
-        import logging
-
-        airport_solar_data = {
-            "name": "Airport Solar",
-            "location": "OREGON",
-            "ac_capacity": "48.60 MW AC",
-            "availability": 98.5,
-            "performance": 85.4,
-            "measured_energy": 83.3,
-            "modeled_energy": 97.5,
+    def set_page(self, page: int):
+        self.page = max(0, min(page, self.page_count - 1))
+
+    @computed_var("search_query", "_search_mask", "_sites")
+    def filtered_count(self) -> int:
+        if self.search_query.strip():
+            return sum(self._search_mask)
+        return len(self._sites)
+
+    @computed_var("filtered_count")
+    def page_count(self) -> int:
+        return max(1, -(-self.filtered_count // PAGE_SIZE))
+
+    @computed_var(
+        "_sites",
+        "_sort_index",
+        "_search_mask",
+        "search_query",
+        "sort_field",
+        "sort_reverse",
+        "page",
+    )
+    def visible_sites(self) -> list[SiteData]:
+        """The current page of the search results, in the selected order.
+
+        Walks the presorted index of the sort column (backwards for a
+        descending sort) and stops once the page is full, so neither sorting
+        nor paging copies or re-sorts the site list.
+        """
+        order = self._sort_index.get(self.sort_field) or range(len(self._sites))
+        if self.sort_reverse:
+            order = reversed(order)
+        mask = self._search_mask if self.search_query.strip() else None
+        skip = self.page * PAGE_SIZE
+        page: list[SiteData] = []
+        for i in order:
+            if mask is not None and not mask[i]:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            page.append(self._sites[i])
+            if len(page) == PAGE_SIZE:
+                break
+        return page
+
+    def _set_sites(self, sites: list[SiteData]):
+        """Replace the site rows and rebuild the sort and search indexes."""
+        self._sites = sites
+        self._sort_index = {
+            field: sorted(range(len(sites)), key=lambda i: key(sites[i][field]))
+            for field, key in SORT_KEYS.items()
         }
+        self._update_search_mask()
+        self.page = min(self.page, max(0, len(sites) - 1) // PAGE_SIZE)
+
+    def _apply_view(self, view: Mapping[str, Any]):
+        for name in FLEET_FIELDS:
+            setattr(self, name, view[name])
+        self._coordinates = view["coordinates"]
+        self._set_sites(view["sites"])
+        self._merge_site_weather()
+
+    def _merge_site_weather(self):
+        if self._site_weather:
+            self._sites = [
+                {**site, **self._site_weather.get(urllib.parse.unquote(site["id"]), {})}
+                for site in self._sites
+            ]
+
+    @rx.event(background=True)
+    async def load_fleet_data(self):
+        """Fill the fleet page from the precomputed fleet snapshot.
+
+        The snapshot is rebuilt (summarizing every site in parallel) only when
+        a site's workbooks have changed. Repeated triggers while a load is in
+        flight are ignored.
+        """
+        async with self:
+            sessions.view(self.router.session.client_token, FLEET)
+            if self._sites or self._fleet_loading:
+                return
+            self._fleet_loading = True
         try:
-            epc_df = pd.read_excel(
-                "assets/EPC Input File - Airport Solar.xlsx", sheet_name="Site Details"
-            )
-            plant_ac = epc_df[epc_df["Description"] == "Plant AC Capacity (kW)"][
-                "Value"
-            ].iloc[0]
-            airport_solar_data["ac_capacity"] = f"{float(plant_ac) / 1000:.2f} MW AC"
-            master_file = "assets/master_report.xlsx"
-            metrics_df = pd.read_excel(master_file, sheet_name="Site Metrics")
-            if not metrics_df.empty:
-                if "DateTime" in metrics_df.columns:
-                    dates = pd.to_datetime(metrics_df["DateTime"])
-                    self.start_date = dates.min().strftime("%Y-%m-%d")
-                    self.end_date = dates.max().strftime("%Y-%m-%d")
-                airport_solar_data["performance"] = round(
-                    metrics_df["Performance"].mean(), 1
-                )
-                airport_solar_data["measured_energy"] = round(
-                    metrics_df["Measured Energy"].sum(), 1
-                )
-                airport_solar_data["modeled_energy"] = round(
-                    metrics_df["Expected Energy"].sum() / 0.98, 1
-                )
+            snapshot = await run_blocking(fleet_snapshot)
         except Exception as e:
-            logging.exception(f"Error loading real fleet data: {e}")
-        self.sites = [
-            {
-                "id": urllib.parse.quote("Airport Solar"),
-                "name": "Airport Solar",
-                "location": airport_solar_data["location"],
-                "status": "HEALTHY",
-                "status_color": "text-green-400",
-                "ac_capacity": airport_solar_data["ac_capacity"],
-                "availability": airport_solar_data["availability"],
-                "performance": airport_solar_data["performance"],
-                "measured_energy": airport_solar_data["measured_energy"],
-                "modeled_energy": airport_solar_data["modeled_energy"],
-            }
-        ]
-        self.total_sites = 1
-        self.avg_availability = 98.5
-        self.avg_performance = airport_solar_data["performance"]
-        self.total_measured_energy = airport_solar_data["measured_energy"]
-        self.total_lost_energy = (
-            airport_solar_data["modeled_energy"] - airport_solar_data["measured_energy"]
-        )
-        return FleetState.load_weather_data
\ No newline at end of file
+            logging.exception(f"Error loading fleet snapshot: {e}")
+            async with self:
+                self._fleet_loading = False
+            return
+        async with self:
+            self._fleet_loading = False
+            if snapshot["start_date"]:
+                self.start_date = snapshot["start_date"]
+                self.end_date = snapshot["end_date"]
+            self._apply_view(snapshot)
+        return FleetState.load_weather_data
+
+    @rx.event(background=True)
+    async def apply_date_range(self):
+        """Recompute every site's KPIs for the selected dates.
+
+        Sites are windowed from their resident KPI prefix sums; only sites
+        not yet read in this process (or whose workbooks changed) go to the
+        process pool.
+        """
+        async with self:
+            if not self._sites:
+                return
+            start, end = self.start_date, self.end_date
+        sites = site_registry.sites()
+        summaries, failures = await run_blocking(summarize_sites, sites, start, end)
+        async with self:
+            if (self.start_date, self.end_date) != (start, end):
+                return
+            self._apply_view(fleet_view(sites, summaries, failures))
+
+    @rx.event
+    def set_start_date(self, value: str):
+        self.start_date = value
+        return FleetState.apply_date_range
+
+    @rx.event
+    def set_end_date(self, value: str):
+        self.end_date = value
+        return FleetState.apply_date_range
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Push reloaded site data to the sessions that are viewing it."""
+
+import asyncio
+import logging
+
+import reflex as rx
+from reflex.istate.manager.token import BaseStateToken
+
+from app.data.fleet import fleet_snapshot, fleet_view, summarize_sites
+from app.data.pool import run_blocking
+from app.data.site_registry import site_registry
+from app.data.site_watcher import FLEET, WATCH_INTERVAL, sessions, site_watcher
+from app.states.dashboard_state import DashboardState
+from app.states.fleet_state import FleetState
+
+
+def _connected(app: rx.App, topic: str) -> list[str]:
+    """Tokens of the connected sessions viewing ``topic``."""
+    connected = app.event_namespace.token_to_sid if app.event_namespace else {}
+    tokens = []
+    for token in sessions.viewers(topic):
+        if token in connected:
+            tokens.append(token)
+        else:
+            sessions.forget(token)
+    return tokens
+
+
+def _forget_disconnected(app: rx.App):
+    """Forget the sessions whose client has disconnected or expired, so the
+    sites they held can be evicted."""
+    if app.event_namespace is None:
+        return
+    connected = app.event_namespace.token_to_sid
+    for token in sessions.tokens():
+        if token not in connected:
+            sessions.forget(token)
+
+
+async def _push_site(app: rx.App, site_id: str):
+    for token in _connected(app, site_id):
+        async with app.modify_state(
+            BaseStateToken(ident=token, cls=DashboardState)
+        ) as root:
+            state = await root.get_state(DashboardState)
+            state._refresh_site_data(site_id)
+
+
+async def _push_fleet(app: rx.App):
+    snapshot = await run_blocking(fleet_snapshot)
+    views = {(snapshot["start_date"], snapshot["end_date"]): snapshot}
+    for token in _connected(app, FLEET):
+        async with app.modify_state(
+            BaseStateToken(ident=token, cls=FleetState)
+        ) as root:
+            state = await root.get_state(FleetState)
+            if not state._sites:
+                continue
+            window = (state.start_date, state.end_date)
+            if window not in views:
+                sites = site_registry.sites()
+                summaries, failures = await run_blocking(
+                    summarize_sites, sites, *window
+                )
+                views[window] = fleet_view(sites, summaries, failures)
+            state._apply_view(views[window])
+
+
+async def watch_site_files(app: rx.App):
+    """Lifespan task: reload changed sites and refresh their viewers.
+
+    Each change is loaded once by the watcher; every session then only
+    applies the new data, and sessions sharing a fleet date range share one
+    recomputed fleet view. Every poll also forgets disconnected sessions.
+    """
+    await run_blocking(site_watcher.poll)
+    while True:
+        await asyncio.sleep(WATCH_INTERVAL)
+        try:
+            _forget_disconnected(app)
+            changed = await run_blocking(site_watcher.poll)
+            for site in changed:
+                await _push_site(app, site.id)
+            if changed:
+                await _push_fleet(app)
+        except Exception as e:
+            logging.exception(f"Error pushing reloaded site data: {e}")
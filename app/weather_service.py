@@ -0,0 +1,209 @@
+"""Process-wide Open-Meteo client shared by every session.
+
+Forecasts are cached per location (latitude/longitude rounded to 0.01°,
+about 1 km) for ``PEAK_WEATHER_TTL`` seconds. Concurrent requests for the
+same location share one HTTP call. Once a forecast is older than the TTL it
+is still served immediately while a single background refresh fetches a new
+one, until it is older than ``PEAK_WEATHER_MAX_STALE`` seconds. All calls go
+through one pooled ``httpx.AsyncClient``, closed by the ``close_weather_client``
+lifespan task when the app stops; the API base URL can be pointed at a local
+stub with ``PEAK_WEATHER_URL``.
+
+``forecast_many`` fetches many locations at once using Open-Meteo's
+comma-separated coordinate lists, falling back to individual requests (at
+most ``PEAK_WEATHER_CONCURRENCY`` at a time) if a batch fails. Batched
+results land in the same cache as single lookups.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from typing import Any
+
+import httpx
+
+WEATHER_URL = os.environ.get(
+    "PEAK_WEATHER_URL", "https://api.open-meteo.com/v1/forecast"
+)
+WEATHER_TTL = float(os.environ.get("PEAK_WEATHER_TTL", "600"))
+WEATHER_MAX_STALE = float(os.environ.get("PEAK_WEATHER_MAX_STALE", "21600"))
+WEATHER_CONCURRENCY = int(os.environ.get("PEAK_WEATHER_CONCURRENCY", "4"))
+BATCH_SIZE = 50
+
+logger = logging.getLogger(__name__)
+
+FORECAST_PARAMS = {
+    "current": "temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m,is_day",
+    "daily": "weather_code,temperature_2m_max,temperature_2m_min",
+    "timezone": "auto",
+    "forecast_days": 7,
+    "temperature_unit": "celsius",
+    "wind_speed_unit": "kmh",
+}
+
+
+class WeatherService:
+    """Cached, coalesced access to the Open-Meteo forecast endpoint."""
+
+    def __init__(
+        self,
+        url: str = WEATHER_URL,
+        ttl: float = WEATHER_TTL,
+        max_stale: float = WEATHER_MAX_STALE,
+        timeout: float = 5.0,
+        concurrency: int = WEATHER_CONCURRENCY,
+    ):
+        self.url = url
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._client: httpx.AsyncClient | None = None
+        self._cache: dict[tuple[float, float], tuple[float, dict[str, Any]]] = {}
+        self._inflight: dict[tuple[float, float], asyncio.Task] = {}
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def _fetch(self, key: tuple[float, float]) -> dict[str, Any] | None:
+        lat, lon = key
+        try:
+            response = await self._http().get(
+                self.url, params={"latitude": lat, "longitude": lon, **FORECAST_PARAMS}
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            logger.warning(f"Weather fetch failed for {lat},{lon}: {e}")
+            return None
+        self._cache[key] = (time.monotonic(), data)
+        return data
+
+    def _refresh(self, key: tuple[float, float]) -> asyncio.Task:
+        """The in-flight fetch for ``key``, starting one if there is none."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def forecast(self, lat: float, lon: float) -> dict[str, Any] | None:
+        """Open-Meteo forecast for a location, or None if none is available."""
+        key = (round(float(lat), 2), round(float(lon), 2))
+        cached = self._cache.get(key)
+        if cached is not None:
+            fetched_at, data = cached
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                return data
+            if age < self.max_stale:
+                self._refresh(key)
+                return data
+        data = await asyncio.shield(self._refresh(key))
+        if data is None and cached is not None:
+            return cached[1]
+        return data
+
+    async def _fetch_batch(self, keys: list[tuple[float, float]]) -> bool:
+        """Fetch several locations in one request; False if the batch failed."""
+        try:
+            response = await self._http().get(
+                self.url,
+                params={
+                    "latitude": ",".join(str(lat) for lat, _ in keys),
+                    "longitude": ",".join(str(lon) for _, lon in keys),
+                    **FORECAST_PARAMS,
+                },
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            logger.warning(
+                f"Batched weather fetch of {len(keys)} locations failed: {e}"
+            )
+            return False
+        results = data if isinstance(data, list) else [data]
+        if len(results) != len(keys):
+            logger.warning(
+                f"Batched weather fetch returned {len(results)} of {len(keys)} locations"
+            )
+            return False
+        now = time.monotonic()
+        for key, result in zip(keys, results):
+            self._cache[key] = (now, result)
+        return True
+
+    async def _from_batch(
+        self,
+        batch: asyncio.Task,
+        key: tuple[float, float],
+        semaphore: asyncio.Semaphore,
+    ) -> dict[str, Any] | None:
+        """One location's result of a batch, fetched alone if the batch failed."""
+        if await batch:
+            return self._cache[key][1]
+        async with semaphore:
+            return await self._fetch(key)
+
+    def _refresh_many(self, keys: list[tuple[float, float]]):
+        """Start batched fetches for the locations without one in flight."""
+        keys = [key for key in dict.fromkeys(keys) if key not in self._inflight]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        for i in range(0, len(keys), BATCH_SIZE):
+            chunk = keys[i : i + BATCH_SIZE]
+            if len(chunk) == 1:
+                self._refresh(chunk[0])
+                continue
+            batch = asyncio.ensure_future(self._fetch_batch(chunk))
+            for key in chunk:
+                task = asyncio.ensure_future(self._from_batch(batch, key, semaphore))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+
+    async def forecast_many(
+        self, coordinates: list[tuple[float, float]]
+    ) -> list[dict[str, Any] | None]:
+        """Forecasts for many locations, in the order given.
+
+        Locations that are not fresh in the cache are fetched in batches of
+        up to ``BATCH_SIZE`` per request. Each location of a failed batch is
+        then fetched on its own, with at most ``concurrency`` requests in
+        flight. Stale-while-revalidate applies as for ``forecast``.
+        """
+        keys = [
+            (round(float(lat), 2), round(float(lon), 2)) for lat, lon in coordinates
+        ]
+        now = time.monotonic()
+        self._refresh_many(
+            [
+                key
+                for key in keys
+                if key not in self._cache or now - self._cache[key][0] >= self.ttl
+            ]
+        )
+        return list(await asyncio.gather(*(self.forecast(*key) for key in keys)))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+weather_service = WeatherService()
+
+
+@contextlib.asynccontextmanager
+async def close_weather_client():
+    """Lifespan task closing the shared client's connections at shutdown."""
+    try:
+        yield
+    finally:
+        await weather_service.aclose()
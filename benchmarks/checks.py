@@ -0,0 +1,339 @@
+"""End-to-end checks of the site data pipeline on synthetic data and local stand-ins.
+
+Usage::
+
+    python -m benchmarks.checks              # run every check
+    python -m benchmarks.checks few_inverters
+
+Each check builds what it needs in a temporary directory and fails with a
+message describing the first mismatch; the exit status is non-zero if any
+check failed. External services are replaced by local stand-ins: a stub
+HTTP server for Open-Meteo, and for Redis the server at
+``PEAK_CHECK_REDIS_URL`` or an in-process fakeredis server (checks needing
+Redis are skipped when neither is available).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import reflex as rx
+
+from app.data.sheet_cache import cache_dir_for
+from app.data.site_dataset import STAGES, SiteDataset
+from app.data.site_store import site_store
+from app.states.dashboard_state import GRID_REFS, HEATMAP_FLAGS, DashboardState
+from app.weather_service import WeatherService
+from benchmarks.synthetic import (
+    master_report_sheets,
+    write_epc_input,
+    write_master_report,
+)
+
+
+class Skipped(Exception):
+    """Raised by a check whose prerequisites are not available."""
+
+
+def _expect(condition: bool, message: str):
+    if not condition:
+        raise AssertionError(message)
+
+
+@contextlib.contextmanager
+def _redis_stand_in():
+    """URL of a Redis-compatible server for the duration of a check."""
+    url = os.environ.get("PEAK_CHECK_REDIS_URL")
+    if url:
+        yield url
+        return
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        raise Skipped("set PEAK_CHECK_REDIS_URL or install fakeredis") from None
+    server = TcpFakeServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        host, port = server.server_address
+        yield f"redis://{host}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def check_few_inverters():
+    """Sites with fewer inverters than heatmap cells keep their inverter stage."""
+    params = {"controllers": 2, "motors": 3, "inverters": 4, "days": 5}
+    sheets = master_report_sheets(**params)
+    with tempfile.TemporaryDirectory() as workdir:
+        master_file = write_master_report(Path(workdir) / "master.xlsx", **params)
+        try:
+            dataset = SiteDataset("check", master_file=str(master_file))
+            grid = dataset.stage("inverter").get("_inv_grid")
+            window = dataset.window("inverter", "2025-12-09", "2025-12-10")
+        finally:
+            shutil.rmtree(cache_dir_for(master_file), ignore_errors=True)
+    _expect(grid is not None, "inverter stage failed to load")
+    _expect(grid.lost.shape == (3, 6), f"grid shape is {grid.lost.shape}")
+    _expect(
+        list(grid.labels.flat[4:]) == ["Empty"] * 14, "padding cells are not 'Empty'"
+    )
+    lost = sheets["Inverter - Lost Energy"].iloc[:, 1:].to_numpy()
+    module = sheets["Inverter Mod - Lost Energy"].iloc[:, 1:].to_numpy()
+    expected = np.pad((lost + module).sum(axis=0), (0, 14))
+    _expect(
+        np.allclose(grid.lost.flat, expected, rtol=1e-5),
+        "inverter lost energy does not match the sheets",
+    )
+    expected = np.pad((lost + module)[1:3].sum(axis=0), (0, 14))
+    _expect(
+        np.allclose(window["_inv_grid"].lost.flat, expected, rtol=1e-5),
+        "windowed inverter lost energy does not match the sheets",
+    )
+
+
+async def _state_roundtrip(url: str, site_id: str, epc_file: Path, master_file: Path):
+    """Store a session showing a site from one worker and restore it on another
+    that has not loaded the site; returns the size of the stored state."""
+    from redis.asyncio import Redis
+    from reflex.istate.manager.redis import StateManagerRedis
+
+    token = rx.BaseStateToken(ident=uuid.uuid4().hex, cls=DashboardState)
+    dataset = SiteDataset(site_id, str(epc_file), str(master_file))
+    site_store.add(dataset)
+    writer = StateManagerRedis(redis=Redis.from_url(url))
+    try:
+        state = await writer.get_state(token, top_level=False)
+        state._held_site_id = site_id
+        for stage in STAGES:
+            state._apply_stage_values(dataset.stage(stage), stage)
+        for flag in HEATMAP_FLAGS.values():
+            setattr(state, flag, True)
+        refs = {name: getattr(state, name) for name in GRID_REFS.values()}
+        grids = {name: site_store.grid(ref) for name, ref in refs.items()}
+        _expect(all(grids.values()), "the first worker did not resolve every grid")
+        await writer.set_state(token, state)
+        payload = await writer.redis.get(token._state_key(DashboardState))
+    finally:
+        await writer.close()
+
+    # A second worker: the same site registered, but none of its stages loaded.
+    site_store.invalidate(site_id)
+    dataset = SiteDataset(site_id, str(epc_file), str(master_file))
+    site_store.add(dataset)
+    reader = StateManagerRedis(redis=Redis.from_url(url))
+    try:
+        state = await reader.get_state(token, top_level=False)
+        await reader.redis.delete(token._state_key(DashboardState))
+    finally:
+        await reader.close()
+        site_store.invalidate(site_id)
+    restored = {name: getattr(state, name) for name in GRID_REFS.values()}
+    _expect(restored == refs, "grid references changed in the round trip")
+    _expect(
+        all(site_store.grid(ref) is None for ref in restored.values()),
+        "grids resolved before their stages were loaded",
+    )
+    site_store.add(dataset)
+    try:
+        event = DashboardState.toggle_tracker_modal.fn(state)
+        _expect(
+            event is not None and event.handler.fn.__name__ == "reload_stages",
+            "an event on the restored state did not reload the missing grids",
+        )
+        for ref in restored.values():
+            dataset.stage(ref.stage)
+        for name, ref in restored.items():
+            grid = site_store.grid(ref)
+            _expect(
+                grid is not None and grid.total_lost == grids[name].total_lost,
+                f"{name} does not match the first worker's grid after reloading",
+            )
+        _expect(state._reload_missing_grids() is None, "reloaded grids still missing")
+    finally:
+        site_store.invalidate(site_id)
+    return len(payload)
+
+
+def check_state_roundtrip():
+    """Sessions keep grid references, not grids, through a Redis round trip."""
+    plants = {
+        "small": {"controllers": 2, "motors": 3, "inverters": 4, "combiner_boxes": 2},
+        "large": {"controllers": 60, "motors": 60, "combiner_boxes": 24},
+    }
+    sizes = {}
+    with _redis_stand_in() as url, tempfile.TemporaryDirectory() as workdir:
+        for name, params in plants.items():
+            epc_file = write_epc_input(Path(workdir) / f"{name}-epc.xlsx", **params)
+            master_file = write_master_report(
+                Path(workdir) / f"{name}-master.xlsx", **params
+            )
+            try:
+                sizes[name] = asyncio.run(
+                    _state_roundtrip(url, f"check-{name}", epc_file, master_file)
+                )
+            finally:
+                for path in (epc_file, master_file):
+                    shutil.rmtree(cache_dir_for(path), ignore_errors=True)
+    _expect(
+        abs(sizes["large"] - sizes["small"]) < 256,
+        f"stored state grows with the plant: {sizes}",
+    )
+
+
+class _ForecastStub(BaseHTTPRequestHandler):
+    """Open-Meteo stand-in: answers every location with the server's current
+    ``generation``, after ``delay`` seconds, or with a 500 if ``failing``."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+        time.sleep(server.delay)
+        if server.failing:
+            self.send_error(500)
+            return
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        latitudes = query["latitude"][0].split(",")
+        forecasts = [
+            {"latitude": float(lat), "current": {"generation": server.generation}}
+            for lat in latitudes
+        ]
+        body = json.dumps(forecasts if len(forecasts) > 1 else forecasts[0])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def _forecast_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ForecastStub)
+    server.lock = threading.Lock()
+    server.requests, server.delay, server.failing, server.generation = [], 0.0, False, 1
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _generation(forecast: dict) -> int:
+    return forecast["current"]["generation"]
+
+
+async def _weather_service(server, url: str):
+    service = WeatherService(url=url, ttl=0.5, max_stale=30)
+    try:
+        # TTL: a fresh forecast is served from the cache.
+        first = await service.forecast(42.16, -120.4)
+        await service.forecast(42.161, -120.399)
+        _expect(_generation(first) == 1, f"unexpected forecast {first}")
+        _expect(len(server.requests) == 1, "a fresh forecast was fetched again")
+
+        # Single flight: concurrent lookups of one location share a request.
+        server.delay = 0.2
+        results = await asyncio.gather(
+            *(service.forecast(35.0, -110.0) for _ in range(10))
+        )
+        _expect(len(server.requests) == 2, "concurrent lookups were not coalesced")
+        _expect(all(r == results[0] for r in results), "coalesced lookups differ")
+
+        # Stale-while-revalidate: past the TTL the old forecast comes back at
+        # once, and one background refresh replaces it.
+        server.generation = 2
+        await asyncio.sleep(0.6)
+        start = time.perf_counter()
+        stale = await asyncio.gather(
+            *(service.forecast(42.16, -120.4) for _ in range(5))
+        )
+        _expect(
+            time.perf_counter() - start < server.delay,
+            "a stale forecast waited for the refresh",
+        )
+        _expect(all(_generation(d) == 1 for d in stale), "stale forecast not served")
+        await asyncio.sleep(server.delay + 0.1)
+        _expect(len(server.requests) == 3, "stale lookups did not share one refresh")
+        fresh = await service.forecast(42.16, -120.4)
+        _expect(_generation(fresh) == 2, "the refresh did not replace the forecast")
+
+        # A failed refresh keeps serving the last known forecast.
+        server.failing = True
+        await asyncio.sleep(0.6)
+        await service.forecast(42.16, -120.4)
+        await asyncio.sleep(server.delay + 0.1)
+        kept = await service.forecast(42.16, -120.4)
+        _expect(_generation(kept) == 2, "a failed refresh dropped the forecast")
+        await asyncio.sleep(server.delay + 0.1)
+
+        # Batches: uncached locations of forecast_many share one request.
+        server.failing, server.delay = False, 0.0
+        del server.requests[:]
+        batch = await service.forecast_many([(10.0, 10.0), (11.0, 11.0), (12.0, 12.0)])
+        _expect(len(server.requests) == 1, "forecast_many did not batch")
+        _expect(
+            [d["latitude"] for d in batch] == [10.0, 11.0, 12.0],
+            "batched forecasts out of order",
+        )
+    finally:
+        await service.aclose()
+
+
+def check_weather_service():
+    """The weather service caches, coalesces and revalidates against a stub."""
+    with _forecast_stub() as server:
+        host, port = server.server_address
+        asyncio.run(_weather_service(server, f"http://{host}:{port}/v1/forecast"))
+
+
+CHECKS = {
+    "few_inverters": check_few_inverters,
+    "state_roundtrip": check_state_roundtrip,
+    "weather_service": check_weather_service,
+}
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("checks", nargs="*", help=f"any of {', '.join(CHECKS)}")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.checks) - set(CHECKS))
+    if unknown:
+        parser.error(f"unknown checks: {', '.join(unknown)}")
+    logging.basicConfig(level=logging.WARNING)
+
+    failed = 0
+    for name in args.checks or CHECKS:
+        try:
+            CHECKS[name]()
+        except Skipped as e:
+            print(f"skip  {name}: {e}")
+        except Exception:
+            failed += 1
+            print(f"FAIL  {name}")
+            traceback.print_exc()
+        else:
+            print(f"ok    {name}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
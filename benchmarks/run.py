@@ -0,0 +1,225 @@
+"""Time site ingestion, computed vars and figure builds on a synthetic site.
+
+Usage::
+
+    python -m benchmarks.run --controllers 120 --motors 90 --days 30 \\
+        --output benchmark-results.json
+
+    python -m benchmarks.run --sweep --repeat 1
+
+Each measurement is repeated ``--repeat`` times and its min/median/max are
+written to the output file as JSON, together with the parameters used, so
+runs can be compared across commits and site sizes. ``--sweep`` times every
+size in ``SWEEP``; a size that fails is recorded with its error and the
+sweep moves on to the next one.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import plotly.graph_objects as go
+from reflex_base.utils.serializers import serialize
+
+from app import figures
+from app.data.sheet_cache import cache_dir_for
+from app.data.site_dataset import STAGES, SiteDataset
+from app.data.site_store import site_store
+from app.states.dashboard_state import DashboardState
+from benchmarks.synthetic import write_epc_input, write_master_report
+
+COMPUTED_VARS = (
+    "motors_with_issues_list",
+    "cb_issues_list",
+    "inv_issues_list",
+    "tracker_heatmap_fig",
+    "cb_heatmap_fig",
+    "inv_heatmap_fig",
+    "waterfall_plotly_fig",
+)
+# Site sizes timed by --sweep, from a plant with fewer inverters than the
+# inverter heatmap has cells to one whose tracker sheets are close to Excel's
+# 16,384-column limit.
+SWEEP = (
+    {"controllers": 4, "motors": 10, "inverters": 4, "combiner_boxes": 4},
+    {"controllers": 36, "motors": 56, "inverters": 18, "combiner_boxes": 16},
+    {"controllers": 120, "motors": 90, "inverters": 60, "combiner_boxes": 24},
+    {"controllers": 160, "motors": 100, "inverters": 100, "combiner_boxes": 24},
+)
+FIGURES = {
+    "tracker": ("_tracker_grid", figures.tracker_heatmap_figure),
+    "cb": ("_cb_grid", figures.cb_heatmap_figure),
+    "inverter": ("_inv_grid", figures.inv_heatmap_figure),
+}
+
+
+def _timed(timings: dict[str, list[float]], name: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings.setdefault(name, []).append(time.perf_counter() - start)
+    return result
+
+
+def _state_view(dataset: SiteDataset) -> SimpleNamespace:
+    """Stand-in for a ``DashboardState`` showing a loaded site.
+
+    The stage values are applied the way the state applies them, so the
+    grids are ``GridRef``s resolved through the shared site store.
+    """
+    view = SimpleNamespace(
+        **{
+            name: field.default_value()
+            for name, field in DashboardState.get_fields().items()
+        }
+    )
+    view._held_site_id = dataset.site_id
+    for stage in STAGES:
+        DashboardState._apply_stage_values(view, dataset.stage(stage), stage)
+    return view
+
+
+def _check_not_empty(name: str, value):
+    """Fail rather than time a computed var that found no site data."""
+    size = len(value.data) if isinstance(value, go.Figure) else len(value)
+    if not size:
+        raise RuntimeError(f"{name} is empty; the benchmark view has no site data")
+
+
+def _run_once(
+    epc_file: Path, master_file: Path, timings: dict[str, list[float]], sizes: dict
+):
+    for path in (epc_file, master_file):
+        shutil.rmtree(cache_dir_for(path), ignore_errors=True)
+    cold = SiteDataset("benchmark", str(epc_file), str(master_file))
+    for stage in STAGES:
+        _timed(timings, f"ingest.cold.{stage}", cold.stage, stage)
+
+    warm = SiteDataset("benchmark", str(epc_file), str(master_file))
+    values: dict = {}
+    for stage in STAGES:
+        values.update(_timed(timings, f"ingest.warm.{stage}", warm.stage, stage))
+
+    # Figures first, on the freshly loaded grids: the computed vars below then
+    # measure what every further session pays once the figures are memoized.
+    for name, (grid_name, builder) in FIGURES.items():
+        grid = values.get(grid_name)
+        fig = _timed(timings, f"figure.{name}.build", builder, grid)
+        _timed(timings, f"figure.{name}.memoized", builder, grid)
+        payload = _timed(timings, f"figure.{name}.serialize", serialize, fig)
+        _timed(timings, f"figure.{name}.serialize_cached", serialize, fig)
+        sizes[f"figure.{name}.payload_bytes"] = len(json.dumps(payload))
+        if grid is not None:
+            sizes[f"grid.{name}.cells"] = int(grid.lost.size)
+
+    site_store.add(warm)
+    try:
+        view = _state_view(warm)
+        for name in COMPUTED_VARS:
+            fget = DashboardState.computed_vars[name].fget
+            _check_not_empty(name, _timed(timings, f"computed_var.{name}", fget, view))
+    finally:
+        site_store.invalidate(warm.site_id)
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    return {
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "max_s": max(samples),
+    }
+
+
+def _benchmark(params: dict, repeat: int) -> dict:
+    """Time one site size; failures are recorded instead of raised."""
+    timings: dict[str, list[float]] = {}
+    sizes: dict[str, int] = {}
+    result: dict = {"params": params}
+    with tempfile.TemporaryDirectory(prefix="peak-bench-") as workdir:
+        epc_file = write_epc_input(Path(workdir) / "epc_input.xlsx", **params)
+        master_file = Path(workdir) / "master_report.xlsx"
+        try:
+            _timed(
+                timings, "generate.workbook", write_master_report, master_file, **params
+            )
+            sizes["workbook_bytes"] = master_file.stat().st_size
+            for _ in range(repeat):
+                _run_once(epc_file, master_file, timings, sizes)
+        except Exception as e:
+            logging.exception(f"Benchmark failed for {params}: {e}")
+            result["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            for path in (epc_file, master_file):
+                shutil.rmtree(cache_dir_for(path), ignore_errors=True)
+    result["sizes"] = sizes
+    result["timings"] = {name: _summary(samples) for name, samples in timings.items()}
+    return result
+
+
+def _print_run(run: dict):
+    print(", ".join(f"{name}={value}" for name, value in run["params"].items()))
+    if run["timings"]:
+        width = max(len(name) for name in run["timings"])
+        for name, summary in run["timings"].items():
+            print(f"  {name:<{width}}  {summary['median_s'] * 1000:10.2f} ms")
+    if "error" in run:
+        print(f"  FAILED: {run['error']}")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--controllers", type=int, default=36)
+    parser.add_argument("--motors", type=int, default=56, help="per controller")
+    parser.add_argument("--inverters", type=int, default=18)
+    parser.add_argument("--combiner-boxes", type=int, default=16, help="per inverter")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="time every size in SWEEP instead of the size given",
+    )
+    parser.add_argument("--output", default="benchmark-results.json")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    params = {
+        "controllers": args.controllers,
+        "motors": args.motors,
+        "inverters": args.inverters,
+        "combiner_boxes": args.combiner_boxes,
+        "days": args.days,
+        "seed": args.seed,
+    }
+    sizes = [{**params, **size} for size in SWEEP] if args.sweep else [params]
+    runs = []
+    for size in sizes:
+        runs.append(_benchmark(size, args.repeat))
+        _print_run(runs[-1])
+
+    results = {
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "runs": runs,
+    }
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+    failed = sum("error" in run for run in runs)
+    if failed:
+        print(f"{failed} of {len(runs)} sizes failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
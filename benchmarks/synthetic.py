@@ -0,0 +1,144 @@
+"""Synthetic master reports shaped like the ones the dashboard ingests.
+
+Only the sheets the dashboard reads are generated, with the same column
+naming as real reports (``b0101tc1/m001`` motors, ``b0101in1`` inverters,
+``b0101in1 - CB 01`` combiner boxes), so the ingestion code runs unchanged.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CLASSIFICATIONS = [f"String Outage ({n})" for n in range(1, 9)]
+
+
+def _block_tags(count: int, suffix: str) -> list[str]:
+    return [f"b{i // 99 + 1:02d}{i % 99 + 1:02d}{suffix}" for i in range(count)]
+
+
+def _sparse(rng: np.random.Generator, shape, scale: float, rate: float):
+    values = rng.gamma(1.5, scale, size=shape)
+    return np.where(rng.random(shape) < rate, values, 0.0)
+
+
+def master_report_sheets(
+    controllers: int = 36,
+    motors: int = 56,
+    inverters: int = 18,
+    combiner_boxes: int = 16,
+    days: int = 7,
+    seed: int = 0,
+    start: str = "2025-12-08",
+) -> dict[str, pd.DataFrame]:
+    """Build the sheets of a synthetic master report.
+
+    ``motors`` is per controller and ``combiner_boxes`` per inverter; every
+    sheet has one row per day.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D")
+    date_strings = dates.strftime("%m/%d/%Y")
+
+    def _frame(index_name, index, columns, values):
+        frame = pd.DataFrame(values, columns=columns)
+        frame.insert(0, index_name, index)
+        return frame
+
+    sheets: dict[str, pd.DataFrame] = {}
+    expected = rng.uniform(80, 160, days) * max(inverters, 1) / 18
+    measured = expected * rng.uniform(0.8, 0.99, days)
+    sheets["Site Metrics"] = pd.DataFrame(
+        {
+            "DateTime": date_strings,
+            "Measured Energy": measured.round(1),
+            "Expected Energy": expected.round(1),
+            "Curtailed Energy": np.zeros(days),
+            "Performance": (measured / expected * 100).round(1),
+            "POI Curtail": np.zeros(days),
+        }
+    )
+
+    motor_tags = [
+        f"{controller}/m{m + 1:03d}"
+        for controller in _block_tags(controllers, "tc1")
+        for m in range(motors)
+    ]
+    shape = (days, len(motor_tags))
+    sheets["Tracker - Affected DC Capacity"] = _frame(
+        "DateTime", date_strings, motor_tags, _sparse(rng, shape, 20.0, 0.1)
+    )
+    sheets["Tracker - Lost Energy"] = _frame(
+        "DateTime", date_strings, motor_tags, _sparse(rng, shape, 0.05, 0.1)
+    )
+
+    inverter_tags = _block_tags(inverters, "in1")
+    shape = (days, inverters)
+    capacity = np.broadcast_to(rng.uniform(3000, 3600, inverters), shape)
+    for name, values in [
+        ("Inverter - Lost Energy", _sparse(rng, shape, 500.0, 0.05)),
+        ("Inverter - DC Capacity", capacity),
+        ("Inverter Mod - Lost Energy", _sparse(rng, shape, 50.0, 0.2)),
+        ("inv_kW_offline_lost", _sparse(rng, shape, 500.0, 0.05)),
+        ("inv_kW_derate_lost", _sparse(rng, shape, 2000.0, 0.8)),
+    ]:
+        sheets[name] = _frame("Unnamed: 0", dates, inverter_tags, values)
+    sheets["site_kW_plant_offline_loss (pi)"] = _frame(
+        "Unnamed: 0",
+        dates,
+        ["calc_site_kW_plant_offline_loss_pi"],
+        _sparse(rng, (days, 1), 5000.0, 0.1),
+    )
+
+    cb_tags = [
+        f"{inverter} - CB {k + 1:02d}"
+        for k in range(combiner_boxes)
+        for inverter in inverter_tags
+    ]
+    shape = (days, len(cb_tags))
+    lost = _sparse(rng, shape, 0.02, 0.5)
+    sheets["DC - Lost Energy"] = _frame("timestamp", dates, cb_tags, lost)
+    sheets["DC - Affected Capacity"] = _frame(
+        "timestamp", dates, cb_tags, np.where(lost > 0, 30.0, 0.0)
+    )
+    labels = rng.choice(CLASSIFICATIONS, size=shape).astype(object)
+    labels[lost == 0] = None
+    sheets["DC - Classification"] = _frame("timestamp", dates, cb_tags, labels)
+
+    drivers = ["Plant Outage", "Inverters", "Modules", "Derate", "Trackers", "DC"]
+    sheets["All - Daily Lost Energy"] = _frame(
+        "Unnamed: 0", dates, drivers, _sparse(rng, (days, len(drivers)), 3.0, 0.6)
+    )
+    return sheets
+
+
+def write_epc_input(path: str | Path, inverters: int = 18, **_) -> Path:
+    """Write a synthetic EPC input file with the site details sheet."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    details = pd.DataFrame(
+        [
+            ("Client Name", "Synthetic Client"),
+            ("Plant AC Capacity (kW)", 2700.0 * inverters),
+            ("Plant DC Capacity (kW)", 3372.0 * inverters),
+            ("Latitude", 42.16),
+            ("Longitude", -120.4),
+            ("Plant Substantial Completion Date", "7/3/2023"),
+            ("Inverter Model", "Power Electronics"),
+            ("POI Curtail Limit (kW)", 2700.0 * inverters),
+        ],
+        columns=["Description", "Value"],
+    )
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        details.to_excel(writer, sheet_name="Site Details", index=False)
+    return path
+
+
+def write_master_report(path: str | Path, **params) -> Path:
+    """Write a synthetic master report workbook and return its path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, frame in master_report_sheets(**params).items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    return path